@@ -1,6 +1,7 @@
 # accounts/admin.py
 from django.contrib import admin
 from .models import Profile
+from .tokens import bump_versions
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
@@ -11,11 +12,19 @@ class ProfileAdmin(admin.ModelAdmin):
     actions = ['approve_instructors', 'revoke_instructors']
 
     def approve_instructors(self, request, queryset):
+        # Read before the update: a queryset filtered on the approval flag matches nothing after it
+        user_ids = list(queryset.values_list('user_id', flat=True))
         updated = queryset.update(is_approved_instructor=True)
+        # Queryset updates skip the save signals that revoke outdated token claims
+        bump_versions(user_ids)
         self.message_user(request, f"{updated} profile(s) approved as instructor.")
     approve_instructors.short_description = "Approve selected profiles as instructors"
 
     def revoke_instructors(self, request, queryset):
+        # Read before the update: a queryset filtered on the approval flag matches nothing after it
+        user_ids = list(queryset.values_list('user_id', flat=True))
         updated = queryset.update(is_approved_instructor=False)
+        # Queryset updates skip the save signals that revoke outdated token claims
+        bump_versions(user_ids)
         self.message_user(request, f"{updated} profile(s) revoked instructor approval.")
     revoke_instructors.short_description = "Revoke instructor approval for selected profiles"
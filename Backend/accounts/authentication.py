@@ -0,0 +1,38 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import tokens, user_cache
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    """JWT authentication that loads the user, with its profile, through ``accounts.user_cache``."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from exc
+
+        user = user_cache.get_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+class ClaimsJWTAuthentication(CachedUserJWTAuthentication):
+    """JWT authentication that rejects tokens whose role claims have been superseded."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if tokens.VERSION_CLAIM in validated_token:
+            if validated_token[tokens.VERSION_CLAIM] != tokens.current_version(user.pk):
+                raise AuthenticationFailed('Token role claims are out of date.', code='claims_outdated')
+        return user
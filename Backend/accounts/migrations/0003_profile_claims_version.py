@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_is_approved_instructor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='claims_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
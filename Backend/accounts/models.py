@@ -16,6 +16,8 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_approved_instructor = models.BooleanField(default=False)
+    # Bumped on role or approval changes; access tokens carrying an older value are refused
+    claims_version = models.PositiveIntegerField(default=0, editable=False)
 
 
     def __str__(self) -> str:
@@ -0,0 +1,53 @@
+"""Password hashing for async views, off the event loop.
+
+A PBKDF2 check costs tens of milliseconds of CPU. Django's own
+``acheck_password`` runs it on the event loop, which stalls every other
+request the worker is serving meanwhile. These helpers run it on a pool of
+``PASSWORD_HASH_WORKERS`` threads instead. hashlib releases the GIL while it
+hashes, so the threads run in parallel, and the bound keeps a burst of logins
+from taking every core the worker shares with its other requests.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password, verify_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash',
+            )
+    return _executor
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+
+
+async def acheck_password(user, raw_password):
+    """Whether ``raw_password`` is ``user``'s password.
+
+    ``user`` may be None, in which case a hash is still computed, so an unknown
+    username takes as long to reject as a wrong password. A hash made with
+    outdated parameters is upgraded, as ``User.check_password`` does.
+    """
+    encoded = user.password if user is not None else UNUSABLE_PASSWORD_PREFIX
+    is_correct, must_update = await _run(verify_password, raw_password, encoded)
+    if is_correct and must_update:
+        await aset_password(user, raw_password)
+        await user.asave(update_fields=['password'])
+    return is_correct
+
+
+async def aset_password(user, raw_password):
+    user.password = await _run(make_password, raw_password)
+    # Read by AbstractBaseUser.save to notify the password validators
+    user._password = raw_password
@@ -5,7 +5,10 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from techmate.instrumentation import SerializationTimingMixin
 from .models import Profile
+from .tokens import ClaimsRefreshToken
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -14,7 +17,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = ['name', 'age', 'role','is_approved_instructor']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     profile = ProfileSerializer(read_only=True)
     
     class Meta:
@@ -158,5 +161,11 @@ class ChangePasswordSerializer(serializers.Serializer):
     def save(self):
         user = self.context['request'].user
         user.set_password(self.validated_data['new_password'])
-        user.save()
-        return user
\ No newline at end of file
+        # request.user may be a cached copy; write only the field that changed
+        user.save(update_fields=['password'])
+        return user
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that mints access tokens with the user's current role claims."""
+    token_class = ClaimsRefreshToken
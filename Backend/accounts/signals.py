@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import tokens, user_cache
+from .models import Profile
+
+_CLAIM_FIELDS = ('role', 'is_approved_instructor')
+
+
+@receiver(pre_save, sender=Profile)
+def remember_previous_claims(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_claims = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(_CLAIM_FIELDS):
+        return
+    instance._previous_claims = Profile.objects.filter(pk=instance.pk).values_list(*_CLAIM_FIELDS).first()
+
+
+@receiver(post_save, sender=Profile)
+def revoke_outdated_claims(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_claims', None)
+    if previous is not None and previous != tuple(getattr(instance, field) for field in _CLAIM_FIELDS):
+        tokens.bump_versions([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def drop_cached_profile_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.user_id)
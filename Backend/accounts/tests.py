@@ -1,3 +1,179 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from techmate.async_dispatch import async_view
+from .models import Profile
+from . import user_cache
+from .views import LoginView
+from .tokens import bump_versions
+
+
+class RoleClaimTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='teacher', email='teacher@example.com', password='pass12345!')
+        self.profile = Profile.objects.create(user=self.user, name='Teacher', role='instructor')
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'teacher', 'password': 'pass12345!'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['tokens']
+
+    def create_tutorial(self, access):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/tutorials/', {'title': 'Claims', 'description': 'From the token'},
+                HTTP_AUTHORIZATION=f'Bearer {access}',
+            )
+        return response, queries
+
+    def test_access_token_carries_role_claims(self):
+        claims = AccessToken(self.login()['access'])
+        self.assertEqual((claims['role'], claims['is_approved_instructor'], claims['claims_version']), ('instructor', False, 0))
+
+    def test_permission_checks_do_not_load_the_profile(self):
+        access = self.login()['access']
+        response, queries = self.create_tutorial(access)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse([query for query in queries if 'FROM "accounts_profile"' in query['sql']])
+
+    def test_role_change_revokes_tokens_until_refresh(self):
+        tokens = self.login()
+        self.profile.role = 'student'
+        self.profile.save()
+
+        response, _ = self.create_tutorial(tokens['access'])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'claims_outdated')
+
+        refreshed = self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}).data['access']
+        self.assertEqual(AccessToken(refreshed)['role'], 'student')
+        response, _ = self.create_tutorial(refreshed)
+        self.assertEqual(response.status_code, 403)
+
+    def test_unrelated_profile_edits_keep_tokens_valid(self):
+        access = self.login()['access']
+        self.profile.name = 'Renamed'
+        self.profile.save()
+        self.assertEqual(self.create_tutorial(access)[0].status_code, 201)
+
+    def test_bulk_approval_changes_bump_versions(self):
+        access = self.login()['access']
+        Profile.objects.filter(pk=self.profile.pk).update(is_approved_instructor=True)
+        bump_versions([self.user.pk])
+        self.assertEqual(self.create_tutorial(access)[0].status_code, 401)
+
+
+class UserCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear_local()
+        self.user = User.objects.create_user(username='learner', email='learner@example.com', password='pass12345!')
+        self.profile = Profile.objects.create(user=self.user, name='Learner')
+        response = self.client.post('/api/auth/login/', {'username': 'learner', 'password': 'pass12345!'})
+        self.tokens = response.data['tokens']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def me(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_steady_state_requests_make_no_auth_queries(self):
+        self.me()
+        before = user_cache.stats()
+        queries, data = self.me()
+        self.assertEqual(queries, 0)
+        self.assertEqual(data['profile']['name'], 'Learner')
+        self.assertEqual(user_cache.stats()['local_hits'], before['local_hits'] + 1)
+
+    def test_shared_tier_serves_other_processes(self):
+        self.me()
+        user_cache.clear_local()
+        before = user_cache.stats()
+        self.assertEqual(self.me()[0], 0)
+        self.assertEqual(user_cache.stats()['shared_hits'], before['shared_hits'] + 1)
+
+    def test_saves_and_password_changes_invalidate(self):
+        self.me()
+        response = self.client.patch('/api/auth/profile/', {'name': 'Renamed'})
+        self.assertEqual(response.data['profile']['name'], 'Renamed')
+        self.assertEqual(self.me()[1]['profile']['name'], 'Renamed')
+
+        self.client.post('/api/auth/change-password/', {
+            'old_password': 'pass12345!', 'new_password': 'N3w-secret-pass', 'new_password_confirm': 'N3w-secret-pass',
+        })
+        self.assertTrue(user_cache.get_user(self.user.pk).check_password('N3w-secret-pass'))
+
+    def test_bulk_revocation_in_the_admin_invalidates(self):
+        Profile.objects.filter(pk=self.profile.pk).update(role='instructor', is_approved_instructor=True)
+        self.assertTrue(self.me()[1]['profile']['is_approved_instructor'])
+
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass12345!')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/accounts/profile/', {
+                'action': 'revoke_instructors', '_selected_action': [self.profile.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        access = self.client.post('/api/auth/token/refresh/', {'refresh': self.tokens['refresh']}).data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertFalse(self.me()[1]['profile']['is_approved_instructor'])
+
+    def test_bulk_revocation_through_the_filtered_changelist_invalidates(self):
+        Profile.objects.filter(pk=self.profile.pk).update(role='instructor', is_approved_instructor=True)
+        self.assertTrue(self.me()[1]['profile']['is_approved_instructor'])
+
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass12345!')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/accounts/profile/?is_approved_instructor__exact=1', {
+                'action': 'revoke_instructors', '_selected_action': [self.profile.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+        access = self.client.post('/api/auth/token/refresh/', {'refresh': self.tokens['refresh']}).data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertFalse(self.me()[1]['profile']['is_approved_instructor'])
+
+
+class AsyncLoginTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='async', email='async@example.com', password='pass12345!')
+        Profile.objects.create(user=self.user, name='Async', role='instructor')
+        self.login = async_to_sync(async_view(LoginView))
+
+    def post(self, username, password):
+        request = APIRequestFactory().post('/api/auth/login/', {'username': username, 'password': password})
+        return self.login(request)
+
+    def test_accepts_username_or_email_and_rejects_bad_credentials(self):
+        for username in ('async', 'async@example.com'):
+            response = self.post(username, 'pass12345!')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(AccessToken(response.data['tokens']['access'])['role'], 'instructor')
+        self.assertEqual(self.post('async', 'wrong').status_code, 401)
+        self.assertEqual(self.post('nobody', 'pass12345!').status_code, 401)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.post('async', 'pass12345!').status_code, 401)
+
+    def test_upgrades_outdated_hashes(self):
+        self.user.password = make_password('pass12345!', hasher='pbkdf2_sha1')
+        self.user.save()
+        self.assertEqual(self.post('async', 'pass12345!').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.user.check_password('pass12345!'))
@@ -0,0 +1,95 @@
+"""Role claims carried in access tokens.
+
+Every access token carries ``role``, ``is_approved_instructor`` and the
+profile's ``claims_version`` at the time it was minted. Permission classes
+read the first two straight from ``request.auth`` and never load the
+profile. A role or approval change bumps ``Profile.claims_version``.
+``ClaimsJWTAuthentication`` then rejects tokens with the old version, the
+client refreshes, and the new access token carries the new claims.
+
+The current version of each user is cached. Bumping deletes the cached
+value, so a change is enforced at once on a shared cache (Redis, files). On
+per-process local memory it is enforced within
+``JWT_CLAIMS_VERSION_CACHE_TIMEOUT`` seconds.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import user_cache
+from .models import Profile
+
+ROLE_CLAIM = 'role'
+APPROVED_CLAIM = 'is_approved_instructor'
+VERSION_CLAIM = 'claims_version'
+
+
+def _version_key(user_id):
+    return f'accounts:claims-version:{user_id}'
+
+
+def _profile_claims(user_id):
+    row = (
+        Profile.objects.filter(user_id=user_id)
+        .values_list('role', 'is_approved_instructor', 'claims_version')
+        .first()
+    )
+    return row or (None, False, 0)
+
+
+def current_version(user_id):
+    """The claims version tokens of ``user_id`` must carry, usually answered by the cache."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _profile_claims(user_id)[2]
+        cache.set(key, version, settings.JWT_CLAIMS_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def bump_versions(user_ids):
+    """Invalidate the access tokens and cached users of ``user_ids`` after a role or approval change.
+
+    Callers change profiles with queryset updates, which skip the save signals
+    that would otherwise drop the cached users.
+    """
+    user_ids = list(user_ids)
+    Profile.objects.filter(user_id__in=user_ids).update(claims_version=F('claims_version') + 1)
+    keys = [_version_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # A request that read the old version before the commit may have cached it again
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    for user_id in user_ids:
+        # Drops the entry now and again on commit, for the same reason
+        user_cache.invalidate(user_id)
+
+
+def request_claims(request):
+    """``(role, is_approved_instructor)`` of the caller, from the token when it carries them."""
+    token = request.auth
+    if token is not None and ROLE_CLAIM in token:
+        return token[ROLE_CLAIM], bool(token.get(APPROVED_CLAIM, False))
+    # Sessions, force_authenticate and tokens minted before claims existed
+    profile = getattr(request.user, 'profile', None)
+    if profile is None:
+        return None, False
+    return profile.role, profile.is_approved_instructor
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user's current role claims."""
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user_id = self[api_settings.USER_ID_CLAIM]
+        role, approved, version = _profile_claims(user_id)
+        access[ROLE_CLAIM] = role
+        access[APPROVED_CLAIM] = approved
+        access[VERSION_CLAIM] = version
+        # Prime the cache so the first request with this token needs no lookup
+        cache.set(_version_key(user_id), version, settings.JWT_CLAIMS_VERSION_CACHE_TIMEOUT)
+        return access
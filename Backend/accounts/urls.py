@@ -1,5 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from techmate.async_dispatch import api_view
 from .views import (
     RegisterView, LoginView, PasswordResetRequestView,
     PasswordResetConfirmView, CurrentUserView, ProfileUpdateView, ChangePasswordView
@@ -7,7 +8,7 @@ from .views import (
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', LoginView.as_view(), name='login'),
+    path('login/', api_view(LoginView), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('password-reset/', PasswordResetRequestView.as_view(), name='password_reset'),
     path('password-reset-confirm/', PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
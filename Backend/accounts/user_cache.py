@@ -0,0 +1,115 @@
+"""Two-tier cache of authenticated users and their profiles.
+
+Token authentication used to read ``auth_user`` on every request, and
+serializers then lazily read ``accounts_profile`` on top. This module keeps
+both objects, pickled together, in two tiers:
+
+* a per-process LRU of ``USER_CACHE_LOCAL_SIZE`` entries, each trusted for
+  ``USER_CACHE_LOCAL_TTL`` seconds, which answers without any I/O;
+* the shared Django cache, kept for ``USER_CACHE_TIMEOUT`` seconds.
+
+Saving a ``User`` or ``Profile``, and changing a password, drops the entry
+from the shared tier and from this process. Other processes notice within
+the local TTL. Every caller gets its own unpickled copy, so a request can
+never mutate another request's user.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from techmate.metrics import count_cache_lookup
+
+_local = OrderedDict()
+_lock = threading.Lock()
+_counts = Counter()
+
+
+def _key(user_id):
+    return f'accounts:user:{user_id}'
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+    count_cache_lookup('user', name)
+
+
+def _local_get(user_id):
+    with _lock:
+        entry = _local.get(user_id)
+        if entry is None:
+            return None
+        expires, payload = entry
+        if expires < time.monotonic():
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return payload
+
+
+def _local_set(user_id, payload):
+    with _lock:
+        _local[user_id] = (time.monotonic() + settings.USER_CACHE_LOCAL_TTL, payload)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.USER_CACHE_LOCAL_SIZE:
+            _local.popitem(last=False)
+
+
+def _load(user_id):
+    user = get_user_model().objects.select_related('profile').filter(pk=user_id).first()
+    return pickle.dumps(user, pickle.HIGHEST_PROTOCOL) if user is not None else None
+
+
+def get_user(user_id):
+    """Return the user with ``user_id``, with ``profile`` preloaded, or None when there is none."""
+    # Tokens carry the id as a string; key every tier the same way whatever the caller passes
+    user_id = str(user_id)
+    payload = _local_get(user_id)
+    if payload is not None:
+        _count('local_hits')
+    else:
+        payload = cache.get(_key(user_id))
+        if payload is not None:
+            _count('shared_hits')
+        else:
+            _count('misses')
+            payload = _load(user_id)
+            if payload is None:
+                return None
+            cache.set(_key(user_id), payload, settings.USER_CACHE_TIMEOUT)
+        _local_set(user_id, payload)
+    return pickle.loads(payload)
+
+
+def invalidate(user_id):
+    user_id = str(user_id)
+
+    def drop():
+        cache.delete(_key(user_id))
+        with _lock:
+            _local.pop(user_id, None)
+
+    drop()
+    # A request that loaded the old row before the commit may have cached it again
+    transaction.on_commit(drop)
+
+
+def stats():
+    """Lookups served by this process since it started, by tier, plus the overall hit rate."""
+    with _lock:
+        counts = {name: _counts[name] for name in ('local_hits', 'shared_hits', 'misses')}
+        counts['local_size'] = len(_local)
+    lookups = counts['local_hits'] + counts['shared_hits'] + counts['misses']
+    counts['hit_rate'] = (counts['local_hits'] + counts['shared_hits']) / lookups if lookups else 0.0
+    return counts
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
@@ -2,10 +2,13 @@ from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.conf import settings
+from . import passwords, user_cache
+from .models import Profile
+from .tokens import ClaimsRefreshToken
 from .serializers import (
     RegisterSerializer, UserSerializer, PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer, ProfileUpdateSerializer, ChangePasswordSerializer
@@ -20,7 +23,7 @@ class RegisterView(APIView):
             serializer = RegisterSerializer(data=request.data)
             if serializer.is_valid():
                 user = serializer.save()
-                refresh = RefreshToken.for_user(user)
+                refresh = ClaimsRefreshToken.for_user(user)
                 # Refresh user instance to ensure profile is loaded
                 user.refresh_from_db()
                 return Response({
@@ -63,17 +66,35 @@ class LoginView(APIView):
             user = authenticate(username=username_or_email, password=password)
         
         if user:
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                'message': 'Login successful',
-                'user': UserSerializer(user).data,
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
-            })
+            return self.logged_in(user)
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
+    async def apost(self, request):
+        """``post`` for ASGI workers, with the password hash checked off the event loop"""
+        username_or_email = request.data.get('username', '')
+        password = request.data.get('password', '')
+        field = 'email' if '@' in username_or_email else 'username'
+
+        try:
+            user = await User.objects.select_related('profile').aget(**{field: username_or_email})
+        except User.DoesNotExist:
+            user = None
+        # Checked even without a user, so unknown names cost as much time as wrong passwords
+        if await passwords.acheck_password(user, password) and user.is_active:
+            return await sync_to_async(self.logged_in)(user)
+        return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    def logged_in(self, user):
+        refresh = ClaimsRefreshToken.for_user(user)
+        return Response({
+            'message': 'Login successful',
+            'user': UserSerializer(user).data,
+            'tokens': {
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+            }
+        })
+
 
 class PasswordResetRequestView(APIView):
     permission_classes = [AllowAny]
@@ -95,7 +116,10 @@ class PasswordResetConfirmView(APIView):
     def post(self, request):
         serializer = PasswordResetConfirmSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            user = serializer.save()
+            # The save signal drops the cached user too; do it here as well so no
+            # worker keeps authenticating with the old password hash
+            user_cache.invalidate(user.pk)
             return Response({'message': 'Password reset successful. You can now login with your new password.'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -111,10 +135,12 @@ class ProfileUpdateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request):
-        profile = request.user.profile
+        # request.user comes from the user cache; write to a fresh row, not the cached copy
+        profile = Profile.objects.get(user=request.user)
         serializer = ProfileUpdateSerializer(profile, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
+            request.user.profile = serializer.instance
             return Response(UserSerializer(request.user).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -125,6 +151,7 @@ class ChangePasswordView(APIView):
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            user = serializer.save()
+            user_cache.invalidate(user.pk)
             return Response({'message': 'Password changed successfully.'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
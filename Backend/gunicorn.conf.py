@@ -0,0 +1,9 @@
+# Read by gunicorn from the working directory (start.sh runs it from here)
+import os
+
+
+def child_exit(server, worker):
+    # A replaced or crashed worker's in-flight requests must leave the live gauges
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
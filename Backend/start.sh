@@ -7,6 +7,16 @@ python manage.py migrate --noinput
 echo "📦 Collecting static files..."
 python manage.py collectstatic --noinput || true
 
+# Metrics of all workers are summed from per-process files here (see techmate/metrics.py);
+# files left by a previous run would be added in, so start from an empty directory
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/techmate-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 echo "🚀 Starting server..."
-exec gunicorn techmate.wsgi:application --bind 0.0.0.0:$PORT --workers 2
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    exec gunicorn techmate.asgi:application --bind 0.0.0.0:$PORT --workers ${WEB_CONCURRENCY:-2} \
+        --worker-class uvicorn.workers.UvicornWorker
+fi
+exec gunicorn techmate.wsgi:application --bind 0.0.0.0:$PORT --workers ${WEB_CONCURRENCY:-2}
 
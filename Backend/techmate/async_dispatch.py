@@ -0,0 +1,66 @@
+"""Run DRF views on the event loop when serving over ASGI.
+
+DRF's ``APIView`` only dispatches synchronously, so under ASGI every request
+would take a thread for its whole lifetime. ``async_view`` wraps a view class
+in a coroutine view instead. A method whose handler has an ``a``-prefixed
+coroutine twin (``aget`` beside ``get``, ``amy_certificates`` beside a
+viewset's ``my_certificates``) is served by that coroutine, after the usual
+DRF authentication, permission and throttle checks. Every other method goes
+to the unchanged synchronous view on a thread.
+
+``api_view`` picks between the two from ``ASYNC_VIEWS``, so URL confs are
+written once for both deployment modes.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def async_view(view_class, actions=None, **initkwargs):
+    if actions is not None:
+        sync_view = view_class.as_view(actions, **initkwargs)
+        handlers = dict(actions)
+    else:
+        sync_view = view_class.as_view(**initkwargs)
+        handlers = {method: method for method in view_class.http_method_names}
+    coroutines = {
+        method: f'a{name}' for method, name in handlers.items()
+        if callable(getattr(view_class, f'a{name}', None))
+    }
+    run_sync = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        method = request.method.lower()
+        if method not in coroutines:
+            return await run_sync(request, *args, **kwargs)
+
+        self = view_class(**initkwargs)
+        if actions is not None:
+            self.action_map = actions
+        self.setup(request, *args, **kwargs)
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # Authentication may load the user from the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, coroutines[method])(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    view.csrf_exempt = True
+    view.cls = view_class
+    view.initkwargs = initkwargs
+    view.actions = actions
+    return view
+
+
+def api_view(view_class, actions=None, **initkwargs):
+    """``async_view`` under ``ASYNC_VIEWS``, otherwise the plain synchronous ``as_view``."""
+    if settings.ASYNC_VIEWS:
+        return async_view(view_class, actions, **initkwargs)
+    if actions is not None:
+        return view_class.as_view(actions, **initkwargs)
+    return view_class.as_view(**initkwargs)
@@ -0,0 +1,91 @@
+"""Cold-start cost of loading the project, measured in a fresh interpreter.
+
+``profile_startup(target)`` runs one of ``TARGETS`` under ``python -X
+importtime`` and returns the wall time, the peak resident memory and the
+import time of every module. A fresh process is the only honest measurement:
+in an interpreter that already imported Django everything is cached.
+"""
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Libraries only some requests need; a worker should not load them at startup
+HEAVY_MODULES = ('reportlab', 'PIL')
+
+TARGETS = {
+    # What a gunicorn worker does before serving: load the app and its URLconf
+    'wsgi': (
+        "from techmate.wsgi import application\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+    ),
+    'check': (
+        "from django.core.management import execute_from_command_line\n"
+        "execute_from_command_line(['manage.py', 'check'])\n"
+    ),
+}
+
+_PREAMBLE = "import time\n_started = time.perf_counter()\n"
+_REPORT = (
+    "import json, resource, sys\n"
+    "print('\\n' + json.dumps({\n"
+    "    'seconds': time.perf_counter() - _started,\n"
+    "    'rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,\n"
+    "    'heavy': [name for name in %r if name in sys.modules],\n"
+    "}))\n"
+) % (HEAVY_MODULES,)
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class StartupProfile:
+    target: str
+    seconds: float
+    rss_bytes: int
+    heavy: list
+    imports: list = field(default_factory=list)
+
+    @property
+    def import_seconds(self):
+        return sum(timing.self_us for timing in self.imports) / 1_000_000
+
+    def slowest(self, count=15):
+        """Top-level packages by the time spent importing their modules."""
+        packages = {}
+        for timing in self.imports:
+            package = timing.module.split('.')[0]
+            packages[package] = packages.get(package, 0) + timing.self_us
+        return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def _parse_importtime(stderr):
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append(ImportTiming(module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def profile_startup(target):
+    """Measure ``target``, a key of ``TARGETS``, in a fresh interpreter."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'techmate.settings'))
+    script = _PREAMBLE + "import django\ndjango.setup()\n" + TARGETS[target] + _REPORT
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return StartupProfile(target=target, imports=_parse_importtime(result.stderr), **report)
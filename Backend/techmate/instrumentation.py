@@ -0,0 +1,179 @@
+"""Per-request timing: SQL, serialization, absolute URIs and the view itself.
+
+``InstrumentationMiddleware`` is enabled by ``REQUEST_INSTRUMENTATION``. For
+each request it wraps every database connection with ``execute_wrapper`` to
+count queries and their time. Code that is worth telling apart marks itself
+with ``span(name)``: serializers time ``serialize`` and ``absolute_uri``
+times ``uri``. The totals go out in a ``Server-Timing`` header, which
+browser devtools show beside the request, as ``db``, ``serialize``, ``uri``,
+``view`` (whatever is left) and ``total``.
+
+A request slower than ``SLOW_REQUEST_MS`` or issuing more than
+``SLOW_REQUEST_QUERIES`` queries is logged with its repeated SQL
+fingerprints. A statement run once per row of a page is the signature of an
+N+1 query.
+
+Under ASGI, Django runs a request's ORM calls on one thread of its own. The
+connection wrappers are entered on that thread, so async views are measured
+the same way.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Repeated statements listed per slow request
+DUPLICATES_LOGGED = 5
+
+_current = ContextVar('request_timings', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """``sql`` with its literals and placeholders replaced, so a statement run per row maps to one value."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+@dataclass
+class RequestTimings:
+    queries: int = 0
+    db_seconds: float = 0.0
+    spans: Counter = field(default_factory=Counter)
+    statements: Counter = field(default_factory=Counter)
+    _open: set = field(default_factory=set)
+
+    def __call__(self, execute, sql, params, many, context):
+        # The execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+            self.statements[fingerprint(sql)] += 1
+
+    def duplicates(self, count=DUPLICATES_LOGGED):
+        return [(sql, times) for sql, times in self.statements.most_common(count) if times > 1]
+
+    def server_timing(self, total):
+        # Spans that query the database count the query time under ``db`` too
+        metrics = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"']
+        metrics += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in sorted(self.spans.items())]
+        view = max(0.0, total - self.db_seconds - sum(self.spans.values()))
+        metrics += [f'view;dur={view * 1000:.1f}', f'total;dur={total * 1000:.1f}']
+        return ', '.join(metrics)
+
+
+def current():
+    """The timings of the request being instrumented, or None."""
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's ``name`` span.
+
+    Nested spans of the same name count once, so a serializer that nests
+    others is not timed twice. Does nothing outside an instrumented request.
+    """
+    timings = _current.get()
+    if timings is None or name in timings._open:
+        yield
+        return
+    timings._open.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans[name] += time.perf_counter() - start
+        timings._open.discard(name)
+
+
+def absolute_uri(request, location=None):
+    """``request.build_absolute_uri(location)``, timed as ``uri``."""
+    with span('uri'):
+        return request.build_absolute_uri(location)
+
+
+class SerializationTimingMixin:
+    """Times a serializer's ``to_representation`` as ``serialize``."""
+
+    def to_representation(self, instance):
+        with span('serialize'):
+            return super().to_representation(instance)
+
+
+def wrap_connections(wrapper):
+    """Install ``wrapper`` on every database connection of this thread until the returned stack closes."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with wrap_connections(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            # Entered on the thread that runs this request's ORM calls
+            stack = await sync_to_async(wrap_connections)(timings)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def finish(self, request, response, timings, total):
+        response['Server-Timing'] = timings.server_timing(total)
+        if total * 1000 > settings.SLOW_REQUEST_MS or timings.queries > settings.SLOW_REQUEST_QUERIES:
+            repeated = ''.join(f'\n  {times}x {sql}' for sql, times in timings.duplicates())
+            logger.warning(
+                'Slow request %s %s: %d in %.1f ms, %d queries in %.1f ms%s',
+                request.method, request.get_full_path(), response.status_code, total * 1000,
+                timings.queries, timings.db_seconds * 1000, repeated,
+            )
+        return response
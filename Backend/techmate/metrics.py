@@ -0,0 +1,158 @@
+"""Prometheus metrics, served in the text exposition format at ``/metrics``.
+
+``MetricsMiddleware`` records per-route latency, requests in flight, and the
+number and duration of SQL queries per request. The user and response
+caches count their lookups, and certificate rendering records duration and
+PDF size.
+
+Under gunicorn each worker is its own process. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (``start.sh`` sets it), ``prometheus_client``
+keeps every value in a memory-mapped file per process, and ``/metrics``
+adds up the files of all workers. Recording a value is then a write to
+mapped memory, a few microseconds. The gunicorn ``child_exit`` hook in
+``gunicorn.conf.py`` drops the in-flight gauge of a worker that exits. The
+directory must be emptied before the server starts, or the counts of the
+previous run are added in.
+
+``/metrics`` fails closed. With ``METRICS_TOKEN`` set, scrapers must send it
+as a bearer token. Without one, only clients in ``METRICS_ALLOWED_IPS``
+(loopback by default) get an answer, and everyone else a 404.
+"""
+import hmac
+import ipaddress
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from .instrumentation import wrap_connections
+
+REQUEST_SECONDS = Histogram(
+    'techmate_http_request_duration_seconds', 'Time to produce a response, by URL pattern.',
+    ['method', 'route', 'status'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'techmate_http_requests_in_flight', 'Requests being served.', multiprocess_mode='livesum',
+)
+REQUEST_QUERIES = Histogram(
+    'techmate_db_queries_per_request', 'SQL queries issued by one request, by URL pattern.', ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+QUERY_SECONDS = Histogram(
+    'techmate_db_query_duration_seconds', 'Duration of one SQL query.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+CACHE_LOOKUPS = Counter(
+    'techmate_cache_lookups_total', 'Cache lookups by cache and outcome.', ['cache', 'result'],
+)
+CERTIFICATE_RENDER_SECONDS = Histogram(
+    'techmate_certificate_render_seconds', 'Time to render one certificate PDF.',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CERTIFICATE_PDF_BYTES = Histogram(
+    'techmate_certificate_pdf_bytes', 'Size of one rendered certificate PDF.',
+    buckets=(10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000),
+)
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def count_cache_lookup(cache, result):
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def observe_certificate(seconds, size):
+    CERTIFICATE_RENDER_SECONDS.observe(seconds)
+    CERTIFICATE_PDF_BYTES.observe(size)
+
+
+class _QueryCounter:
+    """``execute_wrapper`` hook counting a request's queries and timing each one."""
+    __slots__ = ('queries',)
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            QUERY_SECONDS.observe(time.perf_counter() - start)
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = _QueryCounter()
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            with wrap_connections(counter):
+                response = self.get_response(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - start, counter.queries)
+        return response
+
+    async def __acall__(self, request):
+        counter = _QueryCounter()
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            # Entered on the thread that runs this request's ORM calls
+            stack = await sync_to_async(wrap_connections)(counter)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - start, counter.queries)
+        return response
+
+    def observe(self, request, response, seconds, queries):
+        # The URL pattern, not the path, so ids in URLs do not create a series each
+        match = request.resolver_match
+        route = match.route if match is not None else UNMATCHED_ROUTE
+        REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(seconds)
+        REQUEST_QUERIES.labels(route).observe(queries)
+
+
+def _allowed_address(address):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+
+
+def metrics_view(request):
+    """Every metric, summed over all worker processes when they share a multiprocess directory."""
+    token = settings.METRICS_TOKEN
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif not _allowed_address(request.META.get('REMOTE_ADDR', '')):
+        raise Http404
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
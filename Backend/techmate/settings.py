@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -39,6 +41,7 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    'techmate.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -50,6 +53,22 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in per-request timing (techmate.instrumentation): a Server-Timing header on every
+# response, and a log line with repeated SQL for requests over either threshold
+REQUEST_INSTRUMENTATION = os.environ.get('REQUEST_INSTRUMENTATION', 'False').lower() == 'true'
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 30))
+if REQUEST_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'techmate.instrumentation.InstrumentationMiddleware')
+
+# Prometheus metrics at /metrics (techmate.metrics); when set, scrapers must send
+# "Authorization: Bearer <METRICS_TOKEN>". Without a token only the addresses or
+# networks in METRICS_ALLOWED_IPS may scrape, and everyone else gets a 404
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [
+    network.strip() for network in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if network.strip()
+]
+
 ROOT_URLCONF = 'techmate.urls'
 
 TEMPLATES = [
@@ -68,6 +87,20 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'techmate.wsgi.application'
+ASGI_APPLICATION = 'techmate.asgi.application'
+
+# start.sh serves techmate.asgi under uvicorn workers when SERVER_MODE=asgi. There,
+# read-heavy GETs and login run as coroutines (see techmate.async_dispatch); under
+# WSGI the plain synchronous views are cheaper, so ASYNC_VIEWS defaults to the mode
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', str(SERVER_MODE == 'asgi')).lower() == 'true'
+# Bounded pools that keep CPU-heavy work off the event loop in async views
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+CERTIFICATE_RENDER_WORKERS = int(os.environ.get('CERTIFICATE_RENDER_WORKERS', 2))
+
+# Largest certificate ZIP the admin renders within a request; bigger exports go through
+# the bulk_issue_certificates command
+CERTIFICATE_EXPORT_SYNC_LIMIT = int(os.environ.get('CERTIFICATE_EXPORT_SYNC_LIMIT', 500))
 
 # Database Configuration
 # Uses PostgreSQL if DATABASE_URL is provided (production), otherwise SQLite (development)
@@ -108,17 +141,70 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Content files are served by tutorials.media. Set MEDIA_OFFLOAD to 'x-accel-redirect'
+# (nginx, with an internal location at MEDIA_OFFLOAD_PREFIX aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache/lighttpd) to let the front-end server send the bytes.
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', '').lower()
+MEDIA_OFFLOAD_PREFIX = os.environ.get('MEDIA_OFFLOAD_PREFIX', '/protected-media/')
+
+# Uploaded media is probed for duration and bitrate on a background thread pool
+MEDIA_PROBE_ASYNC = os.environ.get('MEDIA_PROBE_ASYNC', 'True').lower() == 'true'
+MEDIA_PROBE_WORKERS = int(os.environ.get('MEDIA_PROBE_WORKERS', 2))
+
+# Rendered certificate PDFs (kept outside MEDIA_ROOT so they are never served directly)
+CERTIFICATE_CACHE_DIR = os.environ.get('CERTIFICATE_CACHE_DIR', str(BASE_DIR / 'cache' / 'certificates'))
+CERTIFICATE_CACHE_MAX_BYTES = int(os.environ.get('CERTIFICATE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Chunks of resumable uploads until they are assembled into MEDIA_ROOT
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', str(BASE_DIR / 'cache' / 'uploads'))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 16 * 1024 * 1024  # 16MB
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', 10 * 1024 * 1024 * 1024))
+
+# Cache shared by dashboard snapshots and anonymous tutorial responses. Local memory is
+# private to each worker process; set REDIS_URL (needs the redis package) or CACHE_DIR
+# so every worker sees the same entries and invalidations.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Anonymous list/detail bodies; saves bump their version, the timeout only bounds memory
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 10 * 60))
+
+# Per-user dashboard snapshots; writes invalidate them, the timeout only bounds memory
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 15 * 60))
+
 # Default Primary Key
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # Keyset pagination on (created_at, id); views with another key set ``keyset_fields``
+    'DEFAULT_PAGINATION_CLASS': 'tutorials.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 
 # JWT Configuration
@@ -128,7 +214,14 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': False,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.ClaimsTokenRefreshSerializer',
 }
+# Authenticated users and profiles (accounts.user_cache): a per-process LRU in front of CACHES
+USER_CACHE_LOCAL_SIZE = int(os.environ.get('USER_CACHE_LOCAL_SIZE', 1000))
+USER_CACHE_LOCAL_TTL = int(os.environ.get('USER_CACHE_LOCAL_TTL', 30))
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 10 * 60))
+# How long a worker may trust its cached copy of a user's claims version (see accounts.tokens)
+JWT_CLAIMS_VERSION_CACHE_TIMEOUT = int(os.environ.get('JWT_CLAIMS_VERSION_CACHE_TIMEOUT', 60))
 
 # CORS Configuration - Allow frontend
 # In production, set CORS_ALLOWED_ORIGINS environment variable with comma-separated origins
@@ -139,10 +232,14 @@ if cors_origins:
 else:
     CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Let the SPA read validators and send them back for optimistic concurrency
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'if-none-match')
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # File Upload Limits
-FILE_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
+# Multipart files above this spill to a temp file; large media goes through chunked uploads
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
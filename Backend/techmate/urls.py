@@ -11,8 +11,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/', include('accounts.urls')),
     path('api/tutorials/', include('tutorials.urls')),
     path('api/certificates/', include('tutorials.certificate_urls')),
@@ -1,7 +1,41 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from django.apps import apps
 from django.db import models as dj_models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
+from .certificate_bulk import issue_missing_certificates, stream_certificates_zip
+from .models import Certificate
+
+
+def issue_and_export_certificates(modeladmin, request, queryset):
+    tutorials = list(queryset)
+    for tutorial in tutorials:
+        issue_missing_certificates(tutorial)
+    total = Certificate.objects.filter(tutorial__in=tutorials).count()
+    if total > settings.CERTIFICATE_EXPORT_SYNC_LIMIT:
+        # Rendering a whole cohort would hold this web worker for minutes
+        ids = ' '.join(str(tutorial.pk) for tutorial in tutorials)
+        modeladmin.message_user(
+            request,
+            f"Certificates issued. {total} certificates are too many to export here; run "
+            f"`python manage.py bulk_issue_certificates {ids} --no-issue --output certificates.zip`.",
+            messages.WARNING,
+        )
+        return None
+    # Rendered in this process: a small export does not warrant a process pool inside a web worker
+    response = StreamingHttpResponse(stream_certificates_zip(tutorials, workers=1), content_type='application/zip')
+    filename = f"certificates_{timezone.now():%Y%m%d_%H%M%S}.zip"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+issue_and_export_certificates.short_description = "Issue missing certificates and download them as ZIP"
+
+
+# Extra ModelAdmin attributes merged over the generated defaults, by model name
+MODEL_ADMIN_EXTRAS = {
+    "Tutorial": {"actions": [issue_and_export_certificates]},
+}
 
 
 def _app_label():
@@ -66,6 +100,7 @@ def register_all_models(app_label=None):
         filters = _list_filter(model)
         if filters:
             attrs["list_filter"] = filters
+        attrs.update(MODEL_ADMIN_EXTRAS.get(model.__name__, {}))
 
         admin_class = type(f"{model.__name__}Admin", (admin.ModelAdmin,), attrs)
         try:
@@ -0,0 +1,331 @@
+"""Endpoint benchmarks with query-count and latency budgets.
+
+Every named route of ``accounts.urls``, ``tutorials.urls`` and
+``tutorials.certificate_urls`` is requested through the test client against
+a ``seeding.seed`` data set, as the kind of caller that normally uses it, with
+a real access token. Each request runs in a transaction that is rolled back
+afterwards, so writes and deletes meet the same data on every iteration.
+Django's cache and the local user cache are cleared before each request, so
+query counts show the uncached path and do not depend on iteration order.
+
+``check`` compares the results with the budgets checked in as
+``benchmark_budgets.json``. A run with more queries than budgeted, a p95
+above budget, or an unexpected status is a violation. Query budgets are what
+catch N+1 regressions: with one query per row, a page of 20 blows its budget
+at once.
+"""
+import hashlib
+import json
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+
+from accounts import user_cache
+from accounts.tokens import ClaimsRefreshToken
+from . import uploads
+from .models import ContentUpload, Tutorial, TutorialContent, UserTutorialProgress
+from .seeding import PASSWORD
+
+BUDGETS_PATH = Path(__file__).with_name('benchmark_budgets.json')
+URLCONFS = ('accounts.urls', 'tutorials.urls', 'tutorials.certificate_urls')
+# Budgets are written from a measured p95 times this, so machine noise does not fail runs
+LATENCY_HEADROOM = 3
+_CHUNK = b'\x00' * 1024
+_TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+@dataclass
+class Endpoint:
+    route: str
+    method: str = 'get'
+    caller: Optional[str] = None  # key of Fixtures.tokens; None is anonymous
+    label: str = ''  # tells apart several callers of one route
+    kwargs: Callable = lambda fixtures: {}
+    data: Callable = lambda fixtures: None
+    format: str = 'json'
+    expect: Sequence[int] = (200,)
+    # Caps the runs of endpoints that hash a password; they are slow by design
+    iterations: Optional[int] = None
+
+    @property
+    def name(self):
+        name = f'{self.method.upper()} {self.route}'
+        return f'{name} ({self.label})' if self.label else name
+
+
+@dataclass
+class Fixtures:
+    seed: object
+    tokens: dict
+    refresh: str
+    media_content: TutorialContent
+    content: TutorialContent
+    completed_tutorial: Tutorial
+    pending_upload: ContentUpload
+    finished_upload: ContentUpload
+    abandoned_upload: ContentUpload
+
+
+@dataclass
+class Result:
+    endpoint: str
+    method: str
+    path: str
+    statuses: list
+    expect: list
+    queries: int
+    p50_ms: float
+    p95_ms: float
+    budget: dict = field(default_factory=dict)
+    violations: list = field(default_factory=list)
+
+
+@contextmanager
+def sandbox():
+    """Keep files and mail written by the endpoints out of the real media, cache and outbox."""
+    with tempfile.TemporaryDirectory() as root, override_settings(
+        MEDIA_ROOT=f'{root}/media',
+        CERTIFICATE_CACHE_DIR=f'{root}/certificates',
+        CHUNKED_UPLOAD_DIR=f'{root}/uploads',
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ):
+        yield
+
+
+def _upload(seed, filename):
+    return ContentUpload.objects.create(
+        tutorial=seed.tutorial, created_by=seed.instructor, filename=filename,
+        total_size=len(_CHUNK), chunk_size=256 * 1024,
+    )
+
+
+def prepare(seed):
+    """Create the records the write endpoints act on, beside the seeded data."""
+    student, instructor = seed.student, seed.instructor
+    refresh = ClaimsRefreshToken.for_user(student)
+    tokens = {
+        role: str(ClaimsRefreshToken.for_user(user).access_token)
+        for role, user in (('student', student), ('instructor', instructor), ('admin', seed.admin))
+    }
+
+    # A queryset update, so no probe is scheduled for a file that is not real media
+    media_content = TutorialContent.objects.create(
+        tutorial=seed.tutorial, order=900, title='Benchmark media', content_type='text', text='Media',
+    )
+    name = default_storage.save('tutorials/content/benchmark.bin', ContentFile(b'\x01' * 256 * 1024))
+    TutorialContent.objects.filter(pk=media_content.pk).update(file=name)
+
+    completed_tutorial = Tutorial.objects.exclude(pk=seed.tutorial.pk).filter(contents_total__gt=0).first()
+    progress, _ = UserTutorialProgress.objects.get_or_create(user=student, tutorial=completed_tutorial)
+    progress.completed_contents.set(completed_tutorial.contents.all())
+    progress.calculate_progress()
+
+    finished_upload = _upload(seed, 'finished.mp4')
+    uploads.store_chunk(finished_upload, 0, BytesIO(_CHUNK), len(_CHUNK), hashlib.sha256(_CHUNK).hexdigest())
+    return Fixtures(
+        seed=seed, tokens=tokens, refresh=str(refresh),
+        media_content=media_content,
+        content=seed.tutorial.contents.order_by('order').first(),
+        completed_tutorial=completed_tutorial,
+        pending_upload=_upload(seed, 'pending.mp4'),
+        finished_upload=finished_upload,
+        abandoned_upload=_upload(seed, 'abandoned.mp4'),
+    )
+
+
+def _reset_data(fixtures):
+    student = fixtures.seed.student
+    return {
+        'uid': urlsafe_base64_encode(force_bytes(student.pk)),
+        'token': default_token_generator.make_token(student),
+        'new_password': 'Bench-mark-pass-2', 'new_password_confirm': 'Bench-mark-pass-2',
+    }
+
+
+def _tutorial(fixtures):
+    return {'pk': fixtures.seed.tutorial.pk}
+
+
+ENDPOINTS = [
+    # accounts
+    Endpoint('register', 'post', expect=(201,), iterations=5, data=lambda f: {
+        'username': 'benchmark', 'email': 'benchmark@example.com', 'password': 'Bench-mark-pass-1',
+        'password_confirm': 'Bench-mark-pass-1', 'name': 'Benchmark',
+    }),
+    Endpoint('login', 'post', iterations=5, data=lambda f: {'username': f.seed.student.username, 'password': PASSWORD}),
+    Endpoint('token_refresh', 'post', data=lambda f: {'refresh': f.refresh}),
+    Endpoint('password_reset', 'post', data=lambda f: {'email': f.seed.student.email}),
+    Endpoint('password_reset_confirm', 'post', iterations=5, data=_reset_data),
+    Endpoint('current_user', caller='student'),
+    Endpoint('profile_update', 'patch', caller='student', data=lambda f: {'name': 'Renamed'}),
+    Endpoint('change_password', 'post', caller='student', iterations=5, data=lambda f: {
+        'old_password': PASSWORD, 'new_password': 'Bench-mark-pass-3', 'new_password_confirm': 'Bench-mark-pass-3',
+    }),
+    # tutorials
+    Endpoint('tutorial_list', label='anonymous'),
+    Endpoint('tutorial_list', caller='student', label='student'),
+    Endpoint('tutorial_list', 'post', caller='instructor', format='multipart', expect=(201,),
+             data=lambda f: {'title': 'Benchmark', 'description': 'Created by the benchmark'}),
+    Endpoint('user_dashboard', caller='student'),
+    Endpoint('instructor_my_tutorials', caller='instructor'),
+    Endpoint('tutorial_search', caller='student', data=lambda f: {'q': 'Python'}),
+    Endpoint('tutorial_detail', label='anonymous', kwargs=_tutorial),
+    Endpoint('tutorial_detail', caller='student', label='student', kwargs=_tutorial),
+    Endpoint('tutorial_detail', 'patch', caller='instructor', format='multipart', kwargs=_tutorial,
+             data=lambda f: {'title': 'Renamed by the benchmark'}),
+    Endpoint('tutorial_detail', 'delete', caller='instructor', expect=(204,), kwargs=_tutorial),
+    Endpoint('content_create', 'post', caller='instructor', format='multipart', expect=(201,),
+             kwargs=lambda f: {'tutorial_id': f.seed.tutorial.pk},
+             data=lambda f: {'title': 'New lesson', 'content_type': 'text', 'text': 'Body', 'order': 50}),
+    Endpoint('content_detail', kwargs=lambda f: {'pk': f.content.pk}),
+    Endpoint('content_detail', 'patch', caller='instructor', format='multipart',
+             kwargs=lambda f: {'pk': f.content.pk}, data=lambda f: {'title': 'Renamed lesson'}),
+    Endpoint('content_detail', 'delete', caller='instructor', expect=(204,), kwargs=lambda f: {'pk': f.content.pk}),
+    Endpoint('content_media', kwargs=lambda f: {'pk': f.media_content.pk}),
+    Endpoint('content_upload_create', 'post', caller='instructor', expect=(201,),
+             kwargs=lambda f: {'tutorial_id': f.seed.tutorial.pk},
+             data=lambda f: {'filename': 'lesson.mp4', 'total_size': 1024}),
+    Endpoint('content_upload_detail', caller='instructor', kwargs=lambda f: {'pk': f.pending_upload.pk}),
+    Endpoint('content_upload_detail', 'delete', caller='instructor', expect=(204,),
+             kwargs=lambda f: {'pk': f.abandoned_upload.pk}),
+    Endpoint('content_upload_chunk', 'put', caller='instructor', format='raw',
+             kwargs=lambda f: {'pk': f.pending_upload.pk, 'index': 0}, data=lambda f: _CHUNK),
+    Endpoint('content_upload_complete', 'post', caller='instructor', expect=(201,),
+             kwargs=lambda f: {'pk': f.finished_upload.pk},
+             data=lambda f: {'title': 'Uploaded lesson', 'content_type': 'video', 'order': 60}),
+    Endpoint('user_progress', caller='student', kwargs=lambda f: {'tutorial_id': f.seed.tutorial.pk}),
+    Endpoint('user_progress', 'patch', caller='student', kwargs=lambda f: {'tutorial_id': f.seed.tutorial.pk},
+             data=lambda f: {'completed_content_ids': [f.content.pk]}),
+    Endpoint('user_progress', 'post', caller='student', kwargs=lambda f: {'tutorial_id': f.seed.tutorial.pk},
+             data=lambda f: {'add': [f.content.pk]}),
+    # certificates
+    Endpoint('my_certificates', caller='student'),
+    Endpoint('issue_certificate', 'post', caller='student', expect=(200, 201),
+             data=lambda f: {'tutorial_id': f.completed_tutorial.pk}),
+    Endpoint('download_certificate', caller='student', kwargs=lambda f: {'pk': f.seed.certificate.pk}),
+]
+
+
+def missing_routes(endpoints=ENDPOINTS):
+    """Named routes of ``URLCONFS`` that no endpoint exercises."""
+    from importlib import import_module
+
+    routes = {
+        pattern.name
+        for urlconf in URLCONFS
+        for pattern in import_module(urlconf).urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    }
+    return sorted(routes - {endpoint.route for endpoint in endpoints})
+
+
+def _send(client, endpoint, fixtures):
+    path = reverse(endpoint.route, kwargs=endpoint.kwargs(fixtures))
+    data = endpoint.data(fixtures)
+    headers = {}
+    if endpoint.caller:
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {fixtures.tokens[endpoint.caller]}'
+    if endpoint.format == 'raw':
+        headers['HTTP_X_CHUNK_SHA256'] = hashlib.sha256(data).hexdigest()
+        response = getattr(client, endpoint.method)(path, data, content_type='application/octet-stream', **headers)
+    elif endpoint.method == 'get':
+        response = client.get(path, data, **headers)
+    else:
+        response = getattr(client, endpoint.method)(path, data, format=endpoint.format, **headers)
+    # Drain streamed bodies so their cost is part of the measurement
+    if getattr(response, 'streaming', False):
+        b''.join(response.streaming_content)
+    return path, response.status_code
+
+
+def _measure(client, endpoint, fixtures):
+    cache.clear()
+    user_cache.clear_local()
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            path, status_code = _send(client, endpoint, fixtures)
+            elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    queries = [query for query in captured if not query['sql'].startswith(_TRANSACTION_STATEMENTS)]
+    return path, status_code, len(queries), elapsed
+
+
+def run(fixtures, iterations=20, endpoints=ENDPOINTS):
+    """Request every endpoint ``iterations`` times after one warm-up and return a ``Result`` each."""
+    client = APIClient()
+    results = []
+    for endpoint in endpoints:
+        runs = min(iterations, endpoint.iterations or iterations)
+        _measure(client, endpoint, fixtures)
+        samples = [_measure(client, endpoint, fixtures) for _ in range(runs)]
+        timings = sorted(sample[3] for sample in samples)
+        results.append(Result(
+            endpoint=endpoint.name,
+            method=endpoint.method.upper(),
+            path=samples[0][0],
+            statuses=sorted({sample[1] for sample in samples}),
+            expect=list(endpoint.expect),
+            queries=max(sample[2] for sample in samples),
+            p50_ms=round(statistics.median(timings) * 1000, 2),
+            p95_ms=round(timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))] * 1000, 2),
+        ))
+    return results
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as handle:
+        return json.load(handle)['endpoints']
+
+
+def check(results, budgets, latency=True):
+    """Record each result's violations of ``budgets`` on it and return the total count."""
+    total = 0
+    for result in results:
+        budget = budgets.get(result.endpoint)
+        result.violations = []
+        if set(result.statuses) - set(result.expect):
+            result.violations.append(f'status {result.statuses}, expected {result.expect}')
+        if budget is None:
+            result.violations.append('no budget')
+        else:
+            result.budget = budget
+            if result.queries > budget['queries']:
+                result.violations.append(f"{result.queries} queries, budget {budget['queries']}")
+            if latency and result.p95_ms > budget['p95_ms']:
+                result.violations.append(f"p95 {result.p95_ms} ms, budget {budget['p95_ms']} ms")
+        total += len(result.violations)
+    return total
+
+
+def budgets_from(results):
+    """Budgets matching ``results``: their query counts, and their p95 with headroom."""
+    return {
+        result.endpoint: {'queries': result.queries, 'p95_ms': max(25, round(result.p95_ms * LATENCY_HEADROOM))}
+        for result in results
+    }
+
+
+def report(results, **meta):
+    """Machine-readable summary of a run."""
+    return {
+        **meta,
+        'violations': sum(len(result.violations) for result in results),
+        'results': [asdict(result) for result in results],
+    }
@@ -0,0 +1,201 @@
+"""On-disk cache of rendered certificate PDFs.
+
+Files live at ``<CERTIFICATE_CACHE_DIR>/t<tutorial id>/<certificate number>/<key>.pdf``
+where ``key`` hashes every input the generator prints plus ``TEMPLATE_VERSION``,
+so a changed name, title or layout can never be served from an old file. The
+per-tutorial and per-certificate directories let stale renders be dropped
+without scanning the whole cache. Access times drive LRU eviction once the
+directory grows past ``CERTIFICATE_CACHE_MAX_BYTES``.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from techmate.metrics import observe_certificate
+from .certificate_generator import (
+    certificate_render_args, certificate_user_name, generate_certificate_pdf, render_certificate_pdf,
+)
+
+# Bump whenever certificate_generator changes what a certificate looks like
+TEMPLATE_VERSION = 2
+
+# Eviction trims the cache to this fraction of the cap, so it does not run on every write
+_EVICTION_TARGET = 0.9
+
+_render_executor = None
+
+# Bytes this process believes each cache directory holds: the total found by the last
+# scan plus what it has stored since. Other workers' stores only show up at the next
+# scan, so the cap can be overshot by about the eviction headroom per worker.
+_estimated_bytes = {}
+_estimate_lock = threading.Lock()
+
+
+@dataclass
+class CachedCertificate:
+    path: Path
+    etag: str
+    last_modified: datetime
+
+
+def cache_dir() -> Path:
+    return Path(settings.CERTIFICATE_CACHE_DIR)
+
+
+def certificate_key(certificate) -> str:
+    parts = [
+        str(TEMPLATE_VERSION),
+        certificate_user_name(certificate.user),
+        certificate.tutorial.title,
+        certificate.certificate_number,
+        certificate.issued_date.date().isoformat() if certificate.issued_date else '',
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _tutorial_dir(tutorial_id) -> Path:
+    return cache_dir() / f't{tutorial_id}'
+
+
+def _certificate_dir(certificate) -> Path:
+    return _tutorial_dir(certificate.tutorial_id) / certificate.certificate_number
+
+
+def _entry(path: Path, key: str) -> CachedCertificate:
+    modified = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+    return CachedCertificate(path=path, etag=f'"{key}"', last_modified=modified)
+
+
+def _touch(path: Path):
+    # Record the access explicitly: filesystems mounted noatime never update it themselves
+    stat = path.stat()
+    os.utime(path, (time.time(), stat.st_mtime))
+
+
+def _lookup(certificate):
+    key = certificate_key(certificate)
+    path = _certificate_dir(certificate) / f'{key}.pdf'
+    try:
+        _touch(path)
+        return key, path, _entry(path, key)
+    except FileNotFoundError:
+        return key, path, None
+
+
+def _store(key, path, pdf):
+    directory = path.parent
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(pdf)
+    os.replace(tmp_path, path)
+    # Stamp the access time from the same clock _touch uses, so LRU order is consistent
+    _touch(path)
+    # Older renders of this certificate are keyed on inputs that no longer hold. Only
+    # they go: a concurrent first download may be writing into this directory too.
+    for stale in directory.glob('*.pdf'):
+        if stale.name != path.name:
+            stale.unlink(missing_ok=True)
+    _account(len(pdf))
+    return _entry(path, key)
+
+
+def _account(size):
+    """Add a stored PDF to the running total and scan the cache only once it may be over the cap."""
+    directory = str(cache_dir())
+    with _estimate_lock:
+        estimate = _estimated_bytes.get(directory)
+        if estimate is not None:
+            _estimated_bytes[directory] = estimate + size
+            if estimate + size <= settings.CERTIFICATE_CACHE_MAX_BYTES:
+                return
+    evict()
+
+
+def get_certificate_pdf(certificate) -> CachedCertificate:
+    """Return the cached PDF for ``certificate``, rendering and storing it on a miss."""
+    key, path, entry = _lookup(certificate)
+    if entry is not None:
+        return entry
+    buffer = generate_certificate_pdf(
+        certificate.user, certificate.tutorial, certificate.certificate_number, certificate.issued_date,
+    )
+    return _store(key, path, buffer.getbuffer())
+
+
+def _get_render_executor():
+    global _render_executor
+    if _render_executor is None:
+        # Spawned rather than forked: a fork of a serving process copies its threads' locks mid-use
+        _render_executor = ProcessPoolExecutor(
+            max_workers=settings.CERTIFICATE_RENDER_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _render_executor
+
+
+async def aget_certificate_pdf(certificate) -> CachedCertificate:
+    """``get_certificate_pdf`` for async views.
+
+    Disk work runs on a thread and rendering on a pool of
+    ``CERTIFICATE_RENDER_WORKERS`` processes, so neither blocks the event loop
+    and ReportLab's CPU time is not bound by this process's GIL.
+    """
+    key, path, entry = await sync_to_async(_lookup, thread_sensitive=False)(certificate)
+    if entry is not None:
+        return entry
+    args = certificate_render_args(certificate.user, certificate.tutorial, certificate.issued_date)
+    start = time.perf_counter()
+    pdf = await asyncio.wrap_future(_get_render_executor().submit(render_certificate_pdf, *args))
+    observe_certificate(time.perf_counter() - start, len(pdf))
+    return await sync_to_async(_store, thread_sensitive=False)(key, path, pdf)
+
+
+def evict(max_bytes=None):
+    """Delete least recently used PDFs until the cache fits under its size cap.
+
+    Scans the whole cache, so stores run it only when their running total
+    crosses the cap; it then trims to ``_EVICTION_TARGET`` of the cap.
+    """
+    max_bytes = settings.CERTIFICATE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    files, total = [], 0
+    for path in cache_dir().glob('t*/*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_atime, stat.st_size, path))
+        total += stat.st_size
+    if total > max_bytes:
+        target = max_bytes * _EVICTION_TARGET
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= target:
+                break
+    with _estimate_lock:
+        _estimated_bytes[str(cache_dir())] = total
+
+
+def invalidate_tutorial(tutorial_id):
+    shutil.rmtree(_tutorial_dir(tutorial_id), ignore_errors=True)
+
+
+def invalidate_certificates(certificates):
+    """Drop cached renders for an iterable of ``(tutorial_id, certificate_number)`` pairs."""
+    for tutorial_id, certificate_number in certificates:
+        shutil.rmtree(_tutorial_dir(tutorial_id) / certificate_number, ignore_errors=True)
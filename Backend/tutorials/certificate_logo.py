@@ -1,10 +1,14 @@
-"""Generate TechMate logo and certificate graphics"""
-from PIL import Image, ImageDraw, ImageFont
+"""Generate TechMate logo and certificate graphics
+
+Pillow is imported inside each function, so importing this module stays cheap.
+"""
 from io import BytesIO
 import os
 
 def create_techmate_logo(size=200):
     """Create professional TechMate logo"""
+    from PIL import Image, ImageDraw
+
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
@@ -43,6 +47,8 @@ def create_techmate_logo(size=200):
 
 def create_watermark_text(width, height, opacity=30):
     """Create watermark with TechMate text repeated across background"""
+    from PIL import Image, ImageDraw
+
     watermark = Image.new('RGBA', (width, height), (0, 0, 0, 0))
     draw = ImageDraw.Draw(watermark)
     
@@ -0,0 +1,176 @@
+"""ReportLab drawing of certificates.
+
+Importing this module imports ReportLab, so only the render paths do, through
+``certificate_generator``. Workers that never render a certificate never load it.
+"""
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
+from reportlab.lib import colors
+from functools import lru_cache
+from io import BytesIO
+import math
+import zlib
+
+# Page geometry and palette are shared by every certificate, so they are built once per process
+PAGE_SIZE = landscape(A4)
+PAGE_WIDTH, PAGE_HEIGHT = PAGE_SIZE
+
+BLUE_DARK = colors.HexColor('#006699')
+ORANGE = colors.HexColor('#FF7F00')
+DARK_GRAY = colors.HexColor('#505050')
+TEXT_GRAY = colors.HexColor('#333333')
+RED_SEAL = colors.HexColor('#DC143C')
+
+TITLE_X = PAGE_WIDTH / 2
+TITLE_Y = PAGE_HEIGHT - 200
+LABEL_X = 100
+VALUE_X = 300
+COURSE_Y = TITLE_Y - 230
+DATE_Y = COURSE_Y - 40
+SIGNATURE_Y = DATE_Y - 40
+
+# Name of the form XObject holding the static layer inside each PDF
+BACKGROUND_FORM = 'CertificateBackground'
+
+
+def _draw_static_layer(c):
+    """Draw everything that is identical on every certificate"""
+
+    # ===== BACKGROUND DESIGN =====
+
+    # Top blue section (simulating wave)
+    c.setFillColor(BLUE_DARK)
+    c.rect(0, PAGE_HEIGHT - 130, PAGE_WIDTH, 130, fill=True, stroke=False)
+
+    # Add curved wave effect with path
+    c.setStrokeColor(BLUE_DARK)
+    c.setLineWidth(1)
+
+    # ===== LOGO (Top Left) =====
+    logo_x = 50
+    logo_y = PAGE_HEIGHT - 90
+
+    # Orange vertical bar
+    c.setFillColor(ORANGE)
+    c.rect(logo_x + 15, logo_y - 45, 12, 50, fill=True)
+
+    # Orange horizontal bar
+    c.rect(logo_x, logo_y - 35, 45, 12, fill=True)
+
+    # Dark blue accent square
+    c.setFillColor(BLUE_DARK)
+    c.rect(logo_x + 35, logo_y - 35, 25, 25, fill=True)
+
+    # ===== MAIN CONTENT =====
+
+    # CERTIFICATE title
+    c.setFont("Helvetica-Bold", 70)
+    c.setFillColor(DARK_GRAY)
+    c.drawCentredString(TITLE_X, TITLE_Y, "CERTIFICATE")
+
+    # Subtitle
+    c.setFont("Helvetica", 16)
+    c.setFillColor(TEXT_GRAY)
+    c.drawCentredString(TITLE_X, TITLE_Y - 40, "Course Completion")
+
+    # Decorative line under subtitle
+    c.setStrokeColor(BLUE_DARK)
+    c.setLineWidth(2)
+    c.line(TITLE_X - 150, TITLE_Y - 55, TITLE_X + 150, TITLE_Y - 55)
+
+    # Intro text
+    c.setFont("Helvetica", 13)
+    c.setFillColor(TEXT_GRAY)
+    c.drawCentredString(TITLE_X, TITLE_Y - 90, "This is to certify that")
+
+    # Detail labels (left aligned)
+    c.setFont("Helvetica-Bold", 11)
+    c.setFillColor(DARK_GRAY)
+    c.drawString(LABEL_X, COURSE_Y, "Course Name :")
+    c.drawString(LABEL_X, DATE_Y, "Date :")
+    c.drawString(LABEL_X, SIGNATURE_Y, "Signature :")
+
+    # Signature
+    c.setFont("Helvetica-Bold", 14)
+    c.setFillColor(BLUE_DARK)
+    c.drawString(VALUE_X, SIGNATURE_Y, "TechMate Team")
+
+
+def _draw_variable_layer(c, user_name, course_title, issue_date):
+    """Draw the per-certificate text over the static layer"""
+
+    # User name (large, blue)
+    c.setFont("Helvetica-Bold", 52)
+    c.setFillColor(BLUE_DARK)
+    c.drawCentredString(TITLE_X, TITLE_Y - 155, user_name)
+
+    # Course Name
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(VALUE_X, COURSE_Y, course_title)
+
+    # Date
+    c.setFont("Helvetica", 12)
+    c.setFillColor(TEXT_GRAY)
+    c.drawString(VALUE_X, DATE_Y, issue_date)
+
+
+@lru_cache(maxsize=None)
+def _compiled_static_layer():
+    """Compile the static layer once per process.
+
+    Returns the font mapping the operators were compiled against and the
+    Flate-compressed operator stream of the background form.
+    """
+    scratch = canvas.Canvas(BytesIO(), pagesize=PAGE_SIZE)
+    scratch.beginForm(BACKGROUND_FORM)
+    _draw_static_layer(scratch)
+    scratch.endForm()
+    form = scratch._doc.idToObject[pdfdoc.xObjectName(BACKGROUND_FORM)]
+    return tuple(scratch._doc.fontMapping.items()), zlib.compress(form.stream)
+
+
+def _place_static_layer(c):
+    """Reference the precompiled static layer from a fresh canvas as a form XObject"""
+    font_mapping, stream = _compiled_static_layer()
+    # The compiled operators name fonts by internal id (/F1, /F2...), so this
+    # document has to hand out the same ids; draw directly if it ever does not
+    for font_name, internal_name in font_mapping:
+        if c._doc.getInternalFontName(font_name) != internal_name:
+            _draw_static_layer(c)
+            return
+    form = pdfdoc.PDFFormXObject(0, 0, PAGE_WIDTH, PAGE_HEIGHT)
+    contents = pdfdoc.PDFStream(content=stream)
+    contents.dictionary['Filter'] = pdfdoc.PDFName('FlateDecode')
+    form.Contents = contents
+    c._doc.addForm(BACKGROUND_FORM, form)
+    c.doForm(BACKGROUND_FORM)
+
+
+def render_certificate_pdf(user_name, course_title, issue_date, use_template=True):
+    """Render a certificate from plain values and return the PDF bytes.
+
+    With ``use_template`` the page references the static layer compiled once
+    per process and only the variable text is drawn and compressed per
+    certificate. ``use_template=False`` draws everything directly on the page
+    and is kept as the baseline for ``benchmark_certificates``.
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    if use_template:
+        _place_static_layer(c)
+    else:
+        _draw_static_layer(c)
+    _draw_variable_layer(c, user_name, course_title, issue_date)
+    c.save()
+    return buffer.getvalue()
+
+
+def render_certificate_batch(jobs):
+    """Render ``(arcname, user_name, course_title, issue_date)`` jobs to ``(arcname, pdf)`` pairs.
+
+    Takes and returns plain values only, so it can run in a worker process
+    that never sets up Django.
+    """
+    return [(arcname, render_certificate_pdf(*values)) for arcname, *values in jobs]
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from techmate.instrumentation import SerializationTimingMixin
 from .models import Certificate, Tutorial
 from django.contrib.auth.models import User
 
-class CertificateSerializer(serializers.ModelSerializer):
+class CertificateSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     user_name = serializers.SerializerMethodField()
     tutorial_title = serializers.SerializerMethodField()
     issued_date_formatted = serializers.SerializerMethodField()
@@ -1,8 +1,9 @@
 from django.urls import path
+from techmate.async_dispatch import api_view
 from .certificate_views import CertificateViewSet
 
 urlpatterns = [
-    path('', CertificateViewSet.as_view({'get': 'my_certificates'}), name='my_certificates'),
+    path('', api_view(CertificateViewSet, {'get': 'my_certificates'}), name='my_certificates'),
     path('issue/', CertificateViewSet.as_view({'post': 'issue_for_tutorial'}), name='issue_certificate'),
-    path('<int:pk>/download/', CertificateViewSet.as_view({'get': 'download_pdf'}), name='download_certificate'),
+    path('<int:pk>/download/', api_view(CertificateViewSet, {'get': 'download_pdf'}), name='download_certificate'),
 ]
@@ -1,20 +1,56 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.http import FileResponse
+from rest_framework.exceptions import NotFound
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
 from .models import Certificate, Tutorial, UserTutorialProgress
-from .certificate_generator import generate_certificate_pdf, generate_certificate_filename
+from .certificate_cache import aget_certificate_pdf, get_certificate_pdf
+from .certificate_generator import generate_certificate_filename
 from .certificate_serializer import CertificateSerializer
+from .pagination import KeysetPagination
+
+def pdf_validators(cached):
+    """ETag, Last-Modified and Cache-Control of a cached render, and its HTTP-date timestamp"""
+    # HTTP dates have whole-second precision
+    last_modified = int(cached.last_modified.timestamp())
+    return last_modified, {
+        'ETag': cached.etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': 'private, no-cache',
+    }
+
 
 class CertificateViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    keyset_fields = ('issued_date', 'id')
     
     def my_certificates(self, request):
-        """Get all user's certificates"""
+        """Get the user's certificates, one keyset page at a time"""
+        try:
+            certificates = Certificate.objects.filter(user=request.user).select_related('user', 'tutorial')
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(certificates, request, view=self)
+            serializer = CertificateSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        except NotFound:
+            raise
+        except Exception as e:
+            print(f"Error fetching certificates: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def amy_certificates(self, request):
+        """``my_certificates`` for ASGI workers, fetching the page with the async ORM"""
         try:
-            certificates = Certificate.objects.filter(user=request.user)
-            serializer = CertificateSerializer(certificates, many=True)
-            return Response(serializer.data)
+            certificates = Certificate.objects.filter(user=request.user).select_related('user', 'tutorial')
+            paginator = KeysetPagination()
+            page = await paginator.apaginate_queryset(certificates, request, view=self)
+            serializer = CertificateSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        except NotFound:
+            raise
         except Exception as e:
             print(f"Error fetching certificates: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -65,21 +101,59 @@ class CertificateViewSet(viewsets.ViewSet):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def download_pdf(self, request, pk=None):
-        """Download certificate PDF"""
+        """Download certificate PDF, served from the render cache with validators"""
         try:
-            certificate = Certificate.objects.get(id=pk, user=request.user)
-            pdf_buffer = generate_certificate_pdf(
-                certificate.user,
-                certificate.tutorial,
-                certificate.certificate_number
+            certificate = Certificate.objects.select_related('user', 'tutorial').get(id=pk, user=request.user)
+            cached = get_certificate_pdf(certificate)
+            last_modified, validators = pdf_validators(cached)
+            response = get_conditional_response(
+                request, etag=cached.etag, last_modified=last_modified
             )
-            filename = generate_certificate_filename(certificate.user, certificate.tutorial)
-            return FileResponse(
-                pdf_buffer,
-                as_attachment=True,
-                filename=filename,
-                content_type='application/pdf'
+            if response is None:
+                try:
+                    pdf_file = open(cached.path, 'rb')
+                except FileNotFoundError:
+                    # Evicted by another worker between the lookup and the open
+                    pdf_file = open(get_certificate_pdf(certificate).path, 'rb')
+                filename = generate_certificate_filename(certificate.user, certificate.tutorial)
+                response = FileResponse(
+                    pdf_file,
+                    as_attachment=True,
+                    filename=filename,
+                    content_type='application/pdf'
+                )
+            for header, value in validators.items():
+                response[header] = value
+            return response
+        except Certificate.DoesNotExist:
+            return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            print(f"Error downloading certificate: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def adownload_pdf(self, request, pk=None):
+        """``download_pdf`` for ASGI workers; a missing render is drawn in the render process pool"""
+        try:
+            certificate = await Certificate.objects.select_related('user', 'tutorial').aget(id=pk, user=request.user)
+            cached = await aget_certificate_pdf(certificate)
+            last_modified, validators = pdf_validators(cached)
+            response = get_conditional_response(
+                request, etag=cached.etag, last_modified=last_modified
             )
+            if response is None:
+                # Certificates are small; one read in a thread beats streaming a sync file under ASGI
+                try:
+                    pdf = await sync_to_async(cached.path.read_bytes, thread_sensitive=False)()
+                except FileNotFoundError:
+                    # Evicted by another worker between the lookup and the read
+                    cached = await aget_certificate_pdf(certificate)
+                    pdf = await sync_to_async(cached.path.read_bytes, thread_sensitive=False)()
+                filename = generate_certificate_filename(certificate.user, certificate.tutorial)
+                response = HttpResponse(pdf, content_type='application/pdf')
+                response['Content-Disposition'] = content_disposition_header(True, filename)
+            for header, value in validators.items():
+                response[header] = value
+            return response
         except Certificate.DoesNotExist:
             return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -0,0 +1,105 @@
+"""HTTP validators for tutorial list and detail responses.
+
+The validators are computed with one small query and checked before any
+serialization, so a ``304 Not Modified`` costs neither the full queryset nor
+DRF. They are built from ``Tutorial.updated_at`` and the stored counters.
+Detail responses also use the latest ``TutorialContent.updated_at``. For a
+signed-in caller, the caller's ``UserTutorialProgress.updated_at`` is
+included too, because those bodies carry ``user_progress``. Queryset updates
+of the stored counters, thumbnail hash and total duration also set
+``updated_at``, so the plain timestamp is enough for ``If-Modified-Since``.
+
+The ETags are strong, so PATCH and PUT can use them with ``If-Match``. The
+``a``-prefixed variants run the same queries through the async ORM.
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models import DateTimeField
+
+from .models import TutorialContent, UserTutorialProgress
+
+
+@dataclass
+class Validators:
+    etag: str
+    last_modified: Optional[int]  # whole seconds since the epoch, as HTTP dates carry
+
+
+def _validators(*parts):
+    timestamps = [part for part in parts if hasattr(part, 'timestamp')]
+    digest = hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return Validators(etag=f'"{digest}"', last_modified=last_modified)
+
+
+def _user_id(user):
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _detail_row(queryset, tutorial_id, user_id):
+    latest_content = (
+        TutorialContent.objects.filter(tutorial=OuterRef('pk')).order_by('-updated_at').values('updated_at')[:1]
+    )
+    if user_id is not None:
+        progress_updated = Subquery(
+            UserTutorialProgress.objects.filter(tutorial=OuterRef('pk'), user_id=user_id).values('updated_at')[:1]
+        )
+    else:
+        progress_updated = Value(None, output_field=DateTimeField())
+    return (
+        queryset.filter(pk=tutorial_id)
+        .order_by()
+        .values('updated_at', 'contents_total')
+        .annotate(contents_updated=Subquery(latest_content), progress_updated=progress_updated)
+    )
+
+
+def _detail_validators(user_id, row):
+    if row is None:
+        return None
+    return _validators(
+        'detail', user_id, row['updated_at'], row['contents_total'], row['contents_updated'], row['progress_updated'],
+    )
+
+
+def detail_validators(queryset, tutorial_id, user) -> Optional[Validators]:
+    """Validators of one tutorial's detail body as seen by ``user``; None when it does not exist."""
+    user_id = _user_id(user)
+    return _detail_validators(user_id, _detail_row(queryset, tutorial_id, user_id).first())
+
+
+async def adetail_validators(queryset, tutorial_id, user) -> Optional[Validators]:
+    user_id = _user_id(user)
+    return _detail_validators(user_id, await _detail_row(queryset, tutorial_id, user_id).afirst())
+
+
+def _progress_rows(queryset, user_id):
+    return UserTutorialProgress.objects.filter(user_id=user_id, tutorial__in=queryset.order_by().values('pk'))
+
+
+def _list_validators(user_id, tutorials, progress):
+    return _validators(
+        'list', user_id, tutorials['count'], tutorials['updated'], progress['count'], progress['updated'],
+    )
+
+
+def list_validators(queryset, user) -> Validators:
+    """Validators of every page of ``queryset`` as listed for ``user``."""
+    user_id = _user_id(user)
+    tutorials = queryset.order_by().aggregate(count=Count('pk'), updated=Max('updated_at'))
+    progress = {'count': None, 'updated': None}
+    if user_id is not None:
+        progress = _progress_rows(queryset, user_id).aggregate(count=Count('pk'), updated=Max('updated_at'))
+    return _list_validators(user_id, tutorials, progress)
+
+
+async def alist_validators(queryset, user) -> Validators:
+    user_id = _user_id(user)
+    tutorials = await queryset.order_by().aaggregate(count=Count('pk'), updated=Max('updated_at'))
+    progress = {'count': None, 'updated': None}
+    if user_id is not None:
+        progress = await _progress_rows(queryset, user_id).aaggregate(count=Count('pk'), updated=Max('updated_at'))
+    return _list_validators(user_id, tutorials, progress)
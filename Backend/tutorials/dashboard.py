@@ -0,0 +1,131 @@
+"""Cached per-user dashboard snapshots.
+
+The payload is built from one conditional aggregate over the tutorials, each
+joined to the user's progress row if there is one, and one joined query for
+the most recent of those rows. It is cached under
+``tutorials:dashboard:<catalog version>:<user id>``. Saving or deleting a
+progress row drops its owner's snapshot. Changes that touch every learner at
+once bump the catalog version instead, so all snapshots miss together without
+enumerating users. Those changes are tutorials being added, removed or
+renamed, and percentages being recalculated after a content change.
+
+``aget_dashboard`` serves async views with the same queries through the async
+ORM and the async cache API.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, FilteredRelation, Q
+
+from .models import Tutorial, UserTutorialProgress
+
+RECENT_LIMIT = 5
+_VERSION_KEY = 'tutorials:dashboard:version'
+
+
+def _catalog_version():
+    # Seeded from the clock so an evicted counter never restarts at a value already used
+    return cache.get_or_set(_VERSION_KEY, time.time_ns, None)
+
+
+def _snapshot_key(user_id):
+    return f'tutorials:dashboard:{_catalog_version()}:{user_id}'
+
+
+async def _asnapshot_key(user_id):
+    version = await cache.aget_or_set(_VERSION_KEY, time.time_ns, None)
+    return f'tutorials:dashboard:{version}:{user_id}'
+
+
+_STATS = {
+    'in_progress': Count('mine', filter=Q(mine__completed=False, mine__percentage__gt=0)),
+    'completed': Count('mine', filter=Q(mine__completed=True)),
+    'total_tutorials': Count('pk'),
+}
+
+
+def _stats(user):
+    # Every tutorial, left-joined to at most one progress row of ``user`` (the pair is
+    # unique), so the catalog size and the user's counts come from one aggregate
+    return Tutorial.objects.order_by().annotate(
+        mine=FilteredRelation('user_progress', condition=Q(user_progress__user=user)),
+    )
+
+
+def _recent(user):
+    return (
+        UserTutorialProgress.objects
+        .filter(user=user)
+        .select_related('tutorial')
+        .only('percentage', 'completed', 'updated_at', 'tutorial__id', 'tutorial__title')
+        .order_by('-updated_at')[:RECENT_LIMIT]
+    )
+
+
+def build_dashboard(user):
+    """Compute the dashboard payload of ``user`` with two queries."""
+    stats = _stats(user).aggregate(**_STATS)
+    return _payload(stats, list(_recent(user)))
+
+
+async def abuild_dashboard(user):
+    stats = await _stats(user).aaggregate(**_STATS)
+    recent = [progress async for progress in _recent(user)]
+    return _payload(stats, recent)
+
+
+def _payload(stats, recent):
+    return {
+        'stats': {
+            'in_progress': stats['in_progress'],
+            'completed': stats['completed'],
+            'total_tutorials': stats['total_tutorials'],
+        },
+        'recent_tutorials': [
+            {
+                'tutorial_id': progress.tutorial.id,
+                'tutorial_title': progress.tutorial.title,
+                'percentage': float(progress.percentage),
+                'completed': progress.completed,
+            }
+            for progress in recent
+        ],
+    }
+
+
+def get_dashboard(user):
+    """Return the cached snapshot of ``user``, building and storing it on a miss."""
+    key = _snapshot_key(user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_dashboard(user)
+        cache.set(key, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+async def aget_dashboard(user):
+    key = await _asnapshot_key(user.pk)
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        snapshot = await abuild_dashboard(user)
+        await cache.aset(key, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_user(user_id):
+    def drop():
+        cache.delete(_snapshot_key(user_id))
+
+    drop()
+    # Drop again once committed: a reader that saw the old rows while this
+    # transaction was open may have stored a snapshot of them
+    transaction.on_commit(drop)
+
+
+def invalidate_all():
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,41 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from tutorials.certificate_generator import render_certificate_pdf
+
+
+class Command(BaseCommand):
+    help = 'Compare per-certificate render time and PDF size with and without the static-layer template.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500, help='Certificates rendered per mode.')
+        parser.add_argument('--rounds', type=int, default=5, help='Timed rounds per mode; the median is reported.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        samples = [
+            (f'Student {index}', f'Course number {index % 50}', 'January 01, 2026')
+            for index in range(iterations)
+        ]
+        results = {}
+        for label, use_template in (('direct', False), ('template', True)):
+            # Warm up fonts and module state before timing
+            render_certificate_pdf(*samples[0], use_template=use_template)
+            timings = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                for sample in samples:
+                    render_certificate_pdf(*sample, use_template=use_template)
+                timings.append((time.perf_counter() - start) / iterations)
+            size = statistics.mean(len(render_certificate_pdf(*sample, use_template=use_template)) for sample in samples[:20])
+            results[label] = (statistics.median(timings), size)
+            self.stdout.write(f'{label:>8}: {results[label][0] * 1000:.3f} ms/certificate, {size:.0f} bytes')
+
+        direct_time, direct_size = results['direct']
+        template_time, template_size = results['template']
+        self.stdout.write(
+            f'template vs direct: {(template_time / direct_time - 1) * 100:+.1f}% time, '
+            f'{(template_size / direct_size - 1) * 100:+.1f}% size'
+        )
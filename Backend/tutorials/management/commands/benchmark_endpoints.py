@@ -0,0 +1,73 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tutorials import benchmarks
+from tutorials.seeding import SCALES, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every API route against a freshly seeded test database and compare p50/p95 latency '
+        'and SQL query counts with the checked-in budgets. Fails when a budget is exceeded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='default', help='Size of the seeded data set.')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint.')
+        parser.add_argument('--budgets', default=str(benchmarks.BUDGETS_PATH), help='Budget file to compare with.')
+        parser.add_argument('--report', help='Write the machine-readable report to this file.')
+        parser.add_argument(
+            '--no-latency', action='store_true',
+            help='Check query counts and statuses only, e.g. on shared CI machines.',
+        )
+        parser.add_argument(
+            '--update-budgets', action='store_true',
+            help='Write the measured query counts and p95 (with headroom) to the budget file instead of checking.',
+        )
+
+    def handle(self, *args, **options):
+        missing = benchmarks.missing_routes()
+        if missing:
+            raise CommandError(f'Routes without a benchmark endpoint: {", ".join(missing)}')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with benchmarks.sandbox():
+                fixtures = benchmarks.prepare(seed(SCALES[options['scale']]))
+                results = benchmarks.run(fixtures, iterations=options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['update_budgets']:
+            with open(options['budgets'], 'w') as handle:
+                json.dump({'scale': options['scale'], 'endpoints': benchmarks.budgets_from(results)}, handle, indent=2)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote budgets for {len(results)} endpoints to {options['budgets']}"))
+            return
+
+        violations = benchmarks.check(results, benchmarks.load_budgets(options['budgets']), latency=not options['no_latency'])
+        self.stdout.write(f'{"endpoint":<40} {"status":<9} {"queries":>7} {"p50 ms":>8} {"p95 ms":>8}')
+        for result in results:
+            statuses = ','.join(str(status) for status in result.statuses)
+            line = (
+                f'{result.endpoint:<40} {statuses:<9} {result.queries:>7} '
+                f'{result.p50_ms:>8.1f} {result.p95_ms:>8.1f}'
+            )
+            self.stdout.write(self.style.ERROR(line) if result.violations else line)
+            for violation in result.violations:
+                self.stdout.write(self.style.ERROR(f'    {violation}'))
+
+        if options['report']:
+            with open(options['report'], 'w') as handle:
+                json.dump(
+                    benchmarks.report(results, scale=options['scale'], iterations=options['iterations']),
+                    handle, indent=2,
+                )
+        if violations:
+            raise CommandError(f'{violations} budget violation(s).')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} endpoints within budget.'))
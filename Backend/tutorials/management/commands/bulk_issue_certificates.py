@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tutorials.certificate_bulk import RENDER_BATCH_SIZE, issue_missing_certificates, write_certificates_zip
+from tutorials.models import Tutorial
+
+
+class Command(BaseCommand):
+    help = 'Issue missing certificates for completed learners and export every certificate of the tutorials as one ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tutorial_ids', nargs='+', type=int, help='Tutorials to issue and export.')
+        parser.add_argument('--output', required=True, help='Path of the ZIP file to write.')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes; defaults to the CPU count.')
+        parser.add_argument('--batch-size', type=int, default=RENDER_BATCH_SIZE, help='Certificates per render task.')
+        parser.add_argument('--no-issue', action='store_true', help='Only export certificates that already exist.')
+
+    def handle(self, *args, **options):
+        tutorials = list(Tutorial.objects.filter(pk__in=options['tutorial_ids']))
+        missing = set(options['tutorial_ids']) - {tutorial.pk for tutorial in tutorials}
+        if missing:
+            raise CommandError(f'Unknown tutorial id(s): {", ".join(map(str, sorted(missing)))}')
+
+        if not options['no_issue']:
+            for tutorial in tutorials:
+                issued = issue_missing_certificates(tutorial)
+                self.stdout.write(f'Tutorial {tutorial.pk}: issued {issued} new certificate(s).')
+
+        with open(options['output'], 'wb') as output:
+            stats = write_certificates_zip(tutorials, output, options['workers'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {stats.certificates} certificate(s) in {stats.seconds:.1f}s '
+            f'({stats.per_second:.0f}/s), ZIP {os.path.getsize(options["output"]) / 1024 / 1024:.1f} MB '
+            f'-> {options["output"]}'
+        ))
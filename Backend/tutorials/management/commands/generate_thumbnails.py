@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tutorials import response_cache, thumbnails
+from tutorials.models import Tutorial
+
+
+class Command(BaseCommand):
+    help = 'Build resized thumbnail variants for tutorials, e.g. those uploaded before variants existed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Also re-check tutorials that already have variants.')
+
+    def handle(self, *args, **options):
+        queryset = Tutorial.objects.exclude(thumbnail='').exclude(thumbnail__isnull=True).only('thumbnail', 'thumbnail_hash')
+        if not options['all']:
+            queryset = queryset.filter(thumbnail_hash='')
+        built = failed = 0
+        for tutorial in queryset.iterator():
+            thumbnail_hash = thumbnails.generate_variants(tutorial.thumbnail)
+            if thumbnail_hash is None:
+                failed += 1
+                continue
+            built += 1
+            if thumbnail_hash == tutorial.thumbnail_hash:
+                continue
+            # As signals._build_thumbnail_variants does: new validators, and no cached bodies without the variants
+            Tutorial.objects.filter(pk=tutorial.pk).update(thumbnail_hash=thumbnail_hash, updated_at=timezone.now())
+            response_cache.invalidate_tutorial(tutorial.pk)
+        self.stdout.write(self.style.SUCCESS(f'Built thumbnails for {built} tutorial(s); {failed} unreadable.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from techmate.import_profile import HEAVY_MODULES, TARGETS, profile_startup
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile cold-start imports of `manage.py check` and of loading the WSGI app, each in a '
+        'fresh interpreter, and report wall time, peak RSS and the slowest packages.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=[*TARGETS, 'all'], default='all')
+        parser.add_argument('--top', type=int, default=15, help='Packages listed per target.')
+
+    def handle(self, *args, **options):
+        targets = list(TARGETS) if options['target'] == 'all' else [options['target']]
+        for target in targets:
+            profile = profile_startup(target)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{target}:'))
+            self.stdout.write(
+                f'  {profile.seconds * 1000:.0f} ms wall, {profile.import_seconds * 1000:.0f} ms importing '
+                f'{len(profile.imports)} modules, {profile.rss_bytes / 2 ** 20:.1f} MiB peak RSS'
+            )
+            loaded = ', '.join(profile.heavy) or 'none'
+            self.stdout.write(f'  heavy libraries loaded ({", ".join(HEAVY_MODULES)}): {loaded}')
+            for package, self_us in profile.slowest(options['top']):
+                self.stdout.write(f'  {self_us / 1000:>9.1f} ms  {package}')
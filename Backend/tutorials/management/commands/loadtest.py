@@ -0,0 +1,84 @@
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent GETs at a running server and report throughput and latency per concurrency level. '
+        'Run it against start.sh with SERVER_MODE=wsgi and then SERVER_MODE=asgi, with the same '
+        'WEB_CONCURRENCY, to compare the two deployment modes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Absolute URL to request, e.g. http://localhost:8000/api/tutorials/')
+        parser.add_argument(
+            '--concurrency', default='1,8,32',
+            help='Comma-separated numbers of simultaneous clients; each level is measured separately.',
+        )
+        parser.add_argument('--requests', type=int, default=400, help='Requests sent per concurrency level.')
+        parser.add_argument('--token', help='Access token sent as "Authorization: Bearer <token>".')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.netloc:
+            raise CommandError('url must be an absolute http(s) URL.')
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency takes comma-separated integers.')
+        headers = {'Authorization': f"Bearer {options['token']}"} if options['token'] else {}
+
+        self.stdout.write(f'{"clients":>8} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}')
+        for clients in levels:
+            latencies, errors, seconds = self.run_level(url, headers, clients, options['requests'], options['timeout'])
+            if not latencies:
+                self.stdout.write(f'{clients:>8} {"-":>9} {"-":>9} {"-":>9} {"-":>9} {errors:>7}')
+                continue
+            cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            self.stdout.write(
+                f'{clients:>8} {len(latencies) / seconds:>9.1f} {cuts[49] * 1000:>9.1f} '
+                f'{cuts[94] * 1000:>9.1f} {cuts[98] * 1000:>9.1f} {errors:>7}'
+            )
+
+    def run_level(self, url, headers, clients, total, timeout):
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        local = threading.local()
+        latencies, errors = [], 0
+        lock = threading.Lock()
+
+        def send(_):
+            nonlocal errors
+            # One keep-alive connection per client thread, like a browser tab
+            if not hasattr(local, 'connection'):
+                local.connection = connection_class(url.netloc, timeout=timeout)
+            start = time.perf_counter()
+            try:
+                local.connection.request('GET', path, headers=headers)
+                response = local.connection.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                local.connection.close()
+                del local.connection
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(send, range(total)))
+        return latencies, errors, time.perf_counter() - start
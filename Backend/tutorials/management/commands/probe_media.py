@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from tutorials.metadata import probe_content
+from tutorials.models import TutorialContent
+
+
+class Command(BaseCommand):
+    help = 'Read duration, size and bitrate from the headers of uploaded content files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-probe files that already have metadata.')
+
+    def handle(self, *args, **options):
+        queryset = TutorialContent.objects.exclude(file='').exclude(file__isnull=True)
+        if not options['all']:
+            queryset = queryset.filter(file_size__isnull=True)
+        probed = failed = 0
+        for content_id in queryset.values_list('pk', flat=True).iterator():
+            if probe_content(content_id) is None:
+                failed += 1
+            else:
+                probed += 1
+        self.stdout.write(self.style.SUCCESS(f'Probed {probed} file(s); {failed} could not be read.'))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tutorials import uploads
+from tutorials.models import ContentUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked uploads that were never completed, along with their chunks on disk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Age after which a pending upload is abandoned.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = ContentUpload.objects.filter(status='pending', created_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            uploads.discard(upload)
+            upload.delete()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} stale upload(s).'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from tutorials.models import Tutorial, TutorialContent
+
+
+def actual_contents_total():
+    """Subquery counting the contents of the outer tutorial row."""
+    counts = (
+        TutorialContent.objects
+        .filter(tutorial=OuterRef('pk'))
+        .order_by()
+        .values('tutorial')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Tutorial.contents_total from TutorialContent rows, or report drift with --check.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report tutorials whose stored counter has drifted; exit non-zero if any did.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            Tutorial.objects
+            .annotate(actual=actual_contents_total())
+            .exclude(contents_total=F('actual'))
+            .values_list('pk', 'contents_total', 'actual')
+        )
+        if options['check']:
+            rows = list(drifted)
+            for pk, stored, actual in rows:
+                self.stdout.write(f'Tutorial {pk}: stored {stored}, actual {actual}')
+            if rows:
+                raise CommandError(f'{len(rows)} tutorial(s) have a drifted contents_total.')
+            self.stdout.write(self.style.SUCCESS('All content counters are correct.'))
+            return
+
+        updated = Tutorial.objects.update(contents_total=actual_contents_total())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt content counters for {updated} tutorial(s).'))
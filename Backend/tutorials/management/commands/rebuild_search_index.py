@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tutorials import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from all tutorials and tutorial contents.'
+
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            raise CommandError('Full-text search is not supported on this database.')
+        with transaction.atomic():
+            search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tutorials.progress import recalculate_progress
+
+
+class Command(BaseCommand):
+    help = 'Recompute UserTutorialProgress percentages from completed contents and content counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tutorial', type=int, action='append', dest='tutorial_ids',
+            help='Only recalculate this tutorial; may be given more than once. Defaults to all tutorials.',
+        )
+
+    def handle(self, *args, **options):
+        updated = recalculate_progress(options['tutorial_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Recalculated {updated} progress row(s).'))
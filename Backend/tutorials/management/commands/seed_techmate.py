@@ -0,0 +1,62 @@
+import dataclasses
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tutorials.models import Certificate, Tutorial, TutorialContent, UserTutorialProgress
+from tutorials.seeding import BATCH_SIZE, PASSWORD, SCALES, seed
+
+# Options that override one field of the chosen scale
+OVERRIDES = {
+    'instructors': 'instructors',
+    'students': 'students',
+    'tutorials': 'tutorials',
+    'lessons': 'lessons_per_tutorial',
+    'enrolments': 'enrolments_per_student',
+    'completion_rate': 'completion_rate',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill an empty database with synthetic users, profiles, tutorials, lessons, progress, completed '
+        f'lessons and certificates at production-like scale. Every account signs in with "{PASSWORD}".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='default', help='Preset sizes; the options below override it.')
+        parser.add_argument('--instructors', type=int)
+        parser.add_argument('--students', type=int)
+        parser.add_argument('--tutorials', type=int)
+        parser.add_argument('--lessons', type=int, help='Lessons per tutorial.')
+        parser.add_argument('--enrolments', type=int, help='Tutorials each student has progress in.')
+        parser.add_argument('--completion-rate', type=float, help='Share of enrolments finished with a certificate.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per INSERT.')
+
+    def handle(self, *args, **options):
+        scale = dataclasses.replace(SCALES[options['scale']], **{
+            field: options[option] for option, field in OVERRIDES.items() if options[option] is not None
+        })
+        if min(scale.instructors, scale.students, scale.tutorials, scale.lessons_per_tutorial) < 1:
+            raise CommandError('Every count must be at least 1.')
+        if not 0 <= scale.completion_rate <= 1:
+            raise CommandError('--completion-rate must be between 0 and 1.')
+        if User.objects.filter(username__in=['admin', 'instructor0', 'student0']).exists():
+            raise CommandError('The database already holds seeded users; run it against an empty database (see `flush`).')
+
+        start = time.perf_counter()
+        seed(scale, random_seed=options['seed'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+
+        for label, count in (
+            ('users', User.objects.count()),
+            ('tutorials', Tutorial.objects.count()),
+            ('lessons', TutorialContent.objects.count()),
+            ('progress rows', UserTutorialProgress.objects.count()),
+            ('completed-lesson links', UserTutorialProgress.completed_contents.through.objects.count()),
+            ('certificates', Certificate.objects.count()),
+        ):
+            self.stdout.write(f'{count:>10} {label}')
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {elapsed:.1f}s.'))
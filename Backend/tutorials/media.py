@@ -0,0 +1,154 @@
+"""Serving uploaded content files with byte-range support.
+
+``serve_file`` answers plain, conditional and ``Range`` requests for a stored
+file. By default the bytes go out through ``FileResponse``, which the WSGI
+server turns into ``sendfile()``. Range responses keep that path: the file is
+positioned at the range start and ``Content-Length`` bounds how much is sent.
+With ``MEDIA_OFFLOAD`` set, only the headers are produced and nginx
+(``X-Accel-Redirect``) or Apache/lighttpd (``X-Sendfile``) send the file,
+ranges included, so no bytes pass through Python at all.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Larger reads than FileResponse's 4 KiB default when the server cannot sendfile()
+STREAM_BLOCK_SIZE = 256 * 1024
+
+OFFLOAD_ACCEL = 'x-accel-redirect'
+OFFLOAD_SENDFILE = 'x-sendfile'
+
+
+class _RangeFile:
+    """Read-only view of ``length`` bytes of an open file, starting at its current position.
+
+    ``fileno()`` is exposed so WSGI servers can still ``sendfile()`` the range;
+    they send from the current offset and stop at ``Content-Length``.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Return the ``(start, end)`` byte range requested by ``header``, inclusive.
+
+    Returns None when the header should be ignored and the whole file served,
+    which includes multi-range requests, and raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise ValueError('empty file')
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError('range starts past the end of the file')
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _offload_response(name, path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_OFFLOAD == OFFLOAD_ACCEL:
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_OFFLOAD_PREFIX.rstrip('/') + '/' + name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve_file(request, path, name, cache_control='public, max-age=3600'):
+    """Respond with the file at ``path`` honouring validators and ``Range``.
+
+    ``name`` is the storage name relative to ``MEDIA_ROOT``; offload mode hands
+    it to the front-end server.
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.MEDIA_OFFLOAD:
+            response = _offload_response(name, path, content_type)
+        else:
+            response = _file_response(request, path, stat.st_size, content_type, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def _file_response(request, path, size, content_type, etag, last_modified):
+    byte_range = None
+    if request.method == 'GET' and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(_RangeFile(file, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response.block_size = STREAM_BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
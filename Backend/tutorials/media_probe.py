@@ -0,0 +1,336 @@
+"""Pure-Python duration and bitrate probing for hosted media.
+
+Only container headers are read. For WebM/Matroska that means the EBML
+element headers: large elements are skipped by seeking, never by reading. For
+MP3 it means the ID3v2 tag header and the first frame, including any
+Xing/Info or VBRI table. Recordings made by browsers often leave the
+Matroska Duration unset. For those, the timecodes of the last cluster in the
+file tail are used instead.
+"""
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+# Matroska element ids, with their length marker bits kept as the spec writes them
+EBML = 0x1A45DFA3
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+
+# How much of the file end is searched for the last cluster when Duration is missing
+TAIL_BYTES = 512 * 1024
+# Container-level elements are small; anything larger is skipped, not parsed
+MAX_HEADER_ELEMENT = 1024 * 1024
+
+
+@dataclass
+class MediaInfo:
+    size: int
+    duration: Optional[float] = None
+    bitrate: Optional[int] = None  # bits per second, averaged over the file
+
+
+class ProbeError(Exception):
+    pass
+
+
+def probe(path) -> MediaInfo:
+    """Return size, duration and average bitrate for the media file at ``path``."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        head = file.read(4)
+        file.seek(0)
+        if head == b'\x1a\x45\xdf\xa3':
+            duration = _matroska_duration(file, size)
+        elif head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+            duration = _mp3_duration(file, size)
+        else:
+            raise ProbeError('Unrecognised media container')
+    bitrate = round(size * 8 / duration) if duration else None
+    return MediaInfo(size=size, duration=duration, bitrate=bitrate)
+
+
+# --- Matroska / WebM -------------------------------------------------------
+
+def _read_vint(file, keep_marker):
+    first = file.read(1)
+    if not first:
+        raise EOFError
+    byte = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not byte & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ProbeError('Invalid EBML variable-length integer')
+    value = byte if keep_marker else byte & (mask - 1)
+    rest = file.read(length - 1)
+    if len(rest) != length - 1:
+        raise EOFError
+    all_ones = value == mask - 1 and rest == b'\xff' * (length - 1)
+    for extra in rest:
+        value = (value << 8) | extra
+    # An all-ones size means "unknown", used by live recordings for Segment and Cluster
+    return value, length, (not keep_marker and all_ones)
+
+
+def _read_element_header(file):
+    element_id, _, _ = _read_vint(file, keep_marker=True)
+    size, _, unknown = _read_vint(file, keep_marker=False)
+    return element_id, (None if unknown else size)
+
+
+def _read_uint(file, size):
+    return int.from_bytes(file.read(size), 'big')
+
+
+def _read_float(file, size):
+    data = file.read(size)
+    if size == 4:
+        return struct.unpack('>f', data)[0]
+    if size == 8:
+        return struct.unpack('>d', data)[0]
+    raise ProbeError('Invalid EBML float size')
+
+
+def _children(file, end):
+    """Yield ``(id, size, data_start)`` for elements up to ``end``, leaving the file at each data start."""
+    while end is None or file.tell() < end:
+        try:
+            element_id, size = _read_element_header(file)
+        except EOFError:
+            return
+        start = file.tell()
+        yield element_id, size, start
+        if size is None:
+            return
+        file.seek(start + size)
+
+
+def _parse_info(file, end):
+    scale, duration = 1_000_000, None
+    for element_id, size, _ in _children(file, end):
+        if element_id == TIMECODE_SCALE:
+            scale = _read_uint(file, size)
+        elif element_id == DURATION:
+            duration = _read_float(file, size)
+    return scale, duration
+
+
+def _seek_positions(file, end):
+    positions = {}
+    for element_id, size, start in _children(file, end):
+        if element_id != SEEK or size is None:
+            continue
+        seek_id = position = None
+        for child_id, child_size, _ in _children(file, start + size):
+            if child_id == SEEK_ID:
+                seek_id = _read_uint(file, child_size)
+            elif child_id == SEEK_POSITION:
+                position = _read_uint(file, child_size)
+        if seek_id is not None and position is not None:
+            positions[seek_id] = position
+    return positions
+
+
+def _matroska_duration(file, size):
+    segment_start = segment_end = None
+    for element_id, element_size, start in _children(file, size):
+        if element_id == SEGMENT:
+            segment_start = start
+            segment_end = start + element_size if element_size is not None else size
+            break
+    if segment_start is None:
+        raise ProbeError('No Matroska segment')
+
+    info_at = None
+    file.seek(segment_start)
+    for element_id, element_size, start in _children(file, segment_end):
+        if element_id == INFO:
+            info_at = (start, element_size)
+            break
+        if element_id == SEEK_HEAD and element_size is not None and element_size <= MAX_HEADER_ELEMENT:
+            position = _seek_positions(file, start + element_size).get(INFO)
+            if position is not None:
+                file.seek(segment_start + position)
+                element_id, element_size = _read_element_header(file)
+                if element_id == INFO:
+                    info_at = (file.tell(), element_size)
+                    break
+        if element_id == CLUSTER:
+            break
+
+    scale, duration = 1_000_000, None
+    if info_at is not None:
+        start, element_size = info_at
+        file.seek(start)
+        scale, duration = _parse_info(file, start + element_size if element_size is not None else segment_end)
+    if duration:
+        return duration * scale / 1e9
+    last = _last_block_timecode(file, size)
+    return last * scale / 1e9 if last else None
+
+
+def _last_block_timecode(file, size):
+    """Timecode of the final block in the last cluster found in the file tail."""
+    tail_start = max(0, size - TAIL_BYTES)
+    file.seek(tail_start)
+    tail = file.read()
+    marker = CLUSTER.to_bytes(4, 'big')
+    position = tail.rfind(marker)
+    while position != -1:
+        file.seek(tail_start + position)
+        try:
+            latest = _cluster_last_timecode(file, size)
+        except (ProbeError, EOFError, struct.error):
+            latest = None
+        if latest is not None:
+            return latest
+        # The bytes matched inside payload data; try the previous occurrence
+        position = tail.rfind(marker, 0, position)
+    return None
+
+
+def _cluster_last_timecode(file, size):
+    element_id, cluster_size = _read_element_header(file)
+    if element_id != CLUSTER:
+        return None
+    start = file.tell()
+    end = min(size, start + cluster_size) if cluster_size is not None else size
+    base = latest = None
+    for child_id, child_size, _ in _children(file, end):
+        if child_size is None:
+            break
+        if child_id == CLUSTER_TIMECODE:
+            base = _read_uint(file, child_size)
+        elif child_id == SIMPLE_BLOCK:
+            latest = _block_timecode(file, latest)
+        elif child_id == BLOCK_GROUP:
+            for block_id, block_size, _ in _children(file, file.tell() + child_size):
+                if block_id == BLOCK:
+                    latest = _block_timecode(file, latest)
+        elif child_id == CLUSTER:
+            break
+    if base is None:
+        return None
+    return base + (latest or 0)
+
+
+def _block_timecode(file, latest):
+    _read_vint(file, keep_marker=False)  # track number
+    relative = struct.unpack('>h', file.read(2))[0]
+    return relative if latest is None else max(latest, relative)
+
+
+# --- MP3 ---------------------------------------------------------------------
+
+_MP3_BITRATES = {
+    # (MPEG-1, layer) and (MPEG-2/2.5, layer) tables in kbit/s
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+# How far past the ID3 tag to look for the first frame sync
+_MP3_SYNC_WINDOW = 64 * 1024
+
+
+@dataclass
+class _Mp3Frame:
+    offset: int
+    version: int  # 1, 2 or 25 (MPEG-2.5)
+    layer: int
+    bitrate: int  # bits per second
+    sample_rate: int
+    mono: bool
+
+    @property
+    def samples(self):
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and self.version != 1:
+            return 576
+        return 1152
+
+    @property
+    def side_info(self):
+        if self.version == 1:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+
+def _parse_mp3_header(data, offset):
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = {0: 25, 2: 2, 3: 1}.get((b1 >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((b1 >> 1) & 0x03)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x03
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrates = _MP3_BITRATES[(1 if version == 1 else 2, layer)]
+    return _Mp3Frame(
+        offset=offset, version=version, layer=layer,
+        bitrate=bitrates[bitrate_index] * 1000,
+        sample_rate=_MP3_SAMPLE_RATES[version][rate_index],
+        mono=(b3 >> 6) == 3,
+    )
+
+
+def _id3v2_size(file):
+    header = file.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _mp3_duration(file, size):
+    audio_start = _id3v2_size(file)
+    file.seek(audio_start)
+    window = file.read(_MP3_SYNC_WINDOW)
+    frame = None
+    for index in range(len(window) - 3):
+        if window[index] == 0xFF:
+            frame = _parse_mp3_header(window, index)
+            if frame:
+                break
+    if frame is None:
+        raise ProbeError('No MPEG audio frame found')
+
+    frame_data = window[frame.offset:frame.offset + 200]
+    # Xing/Info (LAME) or VBRI headers carry the frame count of VBR files
+    xing_at = 4 + frame.side_info
+    if frame_data[xing_at:xing_at + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', frame_data[xing_at + 4:xing_at + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack('>I', frame_data[xing_at + 8:xing_at + 12])[0]
+            return frames * frame.samples / frame.sample_rate
+    if frame_data[36:40] == b'VBRI':
+        frames = struct.unpack('>I', frame_data[50:54])[0]
+        return frames * frame.samples / frame.sample_rate
+
+    # Constant bitrate: the audio length follows from the byte count
+    audio_bytes = size - audio_start - frame.offset
+    file.seek(max(0, size - 128))
+    if file.read(3) == b'TAG':
+        audio_bytes -= 128
+    return audio_bytes * 8 / frame.bitrate
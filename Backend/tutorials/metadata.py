@@ -0,0 +1,87 @@
+"""Background media probing and the stored per-tutorial total duration.
+
+Probing runs on a small thread pool once the saving transaction commits, so
+uploads return without waiting on disk reads. Results are written with queryset
+updates, which keeps the save signals (and another probe) from firing again.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import response_cache
+from .media_probe import ProbeError, probe
+from .models import Tutorial, TutorialContent
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.MEDIA_PROBE_WORKERS, thread_name_prefix='media-probe')
+    return _executor
+
+
+def total_duration_subquery():
+    """Subquery summing the content durations of the outer tutorial row."""
+    sums = (
+        TutorialContent.objects
+        .filter(tutorial=OuterRef('pk'))
+        .order_by()
+        .values('tutorial')
+        .annotate(total=Sum('duration'))
+        .values('total')
+    )
+    return Coalesce(Subquery(sums, output_field=IntegerField()), Value(0))
+
+
+def refresh_total_duration(tutorial_ids):
+    Tutorial.objects.filter(pk__in=list(tutorial_ids)).update(
+        total_duration=total_duration_subquery(), updated_at=timezone.now(),
+    )
+
+
+def probe_content(content_id):
+    """Read the headers of a content's file and store its size, duration and bitrate."""
+    content = TutorialContent.objects.filter(pk=content_id).only('id', 'tutorial_id', 'file').first()
+    if content is None or not content.file:
+        return None
+    try:
+        info = probe(content.file.path)
+    except (OSError, ProbeError, EOFError) as exc:
+        logger.warning('Cannot probe %s: %s', content.file.name, exc)
+        return None
+    # A new updated_at moves the detail validators even when no duration was found
+    fields = {'file_size': info.size, 'bitrate': info.bitrate, 'updated_at': timezone.now()}
+    if info.duration:
+        fields['duration'] = round(info.duration)
+    TutorialContent.objects.filter(pk=content_id).update(**fields)
+    if info.duration:
+        refresh_total_duration([content.tutorial_id])
+    response_cache.invalidate_tutorial(content.tutorial_id)
+    return info
+
+
+def _probe_in_worker(content_id):
+    try:
+        probe_content(content_id)
+    except Exception:
+        logger.exception('Media probe failed for content %s', content_id)
+    finally:
+        # Worker threads hold their own connection; do not leave it open between jobs
+        close_old_connections()
+
+
+def schedule_probe(content_id):
+    """Probe ``content_id`` after the current transaction commits."""
+    if settings.MEDIA_PROBE_ASYNC:
+        transaction.on_commit(lambda: _get_executor().submit(_probe_in_worker, content_id))
+    else:
+        transaction.on_commit(lambda: probe_content(content_id))
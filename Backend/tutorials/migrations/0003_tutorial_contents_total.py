@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:50
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_contents_total(apps, schema_editor):
+    Tutorial = apps.get_model('tutorials', 'Tutorial')
+    TutorialContent = apps.get_model('tutorials', 'TutorialContent')
+    counts = (
+        TutorialContent.objects
+        .filter(tutorial=OuterRef('pk'))
+        .order_by()
+        .values('tutorial')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Tutorial.objects.update(contents_total=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0002_certificate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorial',
+            name='contents_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_contents_total, migrations.RunPython.noop),
+    ]
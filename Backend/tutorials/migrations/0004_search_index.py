@@ -0,0 +1,71 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE tutorials_search_index USING fts5(
+        title, body, tutorial_id UNINDEXED, content_id UNINDEXED,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO tutorials_search_index (rowid, title, body, tutorial_id, content_id)
+    SELECT id * 2, title, description, id, NULL FROM tutorials_tutorial
+    """,
+    """
+    INSERT INTO tutorials_search_index (rowid, title, body, tutorial_id, content_id)
+    SELECT id * 2 + 1, title, TRIM(description || ' ' || text), tutorial_id, id
+    FROM tutorials_tutorialcontent
+    """,
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE tutorials_search_index (
+        doc_id bigint PRIMARY KEY,
+        tutorial_id bigint NOT NULL,
+        content_id bigint NULL,
+        title text NOT NULL,
+        body text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') ||
+            setweight(to_tsvector('english', body), 'B')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX tutorials_search_index_document ON tutorials_search_index USING GIN (document)",
+    """
+    INSERT INTO tutorials_search_index (doc_id, tutorial_id, content_id, title, body)
+    SELECT id * 2, id, NULL, title, description FROM tutorials_tutorial
+    """,
+    """
+    INSERT INTO tutorials_search_index (doc_id, tutorial_id, content_id, title, body)
+    SELECT id * 2 + 1, tutorial_id, id, title, TRIM(description || ' ' || text)
+    FROM tutorials_tutorialcontent
+    """,
+]
+
+FORWARD = {
+    'sqlite': SQLITE_FORWARD,
+    'postgresql': POSTGRES_FORWARD,
+}
+
+
+def create_search_index(apps, schema_editor):
+    for statement in FORWARD.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in FORWARD:
+        schema_editor.execute("DROP TABLE IF EXISTS tutorials_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0003_tutorial_contents_total'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0004_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['user', 'issued_date', 'id'], name='certificate_user_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorial',
+            index=models.Index(fields=['created_at', 'id'], name='tutorial_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorial',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='tutorial_author_keyset'),
+        ),
+    ]
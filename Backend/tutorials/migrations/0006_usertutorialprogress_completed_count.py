@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_completed_count(apps, schema_editor):
+    UserTutorialProgress = apps.get_model('tutorials', 'UserTutorialProgress')
+    through = UserTutorialProgress.completed_contents.through
+    counts = (
+        through.objects
+        .filter(usertutorialprogress_id=OuterRef('pk'))
+        .order_by()
+        .values('usertutorialprogress_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    UserTutorialProgress.objects.update(
+        completed_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertutorialprogress',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_completed_count, migrations.RunPython.noop),
+    ]
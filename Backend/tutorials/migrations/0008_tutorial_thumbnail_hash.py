@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0007_content_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorial',
+            name='thumbnail_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:17
+
+from django.db import migrations, models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_duration(apps, schema_editor):
+    Tutorial = apps.get_model('tutorials', 'Tutorial')
+    TutorialContent = apps.get_model('tutorials', 'TutorialContent')
+    sums = (
+        TutorialContent.objects
+        .filter(tutorial=OuterRef('pk'))
+        .order_by()
+        .values('tutorial')
+        .annotate(total=Sum('duration'))
+        .values('total')
+    )
+    Tutorial.objects.update(total_duration=Coalesce(Subquery(sums, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0008_tutorial_thumbnail_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorial',
+            name='total_duration',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tutorialcontent',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Average bits per second', null=True),
+        ),
+        migrations.AddField(
+            model_name='tutorialcontent',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_total_duration, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0009_media_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertutorialprogress',
+            index=models.Index(fields=['user', '-updated_at'], name='progress_user_recent_idx'),
+        ),
+    ]
@@ -13,6 +13,11 @@ class Tutorial(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tutorials')
     is_featured = models.BooleanField(default=False)
     thumbnail = models.ImageField(upload_to='tutorials/thumbnails/', null=True, blank=True)
+    # Content hash naming the resized variants of thumbnail (see tutorials.thumbnails)
+    thumbnail_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    contents_total = models.PositiveIntegerField(default=0, editable=False)
+    # Sum of the contents' durations in seconds, kept current by tutorials.signals
+    total_duration = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -21,9 +26,18 @@ class Tutorial(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination keys, for the whole catalog and per instructor
+            models.Index(fields=['created_at', 'id'], name='tutorial_created_keyset'),
+            models.Index(fields=['created_by', 'created_at', 'id'], name='tutorial_author_keyset'),
+        ]
 
     @property
     def content_count(self) -> int:
+        return self.contents_total
+
+    def count_contents(self) -> int:
+        """Count contents in the database, bypassing the stored ``contents_total``."""
         return self.contents.count()
 
 
@@ -42,6 +56,9 @@ class TutorialContent(models.Model):
     file = models.FileField(upload_to='tutorials/content/', null=True, blank=True)
     text = models.TextField(blank=True)
     duration = models.PositiveIntegerField(null=True, blank=True, help_text='Duration in seconds')
+    # Filled in from the file headers by tutorials.media_probe after upload
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text='Average bits per second')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -58,26 +75,34 @@ class UserTutorialProgress(models.Model):
     completed_contents = models.ManyToManyField(TutorialContent, blank=True, related_name='completed_by')
     completed = models.BooleanField(default=False)
     percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    # Stored size of completed_contents, so deltas can adjust the percentage without a recount
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['user', 'tutorial']
         ordering = ['-updated_at']
+        indexes = [models.Index(fields=['user', '-updated_at'], name='progress_user_recent_idx')]
 
     def __str__(self) -> str:
         return f"{self.user.username} - {self.tutorial.title} - {self.percentage}%"
 
     def calculate_progress(self) -> 'UserTutorialProgress':
-        total_contents = self.tutorial.contents.count()
+        # Read the stored counter fresh: cached tutorial instances may predate a content change
+        total_contents = Tutorial.objects.values_list('contents_total', flat=True).get(pk=self.tutorial_id)
+        self.apply_counts(self.completed_contents.count(), total_contents)
+        self.save()
+        return self
+
+    def apply_counts(self, completed_count, total_contents) -> None:
+        """Set the stored count, percentage and completion from the two counts."""
+        self.completed_count = completed_count
         if total_contents == 0:
             self.percentage = 0
             self.completed = False
         else:
-            completed_count = self.completed_contents.count()
             self.percentage = round((completed_count / total_contents) * 100, 2)
             self.completed = completed_count == total_contents
-        self.save()
-        return self
 
 
 class Certificate(models.Model):
@@ -89,11 +114,50 @@ class Certificate(models.Model):
     class Meta:
         unique_together = ('user', 'tutorial')
         ordering = ['-issued_date']
+        indexes = [
+            models.Index(fields=['user', 'issued_date', 'id'], name='certificate_user_keyset'),
+        ]
     
     def __str__(self) -> str:
         return f"{self.user.get_full_name()} - {self.tutorial.title}"
+
+    @staticmethod
+    def generate_number() -> str:
+        return f"TM-{uuid.uuid4().hex[:10].upper()}"
     
     def save(self, *args, **kwargs):
         if not self.certificate_number:
-            self.certificate_number = f"TM-{uuid.uuid4().hex[:10].upper()}"
+            self.certificate_number = self.generate_number()
         super().save(*args, **kwargs)
+
+
+class ContentUpload(models.Model):
+    """A chunked upload in progress; the chunks themselves live on disk (see ``uploads``)."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tutorial = models.ForeignKey(Tutorial, on_delete=models.CASCADE, related_name='uploads')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='content_uploads')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    content = models.OneToOneField(
+        TutorialContent, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def expected_chunk_size(self, index) -> int:
+        if index == self.chunk_count - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
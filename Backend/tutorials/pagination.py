@@ -0,0 +1,140 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from techmate.instrumentation import absolute_uri
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on a (timestamp, id) pair, newest first.
+
+    Each page is selected with an index-friendly ``WHERE`` on the key of the last
+    row seen rather than an ``OFFSET``, so deep pages cost the same as the first.
+    Views pick the key with ``keyset_fields``; the default suits models with a
+    ``created_at`` column.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+    default_keyset_fields = ('created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching the page with the async ORM."""
+        return self.set_page([row async for row in self.page_queryset(queryset, request, view)])
+
+    def page_queryset(self, queryset, request, view=None):
+        """Order and bound ``queryset`` to one row past the requested page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.time_field, self.id_field = getattr(view, 'keyset_fields', self.default_keyset_fields)
+        cursor = self.decode_cursor(request)
+        self.cursor = cursor
+        self.reverse = bool(cursor and cursor['r'])
+
+        if self.reverse:
+            queryset = queryset.order_by(self.time_field, self.id_field)
+        else:
+            queryset = queryset.order_by(f'-{self.time_field}', f'-{self.id_field}')
+        if cursor:
+            queryset = queryset.filter(self.position_filter(cursor['t'], cursor['i']))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        cursor = self.cursor
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = bool(rows), has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def position_filter(self, timestamp, pk):
+        # The range on the timestamp alone lets the (timestamp, id) index bound the scan
+        if self.reverse:
+            bound = Q(**{f'{self.time_field}__gte': timestamp})
+            after = Q(**{f'{self.time_field}__gt': timestamp}) | Q(**{f'{self.id_field}__gt': pk})
+        else:
+            bound = Q(**{f'{self.time_field}__lte': timestamp})
+            after = Q(**{f'{self.time_field}__lt': timestamp}) | Q(**{f'{self.id_field}__lt': pk})
+        return bound & after
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = int(requested)
+            except ValueError:
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            timestamp = parse_datetime(cursor['t'])
+            pk = int(cursor['i'])
+            reverse = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return {'t': timestamp, 'i': pk, 'r': reverse}
+
+    def encode_cursor(self, row, reverse):
+        payload = {
+            't': getattr(row, self.time_field).isoformat(),
+            'i': getattr(row, self.id_field),
+            'r': int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii'))
+        url = absolute_uri(self.request)
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii').rstrip('='))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(absolute_uri(self.request), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
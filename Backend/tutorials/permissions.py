@@ -1,16 +1,17 @@
 from rest_framework import permissions
+
+from accounts.tokens import request_claims
+
+
 class IsInstructorOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
         if not request.user.is_authenticated:
             return False
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.role in ['instructor', 'admin']
-        if hasattr(request.user, 'profile') and request.user.profile.role == 'instructor':
-            return bool(request.user.profile.is_approved_instructor)
-        return False
-        
+        # Role comes from the access token claims, without loading the profile
+        role, _ = request_claims(request)
+        return role in ['instructor', 'admin']
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -19,12 +20,11 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         if not request.user.is_authenticated:
             return False
-        if hasattr(request.user, 'profile') and request.user.profile.role == 'admin':
+        role, _ = request_claims(request)
+        if role == 'admin':
             return True
-        if hasattr(obj, 'created_by'):
-            return obj.created_by == request.user
+        if hasattr(obj, 'created_by_id'):
+            return obj.created_by_id == request.user.pk
         if hasattr(obj, 'tutorial'):
-            return obj.tutorial.created_by == request.user
+            return obj.tutorial.created_by_id == request.user.pk
         return False
-    
-    
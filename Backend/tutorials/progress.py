@@ -0,0 +1,107 @@
+"""Set-based recalculation of ``UserTutorialProgress`` percentages.
+
+Adding or removing a content item changes the denominator for every learner of
+a tutorial at once. Instead of saving each progress row, the whole set is
+rewritten by one ``UPDATE`` whose new values come from correlated subqueries:
+the number of rows each progress holds in the ``completed_contents`` through
+table and the tutorial's stored ``contents_total``.
+
+Single learners marking lessons go through ``apply_progress_delta`` instead,
+which touches only the ids sent and moves the stored ``completed_count`` by the
+number of rows actually inserted or deleted.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import Exact, GreaterThan
+
+from . import dashboard
+from .models import Tutorial, TutorialContent, UserTutorialProgress
+
+
+def completed_count_subquery():
+    """Subquery counting the completed contents of the outer progress row."""
+    through = UserTutorialProgress.completed_contents.through
+    counts = (
+        through.objects
+        .filter(usertutorialprogress_id=OuterRef('pk'))
+        .order_by()
+        .values('usertutorialprogress_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def contents_total_subquery():
+    """Subquery reading the stored content counter of the outer progress row's tutorial."""
+    totals = Tutorial.objects.filter(pk=OuterRef('tutorial_id')).values('contents_total')
+    return Subquery(totals, output_field=IntegerField())
+
+
+def recalculate_progress(tutorial_ids=None):
+    """Recompute percentage and completion for every progress row of ``tutorial_ids``.
+
+    ``None`` recalculates all tutorials. Runs as a single statement whatever the
+    number of learners and returns the number of rows written.
+    """
+    queryset = UserTutorialProgress.objects.all()
+    if tutorial_ids is not None:
+        queryset = queryset.filter(tutorial_id__in=list(tutorial_ids))
+
+    done = completed_count_subquery()
+    total = contents_total_subquery()
+    percentage = Round(Cast(done, FloatField()) * Value(100.0) / Cast(total, FloatField()), 2)
+    # updated_at is left alone on purpose: it tracks the learner's own activity
+    updated = queryset.update(
+        completed_count=done,
+        percentage=Case(When(GreaterThan(total, 0), then=percentage), default=Value(0.0)),
+        completed=Case(
+            When(GreaterThan(total, 0) & Exact(done, total), then=Value(True)),
+            default=Value(False),
+        ),
+    )
+    # A queryset update sends no signals, and the rows may belong to any number of users
+    if updated:
+        dashboard.invalidate_all()
+    return updated
+
+
+def apply_progress_delta(progress, add=(), remove=()):
+    """Mark ``add`` complete and ``remove`` incomplete on ``progress``; return the refreshed row.
+
+    Ids already in the requested state, or belonging to another tutorial, are
+    ignored, so replaying a request is harmless. The work depends only on the
+    number of ids sent. The progress row is locked for the duration, so two
+    devices updating the same learner cannot lose each other's count.
+    """
+    through = UserTutorialProgress.completed_contents.through
+    add, remove = set(add) - set(remove), set(remove)
+    with transaction.atomic():
+        progress = UserTutorialProgress.objects.select_for_update().get(pk=progress.pk)
+        requested = add | remove
+        present = set(
+            through.objects
+            .filter(usertutorialprogress_id=progress.pk, tutorialcontent_id__in=requested)
+            .values_list('tutorialcontent_id', flat=True)
+        )
+        to_add = set(
+            TutorialContent.objects
+            .filter(tutorial_id=progress.tutorial_id, pk__in=add - present)
+            .values_list('pk', flat=True)
+        )
+        to_remove = remove & present
+        if to_add:
+            through.objects.bulk_create(
+                [through(usertutorialprogress_id=progress.pk, tutorialcontent_id=pk) for pk in to_add],
+                ignore_conflicts=True,
+            )
+        if to_remove:
+            through.objects.filter(
+                usertutorialprogress_id=progress.pk, tutorialcontent_id__in=to_remove,
+            ).delete()
+        if to_add or to_remove:
+            total = Tutorial.objects.values_list('contents_total', flat=True).get(pk=progress.tutorial_id)
+            progress.apply_counts(max(progress.completed_count + len(to_add) - len(to_remove), 0), total)
+            progress.save(update_fields=['completed_count', 'percentage', 'completed', 'updated_at'])
+    return progress
@@ -0,0 +1,125 @@
+"""Versioned cache of anonymous tutorial list and detail responses.
+
+Entries are keyed by a version counter plus a hash of the absolute request
+URL. Detail pages use the version of their tutorial, and list pages use the
+catalog version. Saving or deleting a tutorial or one of its contents bumps
+both versions, so old entries simply stop being looked up and expire on
+their own. Nothing has to scan for keys, which is what makes this work
+unchanged with the local-memory, file-based and Redis cache backends.
+
+Only anonymous requests are served from here. Bodies for signed-in callers
+carry their own ``user_progress`` and are always built fresh.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from techmate.instrumentation import absolute_uri
+from techmate.metrics import count_cache_lookup
+
+CATALOG_KEY = 'tutorials:responses:catalog'
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def _tutorial_key(tutorial_id):
+    return f'tutorials:responses:tutorial:{tutorial_id}'
+
+
+def _version(key):
+    # Seeded from the clock so an evicted counter never restarts at a value already used
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+async def _aversion(key):
+    return await cache.aget_or_set(key, time.time_ns, None)
+
+
+def _url_hash(request):
+    return hashlib.sha256(absolute_uri(request).encode('utf-8')).hexdigest()
+
+
+def list_key(request):
+    return f'tutorials:responses:list:{_version(CATALOG_KEY)}:{_url_hash(request)}'
+
+
+async def alist_key(request):
+    return f'tutorials:responses:list:{await _aversion(CATALOG_KEY)}:{_url_hash(request)}'
+
+
+def detail_key(request, tutorial_id):
+    return f'tutorials:responses:detail:{tutorial_id}:{_version(_tutorial_key(tutorial_id))}:{_url_hash(request)}'
+
+
+async def adetail_key(request, tutorial_id):
+    version = await _aversion(_tutorial_key(tutorial_id))
+    return f'tutorials:responses:detail:{tutorial_id}:{version}:{_url_hash(request)}'
+
+
+def _count(data):
+    result = 'hits' if data is not None else 'misses'
+    with _counts_lock:
+        _counts[result] += 1
+    count_cache_lookup('response', result)
+    return data
+
+
+def lookup(key):
+    return _count(cache.get(key))
+
+
+async def alookup(key):
+    return _count(await cache.aget(key))
+
+
+def store(key, data):
+    cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+async def astore(key, data):
+    await cache.aset(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def validators(key, compute):
+    """HTTP validators stored beside the body at ``key``, computed on a miss."""
+    return cache.get_or_set(f'{key}:validators', compute, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+async def avalidators(key, acompute):
+    """``validators`` for async views; ``acompute`` is a coroutine function."""
+    data = await cache.aget(f'{key}:validators')
+    if data is None:
+        data = await acompute()
+        await cache.aset(f'{key}:validators', data, settings.RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+def stats():
+    """Hits and misses served by this process since it started."""
+    with _counts_lock:
+        return {'hits': _counts['hits'], 'misses': _counts['misses']}
+
+
+def invalidate_tutorial(tutorial_id):
+    """Stop serving cached bodies of ``tutorial_id`` and of every list page."""
+    def bump():
+        _bump(_tutorial_key(tutorial_id))
+        _bump(CATALOG_KEY)
+
+    bump()
+    # Bump again once committed: a reader that saw the old rows while this
+    # transaction was open may have stored them under the new version
+    transaction.on_commit(bump)
@@ -0,0 +1,286 @@
+"""Full-text search over tutorials and their contents.
+
+Every tutorial and every content item is one document in the
+``tutorials_search_index`` table, which is an FTS5 virtual table on SQLite and
+a table with a weighted ``tsvector`` column and a GIN index on PostgreSQL (see
+migration 0004). Document ids are derived from the row they index so single
+documents can be replaced or dropped by primary key as rows change.
+"""
+import html
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from django.db import connection
+
+INDEX_TABLE = 'tutorials_search_index'
+
+# Control characters wrap highlighted terms inside the database so the
+# surrounding text can be HTML-escaped before the <mark> tags are added.
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+_MAX_TERMS = 8
+
+
+@dataclass
+class SearchHit:
+    tutorial_id: int
+    content_id: Optional[int]
+    score: float
+    title: str
+    snippet: str
+
+
+def tutorial_doc_id(tutorial_id: int) -> int:
+    return tutorial_id * 2
+
+
+def content_doc_id(content_id: int) -> int:
+    return content_id * 2 + 1
+
+
+def query_terms(query: str) -> List[str]:
+    """Split free-form user input into plain word tokens safe for any backend."""
+    return _TOKEN_RE.findall(query.lower())[:_MAX_TERMS]
+
+
+def render_highlight(text: str) -> str:
+    escaped = html.escape(text or '')
+    return escaped.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+
+
+def _content_body(content) -> str:
+    return ' '.join(part for part in (content.description, content.text) if part)
+
+
+class SQLiteSearchBackend:
+    """FTS5 backend, ranked with bm25 and highlighted with ``snippet()``."""
+
+    # bm25 column weights: title matches count more than body matches
+    RANK = f"bm25({INDEX_TABLE}, 10.0, 1.0)"
+
+    def match_expression(self, terms: List[str]) -> str:
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def upsert(self, cursor, doc_id, tutorial_id, content_id, title, body):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [doc_id])
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (rowid, title, body, tutorial_id, content_id) VALUES (%s, %s, %s, %s, %s)",
+            [doc_id, title, body, tutorial_id, content_id],
+        )
+
+    def delete(self, cursor, doc_id):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [doc_id])
+
+    def rebuild(self, cursor):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (rowid, title, body, tutorial_id, content_id) "
+            "SELECT id * 2, title, description, id, NULL FROM tutorials_tutorial"
+        )
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (rowid, title, body, tutorial_id, content_id) "
+            "SELECT id * 2 + 1, title, TRIM(description || ' ' || text), tutorial_id, id "
+            "FROM tutorials_tutorialcontent"
+        )
+
+    def matching_sql(self, terms: List[str]) -> Tuple[str, list]:
+        return (
+            f"SELECT tutorial_id FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s",
+            [self.match_expression(terms)],
+        )
+
+    def search(self, cursor, terms, limit, offset):
+        match = self.match_expression(terms)
+        cursor.execute(
+            f"SELECT COUNT(DISTINCT tutorial_id) FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s",
+            [match],
+        )
+        total = cursor.fetchone()[0]
+        # Auxiliary functions cannot run inside an aggregate, so the ranked matches are
+        # materialized first. SQLite takes the bare columns of a MIN() aggregate from
+        # the row holding the minimum: the best-ranked document of every tutorial.
+        cursor.execute(
+            f"""
+            WITH matches AS MATERIALIZED (
+                SELECT rowid AS doc_id, tutorial_id, content_id, {self.RANK} AS score
+                FROM {INDEX_TABLE}
+                WHERE {INDEX_TABLE} MATCH %s
+            )
+            SELECT doc_id, tutorial_id, content_id, MIN(score) AS best
+            FROM matches
+            GROUP BY tutorial_id
+            ORDER BY best, tutorial_id
+            LIMIT %s OFFSET %s
+            """,
+            [match, limit, offset],
+        )
+        page = cursor.fetchall()
+        if not page:
+            return total, []
+
+        # Highlighting is the expensive part, so only the documents on this page get it
+        doc_ids = [row[0] for row in page]
+        placeholders = ', '.join(['%s'] * len(doc_ids))
+        cursor.execute(
+            f"""
+            SELECT rowid, highlight({INDEX_TABLE}, 0, %s, %s), snippet({INDEX_TABLE}, 1, %s, %s, '…', 24)
+            FROM {INDEX_TABLE}
+            WHERE {INDEX_TABLE} MATCH %s AND rowid IN ({placeholders})
+            """,
+            [_HIGHLIGHT_START, _HIGHLIGHT_END, _HIGHLIGHT_START, _HIGHLIGHT_END, match, *doc_ids],
+        )
+        highlights = {doc_id: (title, body) for doc_id, title, body in cursor.fetchall()}
+
+        # bm25 is lower-is-better; flip the sign so callers always sort descending
+        hits = []
+        for doc_id, tutorial_id, content_id, best in page:
+            title, body = highlights.get(doc_id, ('', ''))
+            hits.append(SearchHit(
+                int(tutorial_id), int(content_id) if content_id is not None else None, -best, title, body,
+            ))
+        return total, hits
+
+
+class PostgresSearchBackend:
+    """``tsvector`` backend, ranked with ``ts_rank_cd`` and highlighted with ``ts_headline``."""
+
+    CONFIG = 'english'
+
+    def tsquery(self, terms: List[str]) -> str:
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def upsert(self, cursor, doc_id, tutorial_id, content_id, title, body):
+        cursor.execute(
+            f"""
+            INSERT INTO {INDEX_TABLE} (doc_id, tutorial_id, content_id, title, body)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (doc_id) DO UPDATE
+            SET tutorial_id = EXCLUDED.tutorial_id, content_id = EXCLUDED.content_id,
+                title = EXCLUDED.title, body = EXCLUDED.body
+            """,
+            [doc_id, tutorial_id, content_id, title, body],
+        )
+
+    def delete(self, cursor, doc_id):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE doc_id = %s", [doc_id])
+
+    def rebuild(self, cursor):
+        cursor.execute(f"TRUNCATE {INDEX_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (doc_id, tutorial_id, content_id, title, body) "
+            "SELECT id * 2, id, NULL, title, description FROM tutorials_tutorial"
+        )
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (doc_id, tutorial_id, content_id, title, body) "
+            "SELECT id * 2 + 1, tutorial_id, id, title, TRIM(description || ' ' || text) "
+            "FROM tutorials_tutorialcontent"
+        )
+
+    def matching_sql(self, terms: List[str]) -> Tuple[str, list]:
+        return (
+            f"SELECT tutorial_id FROM {INDEX_TABLE} WHERE document @@ to_tsquery('{self.CONFIG}', %s)",
+            [self.tsquery(terms)],
+        )
+
+    def search(self, cursor, terms, limit, offset):
+        options = f'StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_END}'
+        cursor.execute(
+            f"""
+            WITH q AS (SELECT to_tsquery('{self.CONFIG}', %s) AS query),
+            best AS (
+                SELECT DISTINCT ON (tutorial_id)
+                       tutorial_id, content_id, title, body, ts_rank_cd(document, q.query) AS score
+                FROM {INDEX_TABLE}, q
+                WHERE document @@ q.query
+                ORDER BY tutorial_id, score DESC
+            ),
+            page AS (
+                SELECT *, COUNT(*) OVER () AS total FROM best
+                ORDER BY score DESC, tutorial_id
+                LIMIT %s OFFSET %s
+            )
+            SELECT tutorial_id, content_id,
+                   ts_headline('{self.CONFIG}', title, q.query, %s),
+                   ts_headline('{self.CONFIG}', body, q.query, %s),
+                   score, total
+            FROM page, q
+            ORDER BY score DESC, tutorial_id
+            """,
+            [self.tsquery(terms), limit, offset, options + ', HighlightAll=true',
+             options + ', MaxWords=24, MinWords=8'],
+        )
+        rows = cursor.fetchall()
+        total = rows[0][5] if rows else self._count(cursor, terms)
+        hits = [
+            SearchHit(tutorial_id, content_id, float(score), title, body)
+            for tutorial_id, content_id, title, body, score, _ in rows
+        ]
+        return total, hits
+
+    def _count(self, cursor, terms):
+        # Only reached for pages past the end, where the window count is unavailable
+        sql, params = self.matching_sql(terms)
+        cursor.execute(f"SELECT COUNT(DISTINCT tutorial_id) FROM ({sql}) matches", params)
+        return cursor.fetchone()[0]
+
+
+_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """Return the backend for the default database, or None where search is unsupported."""
+    backend_class = _BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+def _write(method, *args):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        getattr(backend, method)(cursor, *args)
+
+
+def index_tutorial(tutorial):
+    _write('upsert', tutorial_doc_id(tutorial.pk), tutorial.pk, None, tutorial.title, tutorial.description)
+
+
+def index_content(content):
+    _write('upsert', content_doc_id(content.pk), content.tutorial_id, content.pk, content.title, _content_body(content))
+
+
+def remove_tutorial(tutorial_id):
+    _write('delete', tutorial_doc_id(tutorial_id))
+
+
+def remove_content(content_id):
+    _write('delete', content_doc_id(content_id))
+
+
+def rebuild_index():
+    _write('rebuild')
+
+
+def matching_tutorial_ids_sql(query: str) -> Optional[Tuple[str, list]]:
+    """SQL selecting the ids of tutorials that match ``query``, for use with ``pk__in=RawSQL(...)``.
+
+    Returns None when the query holds no searchable terms.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    return get_backend().matching_sql(terms)
+
+
+def search_tutorials(query: str, limit: int, offset: int = 0) -> Tuple[int, List[SearchHit]]:
+    """Rank tutorials by their best-matching document and return one page of hits."""
+    terms = query_terms(query)
+    if not terms:
+        return 0, []
+    with connection.cursor() as cursor:
+        return get_backend().search(cursor, terms, limit, offset)
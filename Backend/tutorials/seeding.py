@@ -0,0 +1,183 @@
+"""Realistic, repeatable data for benchmarks and local development.
+
+``seed(scale)`` bulk-inserts instructors and learners with profiles,
+tutorials with text and video lessons, learner progress with completed
+lessons, and certificates for finished tutorials. The same ``random_seed``
+always produces the same data. Bulk inserts skip the model signals, so the
+stored counters are written directly. Percentages and the search index are
+then rebuilt the way ``recalculate_progress`` and ``rebuild_search_index`` do.
+
+Rows are inserted ``batch_size`` at a time. The ``completed_contents`` links,
+by far the largest table, skip the ORM: they are generated as plain id pairs
+while they are inserted with ``executemany``, which is several times faster
+than building a model instance per row and keeps memory flat however many
+links a scale asks for.
+"""
+import random
+from itertools import islice
+from dataclasses import dataclass
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from accounts.models import Profile
+from . import search
+from .models import Certificate, Tutorial, TutorialContent, UserTutorialProgress
+from .progress import recalculate_progress
+
+# Every seeded account signs in with this password
+PASSWORD = 'techmate-seed-1'
+
+_TOPICS = (
+    'Python', 'Django', 'PostgreSQL', 'React', 'TypeScript', 'Docker', 'Kubernetes', 'Git', 'Linux',
+    'Rust', 'Go', 'GraphQL', 'Redis', 'Testing', 'Security', 'Accessibility', 'CSS', 'Data Science',
+)
+_LEVELS = ('Introduction to', 'Practical', 'Advanced', 'Mastering', 'A Tour of', 'Production')
+_FIRST_NAMES = ('Ada', 'Grace', 'Alan', 'Linus', 'Barbara', 'Ken', 'Margaret', 'Dennis', 'Frances', 'Guido')
+_LAST_NAMES = ('Lovelace', 'Hopper', 'Turing', 'Torvalds', 'Liskov', 'Thompson', 'Hamilton', 'Ritchie', 'Allen')
+
+
+@dataclass(frozen=True)
+class Scale:
+    instructors: int = 10
+    students: int = 200
+    tutorials: int = 60
+    lessons_per_tutorial: int = 8
+    enrolments_per_student: int = 6
+    # Share of enrolments that are finished and hold a certificate
+    completion_rate: float = 0.25
+
+
+SCALES = {
+    'small': Scale(instructors=2, students=20, tutorials=8, lessons_per_tutorial=4, enrolments_per_student=3),
+    'default': Scale(),
+    # About 150,000 enrolments and a million completed-lesson links
+    'large': Scale(instructors=50, students=15000, tutorials=500, lessons_per_tutorial=12, enrolments_per_student=10),
+}
+
+BATCH_SIZE = 5000
+
+
+@dataclass
+class Seed:
+    """One seeded account of each role, plus records that belong to them."""
+    admin: User
+    instructor: User
+    student: User
+    tutorial: Tutorial  # created by ``instructor``; ``student`` has progress in it
+    certificate: Certificate  # held by ``student``
+
+
+def _insert_links(pairs, batch_size):
+    """Insert ``(progress_id, content_id)`` pairs into the completed-contents table a batch at a time."""
+    through = UserTutorialProgress.completed_contents.through
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+        quote(through._meta.db_table),
+        quote(through._meta.get_field('usertutorialprogress').column),
+        quote(through._meta.get_field('tutorialcontent').column),
+    )
+    pairs = iter(pairs)
+    with connection.cursor() as cursor:
+        while batch := list(islice(pairs, batch_size)):
+            cursor.executemany(sql, batch)
+
+
+def _make_users(prefix, count, password, rng, batch_size):
+    return User.objects.bulk_create([
+        User(
+            username=f'{prefix}{index}', email=f'{prefix}{index}@example.com', password=password,
+            first_name=rng.choice(_FIRST_NAMES), last_name=rng.choice(_LAST_NAMES),
+        )
+        for index in range(count)
+    ], batch_size=batch_size)
+
+
+@transaction.atomic
+def seed(scale=None, random_seed=0, batch_size=BATCH_SIZE):
+    """Insert a data set of ``scale`` (default ``Scale()``) and return handles into it."""
+    scale = scale or Scale()
+    rng = random.Random(random_seed)
+    # Hashed once: hashing per user would dominate seeding time
+    password = make_password(PASSWORD)
+
+    admin = User.objects.create(
+        username='admin', email='admin@example.com', password=password, is_staff=True, is_superuser=True,
+    )
+    instructors = _make_users('instructor', scale.instructors, password, rng, batch_size)
+    students = _make_users('student', scale.students, password, rng, batch_size)
+    Profile.objects.bulk_create(
+        [Profile(user=admin, name='Site Admin', role='admin')]
+        + [
+            Profile(user=user, name=user.get_full_name(), role='instructor', is_approved_instructor=True)
+            for user in instructors
+        ]
+        + [Profile(user=user, name=user.get_full_name(), role='student', age=rng.randint(16, 60)) for user in students],
+        batch_size=batch_size,
+    )
+
+    lessons = []
+    tutorials = []
+    for index in range(scale.tutorials):
+        durations = [
+            rng.randint(180, 1800) if rng.random() < 0.5 else None for _ in range(scale.lessons_per_tutorial)
+        ]
+        tutorial = Tutorial(
+            title=f'{rng.choice(_LEVELS)} {rng.choice(_TOPICS)} {index + 1}',
+            description=f'A hands-on course on {rng.choice(_TOPICS)} with exercises and worked examples.',
+            created_by=instructors[index % len(instructors)],
+            is_featured=rng.random() < 0.1,
+            contents_total=scale.lessons_per_tutorial,
+            total_duration=sum(duration for duration in durations if duration),
+        )
+        tutorials.append(tutorial)
+        lessons.append(durations)
+    Tutorial.objects.bulk_create(tutorials, batch_size=batch_size)
+
+    contents = TutorialContent.objects.bulk_create([
+        TutorialContent(
+            tutorial=tutorial, order=order, title=f'{tutorial.title}: lesson {order + 1}',
+            content_type='video' if duration else 'text', duration=duration,
+            text='' if duration else f'Notes for lesson {order + 1} of {tutorial.title}.',
+        )
+        for tutorial, durations in zip(tutorials, lessons)
+        for order, duration in enumerate(durations)
+    ], batch_size=batch_size)
+    contents_by_tutorial = {}
+    for content in contents:
+        contents_by_tutorial.setdefault(content.tutorial_id, []).append(content)
+
+    enrolments = []
+    for student in students:
+        for tutorial in rng.sample(tutorials, min(scale.enrolments_per_student, len(tutorials))):
+            enrolments.append(UserTutorialProgress(user=student, tutorial=tutorial))
+    UserTutorialProgress.objects.bulk_create(enrolments, batch_size=batch_size)
+
+    certificates = []
+
+    def completed_links():
+        for progress in enrolments:
+            lessons_of_tutorial = contents_by_tutorial[progress.tutorial_id]
+            if rng.random() < scale.completion_rate:
+                done = lessons_of_tutorial
+                certificates.append(Certificate(
+                    user_id=progress.user_id, tutorial_id=progress.tutorial_id,
+                    certificate_number=f'TM-{rng.getrandbits(40):010X}',
+                ))
+            else:
+                done = lessons_of_tutorial[:rng.randrange(len(lessons_of_tutorial))]
+            for content in done:
+                yield progress.pk, content.pk
+
+    _insert_links(completed_links(), batch_size)
+    Certificate.objects.bulk_create(certificates, batch_size=batch_size)
+
+    recalculate_progress()
+    search.rebuild_index()
+
+    student, instructor = students[0], instructors[0]
+    tutorial = Tutorial.objects.filter(created_by=instructor).order_by('pk').first()
+    UserTutorialProgress.objects.get_or_create(user=student, tutorial=tutorial)
+    certificate, _ = Certificate.objects.get_or_create(user=student, tutorial=tutorial)
+    return Seed(admin=admin, instructor=instructor, student=student, tutorial=tutorial, certificate=certificate)
@@ -1,87 +1,155 @@
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import models
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Tutorial, TutorialContent, UserTutorialProgress
+from techmate.instrumentation import SerializationTimingMixin, absolute_uri
+from . import thumbnails, uploads
+from .models import ContentUpload, Tutorial, TutorialContent, UserTutorialProgress
 
 
-class TutorialContentSerializer(serializers.ModelSerializer):
+def _progress_rows(user, tutorials):
+    if not user or not user.is_authenticated:
+        return None
+    tutorial_ids = [tutorial.id for tutorial in tutorials]
+    if not tutorial_ids:
+        return None
+    return (
+        UserTutorialProgress.objects
+        .filter(user=user, tutorial_id__in=tutorial_ids)
+        .values('tutorial_id', 'percentage', 'completed', 'completed_count')
+    )
+
+
+def _progress_map(rows):
+    return {
+        row['tutorial_id']: {
+            'percentage': float(row['percentage']),
+            'completed': row['completed'],
+            'completed_count': row['completed_count'],
+        }
+        for row in rows
+    }
+
+
+def build_progress_map(user, tutorials):
+    """Load the caller's progress for a page of tutorials in one query.
+
+    Returns a dict keyed by tutorial id, in the shape served as ``user_progress``.
+    """
+    rows = _progress_rows(user, tutorials)
+    return _progress_map(rows) if rows is not None else {}
+
+
+async def abuild_progress_map(user, tutorials):
+    rows = _progress_rows(user, tutorials)
+    return _progress_map([row async for row in rows]) if rows is not None else {}
+
+
+class TutorialContentSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
     
     class Meta:
         model = TutorialContent
-        fields = ['id', 'order', 'title', 'description', 'content_type', 'file', 'file_url', 'text', 'duration', 'created_at']
+        fields = ['id', 'order', 'title', 'description', 'content_type', 'file', 'file_url', 'text', 'duration',
+                  'file_size', 'bitrate', 'created_at']
         extra_kwargs = {'file': {'write_only': True}}
 
     def get_file_url(self, obj):
         if obj.file:
+            # Served by ContentMediaView, which supports seeking in production
+            url = reverse('content_media', args=[obj.pk])
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.file.url)
-            return obj.file.url
+                return absolute_uri(request, url)
+            return url
         return None
 
 
-class TutorialListSerializer(serializers.ModelSerializer):
+class ThumbnailFieldsMixin(serializers.Serializer):
+    """``thumbnail_url`` plus a ``thumbnails`` map of resized variants keyed by width and format."""
+    thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+
+    def get_thumbnail_url(self, obj):
+        if not obj.thumbnail:
+            return None
+        if obj.thumbnail_hash:
+            return self.get_thumbnails(obj)[str(thumbnails.DEFAULT_WIDTH)]['jpeg']
+        request = self.context.get('request')
+        if request:
+            return absolute_uri(request, obj.thumbnail.url)
+        return obj.thumbnail.url
+
+    def get_thumbnails(self, obj):
+        if not obj.thumbnail or not obj.thumbnail_hash:
+            return None
+        return thumbnails.thumbnail_urls(obj.thumbnail_hash, self.context.get('request'))
+
+
+class TutorialListListSerializer(serializers.ListSerializer):
+    """Loads the caller's progress for the whole list at once unless the view already put it in the context."""
+
+    def to_representation(self, data):
+        tutorials = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if self.context.get('progress_map') is None:
+            request = self.context.get('request')
+            self.context['progress_map'] = build_progress_map(request and request.user, tutorials)
+        return super().to_representation(tutorials)
+
+
+class TutorialListSerializer(SerializationTimingMixin, ThumbnailFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
-    content_count = serializers.IntegerField(read_only=True)
+    content_count = serializers.IntegerField(source='contents_total', read_only=True)
     user_progress = serializers.SerializerMethodField()
-    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Tutorial
         fields = ['id', 'title', 'description', 'created_by', 'created_by_name', 'is_featured', 
-                  'thumbnail', 'thumbnail_url', 'content_count', 'user_progress', 'created_at']
+                  'thumbnail', 'thumbnail_url', 'thumbnails', 'content_count', 'total_duration', 'user_progress',
+                  'created_at']
         extra_kwargs = {'thumbnail': {'write_only': True}}
+        list_serializer_class = TutorialListListSerializer
 
     def get_user_progress(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            progress = UserTutorialProgress.objects.filter(user=request.user, tutorial=obj).first()
-            if progress:
-                return {
-                    'percentage': float(progress.percentage),
-                    'completed': progress.completed,
-                    'completed_count': progress.completed_contents.count()
-                }
-        return None
-
-    def get_thumbnail_url(self, obj):
-        if obj.thumbnail:
+        progress_map = self.context.get('progress_map')
+        if progress_map is None:
+            # A single tutorial serialized on its own; lists always carry the map
             request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.thumbnail.url)
-            return obj.thumbnail.url
-        return None
+            progress_map = build_progress_map(request and request.user, [obj])
+        return progress_map.get(obj.id)
 
 
-class TutorialDetailSerializer(serializers.ModelSerializer):
+class TutorialDetailSerializer(SerializationTimingMixin, ThumbnailFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     contents = TutorialContentSerializer(many=True, read_only=True)
     user_progress = serializers.SerializerMethodField()
-    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Tutorial
         fields = ['id', 'title', 'description', 'created_by', 'created_by_name', 'is_featured',
-                  'thumbnail', 'thumbnail_url', 'contents', 'user_progress', 'created_at', 'updated_at']
+                  'thumbnail', 'thumbnail_url', 'thumbnails', 'contents', 'total_duration', 'user_progress',
+                  'created_at', 'updated_at']
         extra_kwargs = {'thumbnail': {'write_only': True}}
 
     def get_user_progress(self, obj):
+        """The caller's progress, or zero progress when they have not started; never creates a row."""
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            progress, created = UserTutorialProgress.objects.get_or_create(user=request.user, tutorial=obj)
-            return {
-                'percentage': float(progress.percentage),
-                'completed': progress.completed,
-                'completed_content_ids': list(progress.completed_contents.values_list('id', flat=True))
-            }
-        return None
-
-    def get_thumbnail_url(self, obj):
-        if obj.thumbnail:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.thumbnail.url)
-            return obj.thumbnail.url
-        return None
+        if not request or not request.user.is_authenticated:
+            return None
+        if hasattr(obj, 'user_percentage'):
+            # Annotated by TutorialDetailView, with completion flags on the prefetched contents
+            percentage, completed = obj.user_percentage, obj.user_completed
+            completed_ids = [content.id for content in obj.contents.all() if content.user_completed]
+        else:
+            progress = UserTutorialProgress.objects.filter(user=request.user, tutorial=obj).first()
+            percentage, completed = (progress.percentage, progress.completed) if progress else (None, None)
+            completed_ids = list(progress.completed_contents.values_list('id', flat=True)) if progress else []
+        return {
+            'percentage': float(percentage or 0),
+            'completed': bool(completed),
+            'completed_content_ids': completed_ids,
+        }
 
 
 class TutorialCreateSerializer(serializers.ModelSerializer):
@@ -108,7 +176,55 @@ class TutorialContentCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class UserProgressSerializer(serializers.ModelSerializer):
+class ChunkedContentSerializer(TutorialContentCreateSerializer):
+    """Content fields sent when finalizing a chunked upload; the file comes from the chunks."""
+    class Meta(TutorialContentCreateSerializer.Meta):
+        fields = ['id', 'order', 'title', 'description', 'content_type', 'duration']
+
+    def validate(self, data):
+        if data.get('content_type') not in ['video', 'audio']:
+            raise serializers.ValidationError({'content_type': 'Chunked uploads are for video or audio content.'})
+        return data
+
+
+class ContentUploadSerializer(SerializationTimingMixin, serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(
+        required=False, min_value=256 * 1024, max_value=settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE,
+    )
+    total_size = serializers.IntegerField(min_value=1, max_value=settings.CHUNKED_UPLOAD_MAX_SIZE)
+
+    class Meta:
+        model = ContentUpload
+        fields = ['id', 'filename', 'total_size', 'chunk_size', 'status', 'content', 'created_at']
+        read_only_fields = ['status', 'content', 'created_at']
+
+    def validate_filename(self, value):
+        # Caught here rather than when the assembled file is named, after every chunk has arrived
+        if '/' in value or '\\' in value or '..' in value:
+            raise serializers.ValidationError('File name must not contain path separators or "..".')
+        storage = TutorialContent._meta.get_field('file').storage
+        try:
+            valid = storage.get_valid_name(value)
+        except SuspiciousFileOperation:
+            valid = ''
+        if not valid:
+            raise serializers.ValidationError('File name has no usable characters.')
+        return value
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        received = uploads.received_chunks(instance) if instance.status == 'pending' else []
+        data['chunk_count'] = instance.chunk_count
+        data['received_chunks'] = received
+        if instance.status == 'pending':
+            done = set(received)
+            data['missing_chunks'] = [index for index in range(instance.chunk_count) if index not in done]
+        else:
+            data['missing_chunks'] = []
+        return data
+
+
+class UserProgressSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     completed_content_ids = serializers.ListField(child=serializers.IntegerField(), write_only=True, required=False)
     
     class Meta:
@@ -118,9 +234,12 @@ class UserProgressSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['completed_content_ids'] = list(instance.completed_contents.values_list('id', flat=True))
-        data['total_contents'] = instance.tutorial.contents.count()
-        data['completed_count'] = instance.completed_contents.count()
+        # Unsaved instances stand in for learners who have not started the tutorial
+        data['completed_content_ids'] = (
+            list(instance.completed_contents.values_list('id', flat=True)) if instance.pk else []
+        )
+        data['total_contents'] = instance.tutorial.contents_total
+        data['completed_count'] = instance.completed_count
         return data
 
     def update(self, instance, validated_data):
@@ -129,3 +248,14 @@ class UserProgressSerializer(serializers.ModelSerializer):
         instance.completed_contents.set(valid_contents)
         instance.calculate_progress()
         return instance
+
+
+class ProgressDeltaSerializer(serializers.Serializer):
+    """Content ids to mark complete (``add``) or incomplete (``remove``) in one request."""
+    add = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=100)
+    remove = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=100)
+
+    def validate(self, data):
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError('Provide content ids to add or remove.')
+        return data
@@ -0,0 +1,212 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import certificate_cache, dashboard, metadata, response_cache, search, thumbnails
+from .models import Certificate, Tutorial, TutorialContent, UserTutorialProgress
+
+_NAME_FIELDS = ('first_name', 'last_name', 'username')
+
+
+def _adjust_contents_total(tutorial_id, delta):
+    Tutorial.objects.filter(pk=tutorial_id).update(
+        contents_total=F('contents_total') + delta, updated_at=timezone.now(),
+    )
+
+
+@receiver(pre_save, sender=TutorialContent)
+def remember_previous_content_state(sender, instance, raw=False, **kwargs):
+    """Record the tutorial, duration and file a content row had before this save."""
+    instance._previous_tutorial_id = None
+    instance._previous_media = None
+    if raw or instance.pk is None:
+        return
+    previous = TutorialContent.objects.filter(pk=instance.pk).values_list('tutorial_id', 'duration', 'file').first()
+    if previous:
+        instance._previous_tutorial_id = previous[0]
+        instance._previous_media = previous[1:]
+
+
+@receiver(post_save, sender=TutorialContent)
+def count_saved_content(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_tutorial_id = getattr(instance, '_previous_tutorial_id', None)
+    if created:
+        _adjust_contents_total(instance.tutorial_id, 1)
+    elif previous_tutorial_id is not None and previous_tutorial_id != instance.tutorial_id:
+        with transaction.atomic():
+            _adjust_contents_total(previous_tutorial_id, -1)
+            _adjust_contents_total(instance.tutorial_id, 1)
+
+
+@receiver(post_delete, sender=TutorialContent)
+def count_deleted_content(sender, instance, **kwargs):
+    _adjust_contents_total(instance.tutorial_id, -1)
+
+
+@receiver(post_save, sender=TutorialContent)
+def track_content_media(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_tutorial_id = getattr(instance, '_previous_tutorial_id', None)
+    previous_duration, previous_file = getattr(instance, '_previous_media', None) or (None, '')
+    if instance.file and (created or (previous_file or '') != instance.file.name):
+        metadata.schedule_probe(instance.pk)
+    moved = previous_tutorial_id is not None and previous_tutorial_id != instance.tutorial_id
+    if moved:
+        metadata.refresh_total_duration([previous_tutorial_id, instance.tutorial_id])
+    elif instance.duration != previous_duration:
+        metadata.refresh_total_duration([instance.tutorial_id])
+
+
+@receiver(post_delete, sender=TutorialContent)
+def drop_deleted_content_duration(sender, instance, **kwargs):
+    if instance.duration:
+        metadata.refresh_total_duration([instance.tutorial_id])
+
+
+@receiver(post_save, sender=Tutorial)
+@receiver(post_delete, sender=Tutorial)
+def drop_cached_tutorial_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        response_cache.invalidate_tutorial(instance.pk)
+
+
+@receiver(post_save, sender=TutorialContent)
+@receiver(post_delete, sender=TutorialContent)
+def drop_cached_content_responses(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    response_cache.invalidate_tutorial(instance.tutorial_id)
+    previous_tutorial_id = getattr(instance, '_previous_tutorial_id', None)
+    if previous_tutorial_id is not None and previous_tutorial_id != instance.tutorial_id:
+        response_cache.invalidate_tutorial(previous_tutorial_id)
+
+
+@receiver(post_save, sender=Tutorial)
+def index_saved_tutorial(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_tutorial(instance)
+
+
+@receiver(post_delete, sender=Tutorial)
+def unindex_deleted_tutorial(sender, instance, **kwargs):
+    search.remove_tutorial(instance.pk)
+
+
+@receiver(post_save, sender=TutorialContent)
+def index_saved_content(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_content(instance)
+
+
+@receiver(post_delete, sender=TutorialContent)
+def unindex_deleted_content(sender, instance, **kwargs):
+    search.remove_content(instance.pk)
+
+
+@receiver(pre_save, sender=Tutorial)
+def remember_previous_tutorial_state(sender, instance, raw=False, **kwargs):
+    instance._previous_title = None
+    instance._previous_thumbnail = None
+    if raw or instance.pk is None:
+        return
+    previous = Tutorial.objects.filter(pk=instance.pk).values_list('title', 'thumbnail', 'thumbnail_hash').first()
+    if previous:
+        instance._previous_title = previous[0]
+        instance._previous_thumbnail = previous[1:]
+
+
+@receiver(post_save, sender=Tutorial)
+def drop_retitled_certificates(sender, instance, raw=False, **kwargs):
+    previous_title = getattr(instance, '_previous_title', None)
+    if previous_title is not None and previous_title != instance.title:
+        certificate_cache.invalidate_tutorial(instance.pk)
+
+
+@receiver(post_save, sender=Tutorial)
+def refresh_dashboards_for_tutorial(sender, instance, created, raw=False, **kwargs):
+    # Dashboards show the tutorial count and the titles of recent tutorials
+    previous_title = getattr(instance, '_previous_title', None)
+    if created or (previous_title is not None and previous_title != instance.title):
+        dashboard.invalidate_all()
+
+
+@receiver(post_delete, sender=Tutorial)
+def refresh_dashboards_for_deleted_tutorial(sender, instance, **kwargs):
+    dashboard.invalidate_all()
+
+
+@receiver(post_save, sender=UserTutorialProgress)
+@receiver(post_delete, sender=UserTutorialProgress)
+def drop_user_dashboard(sender, instance, **kwargs):
+    dashboard.invalidate_user(instance.user_id)
+
+
+@receiver(post_delete, sender=Tutorial)
+def drop_deleted_tutorial_certificates(sender, instance, **kwargs):
+    certificate_cache.invalidate_tutorial(instance.pk)
+
+
+def _release_thumbnail_variants(thumbnail_hash):
+    if thumbnail_hash and not Tutorial.objects.filter(thumbnail_hash=thumbnail_hash).exists():
+        thumbnails.remove_variants(thumbnail_hash)
+
+
+def _build_thumbnail_variants(tutorial_id, previous_hash):
+    tutorial = Tutorial.objects.filter(pk=tutorial_id).only('thumbnail').first()
+    thumbnail_hash = ''
+    if tutorial is not None and tutorial.thumbnail:
+        thumbnail_hash = thumbnails.generate_variants(tutorial.thumbnail) or ''
+    # A queryset update stores the hash without re-running the save signals
+    Tutorial.objects.filter(pk=tutorial_id).update(thumbnail_hash=thumbnail_hash, updated_at=timezone.now())
+    response_cache.invalidate_tutorial(tutorial_id)
+    if previous_hash != thumbnail_hash:
+        _release_thumbnail_variants(previous_hash)
+
+
+@receiver(post_save, sender=Tutorial)
+def refresh_thumbnail_variants(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_name, previous_hash = getattr(instance, '_previous_thumbnail', None) or ('', '')
+    if (instance.thumbnail.name or '') == (previous_name or ''):
+        return
+    transaction.on_commit(lambda: _build_thumbnail_variants(instance.pk, previous_hash))
+
+
+@receiver(post_delete, sender=Tutorial)
+def drop_deleted_tutorial_thumbnails(sender, instance, **kwargs):
+    thumbnail_hash = instance.thumbnail_hash
+    transaction.on_commit(lambda: _release_thumbnail_variants(thumbnail_hash))
+
+
+@receiver(post_delete, sender=Certificate)
+def drop_deleted_certificate(sender, instance, **kwargs):
+    certificate_cache.invalidate_certificates([(instance.tutorial_id, instance.certificate_number)])
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_name(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_name = None
+    if raw or instance.pk is None:
+        return
+    # Logins save only last_login; skip the lookup when no name field is written
+    if update_fields is not None and not set(update_fields) & set(_NAME_FIELDS):
+        return
+    instance._previous_name = User.objects.filter(pk=instance.pk).values_list(*_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def drop_renamed_user_certificates(sender, instance, raw=False, **kwargs):
+    previous_name = getattr(instance, '_previous_name', None)
+    if previous_name is None:
+        return
+    if previous_name != tuple(getattr(instance, field) for field in _NAME_FIELDS):
+        certificate_cache.invalidate_certificates(
+            Certificate.objects.filter(user=instance).values_list('tutorial_id', 'certificate_number')
+        )
@@ -1,3 +1,1245 @@
-from django.test import TestCase
+import hashlib
+import struct
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from prometheus_client import REGISTRY
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from accounts import user_cache
+from accounts.models import Profile
+from techmate.async_dispatch import async_view
+from techmate.import_profile import profile_startup
+from techmate.instrumentation import InstrumentationMiddleware, fingerprint
+from . import benchmarks, certificate_cache
+from .certificate_bulk import issue_missing_certificates, stream_certificates_zip
+from . import metadata, response_cache, thumbnails
+from .media_probe import MediaInfo, probe
+from .certificate_generator import generate_certificate_pdf, render_certificate_pdf
+from .certificate_render import BACKGROUND_FORM, _compiled_static_layer
+from .certificate_views import CertificateViewSet
+from .models import Certificate, ContentUpload, Tutorial, TutorialContent, UserTutorialProgress
+from .dashboard import abuild_dashboard, build_dashboard
+from .seeding import SCALES, seed
+from .serializers import TutorialListSerializer
+from .views import TutorialDetailView, TutorialListCreateView, UserDashboardView, with_list_annotations
+
+
+def make_user(username, role='student'):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass12345!')
+    Profile.objects.create(user=user, name=username.title(), role=role)
+    return user
+
+
+def make_tutorial(instructor, title='Tutorial', contents=2):
+    tutorial = Tutorial.objects.create(title=title, description=f'{title} description', created_by=instructor)
+    for order in range(contents):
+        TutorialContent.objects.create(
+            tutorial=tutorial, order=order, title=f'{title} lesson {order}',
+            content_type='text', text='Lesson body',
+        )
+    return tutorial
+
+
+class TutorialListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor', role='instructor')
+        self.student = make_user('student')
+
+    def add_tutorials(self, count):
+        for index in range(count):
+            tutorial = make_tutorial(self.instructor, title=f'Tutorial {Tutorial.objects.count()}')
+            progress = UserTutorialProgress.objects.create(user=self.student, tutorial=tutorial)
+            if index % 2:
+                progress.completed_contents.set(tutorial.contents.all()[:1])
+                progress.calculate_progress()
+
+    def count_list_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.student)
+        self.add_tutorials(3)
+        small, _ = self.count_list_queries('/api/tutorials/')
+        self.add_tutorials(12)
+        large, response = self.count_list_queries('/api/tutorials/')
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results']), 15)
+
+    def test_instructor_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.instructor)
+        self.add_tutorials(3)
+        small, _ = self.count_list_queries('/api/tutorials/mine/')
+        self.add_tutorials(12)
+        large, _ = self.count_list_queries('/api/tutorials/mine/')
+        self.assertEqual(small, large)
+
+    def test_list_reports_counts_and_progress(self):
+        self.client.force_authenticate(self.student)
+        tutorial = make_tutorial(self.instructor, contents=4)
+        progress = UserTutorialProgress.objects.create(user=self.student, tutorial=tutorial)
+        progress.completed_contents.set(tutorial.contents.all()[:1])
+        progress.calculate_progress()
+        untouched = make_tutorial(self.instructor, title='Untouched', contents=1)
+
+        response = self.client.get('/api/tutorials/')
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(rows[tutorial.id]['content_count'], 4)
+        self.assertEqual(rows[tutorial.id]['user_progress'], {
+            'percentage': 25.0, 'completed': False, 'completed_count': 1,
+        })
+        self.assertEqual(rows[untouched.id]['content_count'], 1)
+        self.assertIsNone(rows[untouched.id]['user_progress'])
+
+    def test_serializer_loads_progress_once_without_a_view(self):
+        self.add_tutorials(6)
+        request = APIRequestFactory().get('/')
+        request.user = self.student
+        with CaptureQueriesContext(connection) as queries:
+            rows = TutorialListSerializer(
+                with_list_annotations(Tutorial.objects.all()), many=True, context={'request': request},
+            ).data
+        progress_queries = [query for query in queries if 'tutorials_usertutorialprogress' in query['sql']]
+        self.assertEqual(len(progress_queries), 1)
+        self.assertEqual(sum(1 for row in rows if row['user_progress']['completed_count']), 3)
+
+
+class ContentsTotalCounterTests(TestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor', role='instructor')
+
+    def stored_total(self, tutorial):
+        tutorial.refresh_from_db(fields=['contents_total'])
+        return tutorial.contents_total
+
+    def test_counter_follows_create_move_and_delete(self):
+        first = make_tutorial(self.instructor, title='First', contents=3)
+        second = make_tutorial(self.instructor, title='Second', contents=0)
+        self.assertEqual(self.stored_total(first), 3)
+
+        moved = first.contents.first()
+        moved.tutorial = second
+        moved.save()
+        self.assertEqual(self.stored_total(first), 2)
+        self.assertEqual(self.stored_total(second), 1)
+
+        moved.title = 'Renamed'
+        moved.save()
+        self.assertEqual(self.stored_total(second), 1)
+
+        first.contents.first().delete()
+        self.assertEqual(self.stored_total(first), 1)
+
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        tutorial = make_tutorial(self.instructor, contents=2)
+        Tutorial.objects.filter(pk=tutorial.pk).update(contents_total=7)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_content_counters', '--check', stdout=StringIO())
+        call_command('rebuild_content_counters', stdout=StringIO())
+        self.assertEqual(self.stored_total(tutorial), 2)
+        call_command('rebuild_content_counters', '--check', stdout=StringIO())
+
+
+class ProgressRecalculationTests(APITestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor', role='instructor')
+        self.tutorial = make_tutorial(self.instructor, contents=4)
+        self.lessons = list(self.tutorial.contents.order_by('order'))
+
+    def add_learners(self, count, completed):
+        for index in range(count):
+            student = make_user(f'learner{UserTutorialProgress.objects.count()}')
+            progress = UserTutorialProgress.objects.create(user=student, tutorial=self.tutorial)
+            progress.completed_contents.set(self.lessons[:completed])
+            progress.calculate_progress()
+
+    def progress_rows(self):
+        return set(UserTutorialProgress.objects.values_list('percentage', 'completed'))
+
+    def test_delete_recalculates_with_constant_queries(self):
+        self.client.force_authenticate(self.instructor)
+        self.add_learners(2, completed=3)
+        with CaptureQueriesContext(connection) as small:
+            self.client.delete(f'/api/tutorials/contents/{self.lessons[3].pk}/')
+        self.assertEqual(self.progress_rows(), {(Decimal('100.00'), True)})
+
+        self.add_learners(10, completed=1)
+        with CaptureQueriesContext(connection) as large:
+            self.client.delete(f'/api/tutorials/contents/{self.lessons[2].pk}/')
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(self.progress_rows(), {(Decimal('100.00'), True), (Decimal('50.00'), False)})
+
+    def test_add_lowers_percentages(self):
+        self.client.force_authenticate(self.instructor)
+        self.add_learners(2, completed=4)
+        response = self.client.post(
+            f'/api/tutorials/{self.tutorial.pk}/contents/',
+            {'order': 5, 'title': 'Extra', 'content_type': 'text', 'text': 'More'},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.progress_rows(), {(Decimal('80.00'), False)})
+
+    def test_command_repairs_stale_rows(self):
+        self.add_learners(1, completed=2)
+        UserTutorialProgress.objects.update(percentage=0, completed=True)
+        call_command('recalculate_progress', '--tutorial', str(self.tutorial.pk), stdout=StringIO())
+        self.assertEqual(self.progress_rows(), {(Decimal('50.00'), False)})
+
+
+class ProgressDeltaTests(APITestCase):
+    def setUp(self):
+        self.student = make_user('student')
+        self.tutorial = make_tutorial(make_user('instructor', role='instructor'), contents=4)
+        self.lessons = list(self.tutorial.contents.order_by('order').values_list('pk', flat=True))
+        self.url = f'/api/tutorials/{self.tutorial.pk}/progress/'
+        self.client.force_authenticate(self.student)
+
+    def test_add_and_remove_are_idempotent(self):
+        response = self.client.post(self.url, {'add': self.lessons[:2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['percentage'], response.data['completed_count']), ('50.00', 2))
+
+        response = self.client.post(self.url, {'add': self.lessons[:2]}, format='json')
+        self.assertEqual(response.data['completed_count'], 2)
+
+        response = self.client.post(self.url, {'add': self.lessons[2:], 'remove': [self.lessons[0]]}, format='json')
+        self.assertEqual((response.data['percentage'], response.data['completed']), ('75.00', False))
+        self.assertEqual(sorted(response.data['completed_content_ids']), self.lessons[1:])
+
+    def test_ignores_contents_of_other_tutorials(self):
+        other = make_tutorial(self.tutorial.created_by, title='Other', contents=1)
+        response = self.client.post(self.url, {'add': [other.contents.get().pk]}, format='json')
+        self.assertEqual(response.data['completed_count'], 0)
+
+    def test_delta_matches_full_recount(self):
+        self.client.post(self.url, {'add': self.lessons}, format='json')
+        self.client.post(self.url, {'remove': self.lessons[1:3]}, format='json')
+        progress = UserTutorialProgress.objects.get(user=self.student)
+        stored = (progress.completed_count, progress.percentage, progress.completed)
+        self.assertEqual(stored, (progress.calculate_progress().completed_count, progress.percentage, progress.completed))
+        self.assertEqual(stored, (2, Decimal('50.00'), False))
+
+    def test_empty_request_is_rejected(self):
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+
+class DashboardTests(APITestCase):
+    url = '/api/tutorials/dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('student')
+        self.instructor = make_user('instructor', role='instructor')
+        self.client.force_authenticate(self.student)
+
+    def enrol(self, count, done=0):
+        for index in range(count):
+            tutorial = make_tutorial(self.instructor, title=f'Tutorial {Tutorial.objects.count()}', contents=2)
+            progress = UserTutorialProgress.objects.create(user=self.student, tutorial=tutorial)
+            if index < done:
+                progress.completed_contents.set(tutorial.contents.all())
+                progress.calculate_progress()
+
+    def fetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_query_count_is_constant_and_snapshot_is_cached(self):
+        self.enrol(2)
+        small, _ = self.fetch()
+        cache.clear()
+        self.enrol(20, done=3)
+        large, data = self.fetch()
+        self.assertEqual(small, large)
+        self.assertEqual(data['stats'], {'in_progress': 0, 'completed': 3, 'total_tutorials': 22})
+        self.assertEqual(len(data['recent_tutorials']), 5)
+        cached, _ = self.fetch()
+        self.assertEqual(cached, 0)
+
+    def test_tutorial_count_is_part_of_the_aggregate(self):
+        self.enrol(3, done=1)
+        with self.assertNumQueries(2):
+            stats = build_dashboard(self.student)['stats']
+        self.assertEqual(stats, {'in_progress': 0, 'completed': 1, 'total_tutorials': 3})
+        newcomer = make_user('newcomer')
+        self.assertEqual(build_dashboard(newcomer)['stats'], {'in_progress': 0, 'completed': 0, 'total_tutorials': 3})
+        self.assertEqual(async_to_sync(abuild_dashboard)(newcomer)['stats']['total_tutorials'], 3)
+
+    def test_progress_write_refreshes_own_snapshot_only(self):
+        self.enrol(1)
+        other = make_user('other')
+        UserTutorialProgress.objects.create(user=other, tutorial=Tutorial.objects.get())
+        self.fetch()
+        self.client.force_authenticate(other)
+        self.fetch()
+
+        tutorial = Tutorial.objects.get()
+        lesson = tutorial.contents.first()
+        self.client.force_authenticate(self.student)
+        self.client.post(f'/api/tutorials/{tutorial.pk}/progress/', {'add': [lesson.pk]}, format='json')
+        _, data = self.fetch()
+        self.assertEqual(data['stats']['in_progress'], 1)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.fetch()[0], 0)
+
+    def test_catalog_changes_refresh_every_snapshot(self):
+        self.enrol(1)
+        self.fetch()
+        tutorial = Tutorial.objects.get()
+        tutorial.title = 'Renamed'
+        tutorial.save()
+        _, data = self.fetch()
+        self.assertEqual(data['recent_tutorials'][0]['tutorial_title'], 'Renamed')
+        make_tutorial(self.instructor, title='New')
+        self.assertEqual(self.fetch()[1]['stats']['total_tutorials'], 2)
+
+
+class AnonymousResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = make_user('instructor', role='instructor')
+        self.tutorial = make_tutorial(self.instructor, contents=1)
+        self.detail_url = f'/api/tutorials/{self.tutorial.pk}/'
+
+    def fetch(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_repeat_reads_skip_the_database(self):
+        before = response_cache.stats()
+        for url in ('/api/tutorials/', self.detail_url):
+            first, data = self.fetch(url)
+            self.assertGreater(first, 0)
+            self.assertEqual(self.fetch(url), (0, data))
+        after = response_cache.stats()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (2, 2))
+
+    def test_saves_bump_tutorial_and_catalog_versions(self):
+        self.fetch('/api/tutorials/')
+        self.fetch(self.detail_url)
+        TutorialContent.objects.create(tutorial=self.tutorial, title='Extra', content_type='text', text='More')
+        self.assertEqual(len(self.fetch(self.detail_url)[1]['contents']), 2)
+        self.assertEqual(self.fetch('/api/tutorials/')[1]['results'][0]['content_count'], 2)
+
+        other = make_tutorial(self.instructor, title='Other', contents=0)
+        self.fetch(self.detail_url)
+        other.title = 'Renamed'
+        other.save()
+        # An unrelated tutorial leaves this detail entry alone but refreshes the list
+        self.assertEqual(self.fetch(self.detail_url)[0], 0)
+        titles = [row['title'] for row in self.fetch('/api/tutorials/')[1]['results']]
+        self.assertIn('Renamed', titles)
+
+    def test_personalised_bodies_are_never_shared(self):
+        student = make_user('student')
+        UserTutorialProgress.objects.create(user=student, tutorial=self.tutorial, percentage=50)
+        self.client.force_authenticate(student)
+        self.assertEqual(self.fetch(self.detail_url)[1]['user_progress']['percentage'], 50.0)
+        self.client.force_authenticate(None)
+        self.assertIsNone(self.fetch(self.detail_url)[1]['user_progress'])
+        self.client.force_authenticate(student)
+        self.assertIsNotNone(self.fetch(self.detail_url)[1]['user_progress'])
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = make_user('instructor', role='instructor')
+        self.student = make_user('student')
+        self.tutorial = make_tutorial(self.instructor, contents=2)
+        self.detail_url = f'/api/tutorials/{self.tutorial.pk}/'
+
+    def revalidate(self, url, etag):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, len(queries)
+
+    def test_unchanged_resources_return_304_from_one_query(self):
+        self.client.force_authenticate(self.student)
+        for url in (self.detail_url, '/api/tutorials/'):
+            etag = self.client.get(url)['ETag']
+            response, queries = self.revalidate(url, etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertLessEqual(queries, 2)
+
+    def test_content_and_progress_changes_change_the_etag(self):
+        self.client.force_authenticate(self.student)
+        etag = self.client.get(self.detail_url)['ETag']
+        self.tutorial.contents.first().delete()
+        response, _ = self.revalidate(self.detail_url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['contents']), 1)
+
+        etag = response['ETag']
+        lesson = self.tutorial.contents.get()
+        self.client.post(f'/api/tutorials/{self.tutorial.pk}/progress/', {'add': [lesson.pk]}, format='json')
+        self.assertEqual(self.revalidate(self.detail_url, etag)[0].status_code, 200)
+
+        # Another caller's validators do not match this caller's body
+        self.client.force_authenticate(self.instructor)
+        self.assertEqual(self.revalidate(self.detail_url, etag)[0].status_code, 200)
+
+    def test_patch_honours_if_match(self):
+        self.client.force_authenticate(self.instructor)
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.patch(self.detail_url, {'title': 'First'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.patch(self.detail_url, {'title': 'Second'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.tutorial.refresh_from_db()
+        self.assertEqual(self.tutorial.title, 'First')
+
+
+class WriteFreeReadTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('student')
+        self.tutorial = make_tutorial(make_user('instructor', role='instructor'), contents=3)
+        self.client.force_authenticate(self.student)
+
+    def test_reads_synthesize_zero_progress_without_writing(self):
+        with CaptureQueriesContext(connection) as queries:
+            detail = self.client.get(f'/api/tutorials/{self.tutorial.pk}/')
+            progress = self.client.get(f'/api/tutorials/{self.tutorial.pk}/progress/')
+        self.assertFalse(UserTutorialProgress.objects.exists())
+        self.assertFalse([query for query in queries if not query['sql'].lstrip().upper().startswith('SELECT')])
+        self.assertEqual(detail.data['user_progress'], {'percentage': 0.0, 'completed': False, 'completed_content_ids': []})
+        self.assertEqual((progress.data['percentage'], progress.data['completed_content_ids']), ('0.00', []))
+        self.assertEqual(progress.data['total_contents'], 3)
+
+    def test_detail_reads_completed_ids_with_the_contents(self):
+        lessons = list(self.tutorial.contents.values_list('pk', flat=True))
+        self.client.post(f'/api/tutorials/{self.tutorial.pk}/progress/', {'add': lessons[:2]}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/tutorials/{self.tutorial.pk}/')
+        self.assertEqual(sorted(response.data['user_progress']['completed_content_ids']), lessons[:2])
+        self.assertAlmostEqual(response.data['user_progress']['percentage'], 66.67)
+        # Validators, the annotated tutorial and the annotated contents
+        self.assertEqual(len(queries), 3)
+
+class TutorialSearchTests(APITestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor', role='instructor')
+        self.django = Tutorial.objects.create(
+            title='Django basics', description='Models and views', created_by=self.instructor,
+        )
+        self.react = Tutorial.objects.create(
+            title='React hooks', description='State in components', created_by=self.instructor,
+        )
+        self.lesson = TutorialContent.objects.create(
+            tutorial=self.react, title='Talking to a Django API', content_type='text',
+            text='Fetch <json> from the django backend',
+        )
+
+    def search(self, query, **params):
+        response = self.client.get('/api/tutorials/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ranks_title_matches_first_and_searches_contents(self):
+        data = self.search('django')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([row['id'] for row in data['results']], [self.django.id, self.react.id])
+        self.assertEqual(data['results'][1]['search']['content_id'], self.lesson.id)
+
+    def test_snippets_are_highlighted_and_escaped(self):
+        snippet = self.search('backend')['results'][0]['search']['snippet']
+        self.assertIn('<mark>backend</mark>', snippet)
+        self.assertIn('&lt;json&gt;', snippet)
+
+    def test_index_follows_content_changes(self):
+        self.lesson.text = 'Typescript generics'
+        self.lesson.save()
+        self.assertEqual(self.search('typescript')['count'], 1)
+        self.assertEqual(self.search('backend')['count'], 0)
+        self.lesson.delete()
+        self.assertEqual(self.search('typescript')['count'], 0)
+
+    def test_paginates_results(self):
+        data = self.search('django', page_size=1)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNotNone(data['next'])
+        second = self.client.get(data['next']).data
+        self.assertEqual(second['results'][0]['id'], self.react.id)
+        self.assertIsNone(second['next'])
+
+    def test_list_search_param_uses_index(self):
+        response = self.client.get('/api/tutorials/', {'search': 'components'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.react.id])
+        response = self.client.get('/api/tutorials/', {'search': '"*'})
+        self.assertEqual(response.data['results'], [])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor', role='instructor')
+        self.tutorials = [
+            Tutorial.objects.create(title=f'Tutorial {index}', description='', created_by=self.instructor)
+            for index in range(7)
+        ]
+        # Identical timestamps force the id tie-breaker to do its job
+        Tutorial.objects.filter(pk__in=[t.pk for t in self.tutorials[2:5]]).update(created_at=timezone.now())
+
+    def ids(self, response):
+        return [row['id'] for row in response.data['results']]
+
+    def test_walks_forward_and_back_without_gaps(self):
+        expected = list(
+            Tutorial.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        pages, response = [], self.client.get('/api/tutorials/', {'page_size': 3})
+        self.assertIsNone(response.data['previous'])
+        while True:
+            pages.append(self.ids(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(self.ids(response), pages[1])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(self.ids(response), pages[0])
+        self.assertIsNone(response.data['previous'])
+
+    def test_rejects_malformed_cursor(self):
+        response = self.client.get('/api/tutorials/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_paginates_certificates(self):
+        student = make_user('student')
+        for tutorial in self.tutorials[:3]:
+            Certificate.objects.create(user=student, tutorial=tutorial)
+        self.client.force_authenticate(student)
+        response = self.client.get('/api/certificates/', {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+
+class CertificatePDFCacheTests(APITestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings_override = override_settings(CERTIFICATE_CACHE_DIR=self.cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        instructor = make_user('instructor', role='instructor')
+        self.student = make_user('student')
+        self.tutorial = make_tutorial(instructor)
+        self.certificate = Certificate.objects.create(user=self.student, tutorial=self.tutorial)
+        self.url = f'/api/certificates/{self.certificate.pk}/download/'
+        self.client.force_authenticate(self.student)
+
+    def cached_files(self):
+        return list(Path(self.cache_dir.name).glob('t*/*/*.pdf'))
+
+    def download(self, **headers):
+        response = self.client.get(self.url, **headers)
+        if hasattr(response, 'streaming_content'):
+            response.content_bytes = b''.join(response.streaming_content)
+        return response
+
+    def test_serves_stored_file_and_honours_validators(self):
+        first = self.download()
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.content_bytes.startswith(b'%PDF'))
+        self.assertEqual(len(self.cached_files()), 1)
+
+        second = self.download()
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.content_bytes, first.content_bytes)
+
+        self.assertEqual(self.download(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(
+            self.download(HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304,
+        )
+
+    def test_name_and_title_changes_invalidate(self):
+        etag = self.download()['ETag']
+        self.student.first_name = 'Ada'
+        self.student.save()
+        self.assertEqual(self.cached_files(), [])
+        renamed_etag = self.download()['ETag']
+        self.assertNotEqual(renamed_etag, etag)
+
+        self.tutorial.title = 'Retitled'
+        self.tutorial.save()
+        self.assertEqual(self.cached_files(), [])
+        self.assertNotEqual(self.download(HTTP_IF_NONE_MATCH=renamed_etag).status_code, 304)
+
+    def test_evicts_least_recently_used(self):
+        self.download()
+        other = Certificate.objects.create(user=self.student, tutorial=make_tutorial(self.tutorial.created_by, 'Other'))
+        older = certificate_cache.get_certificate_pdf(self.certificate).path
+        newer = certificate_cache.get_certificate_pdf(other).path
+        certificate_cache.evict(max_bytes=int(newer.stat().st_size * 1.5))
+        self.assertEqual(self.cached_files(), [newer])
+        self.assertFalse(older.exists())
+
+    def test_stores_scan_the_cache_only_when_the_cap_may_be_crossed(self):
+        tutorials = [make_tutorial(self.tutorial.created_by, f'Course {index}') for index in range(3)]
+        certificates = [Certificate.objects.create(user=self.student, tutorial=tutorial) for tutorial in tutorials]
+        size = certificate_cache.get_certificate_pdf(self.certificate).path.stat().st_size
+
+        with override_settings(CERTIFICATE_CACHE_MAX_BYTES=int(size * 3.5)), \
+                patch.object(certificate_cache, 'evict', wraps=certificate_cache.evict) as evict:
+            certificate_cache.get_certificate_pdf(certificates[0])
+            certificate_cache.get_certificate_pdf(certificates[1])
+            self.assertEqual(evict.call_count, 0)
+            certificate_cache.get_certificate_pdf(certificates[2])
+        self.assertEqual(evict.call_count, 1)
+        self.assertEqual(len(self.cached_files()), 3)
+
+    def test_store_replaces_older_renders_without_clearing_the_directory(self):
+        older = certificate_cache.get_certificate_pdf(self.certificate).path
+        # A concurrent first download still writing its render
+        pending = older.parent / 'pending.tmp'
+        pending.write_bytes(b'%PDF')
+        newer = older.parent / f'{"0" * 64}.pdf'
+        certificate_cache._store('0' * 64, newer, b'%PDF-new')
+        self.assertEqual(self.cached_files(), [newer])
+        self.assertTrue(pending.exists())
+
+
+class CertificateTemplateTests(TestCase):
+    def test_template_references_precompiled_background(self):
+        templated = render_certificate_pdf('Ada Lovelace', 'Django basics', 'January 01, 2026')
+        direct = render_certificate_pdf('Ada Lovelace', 'Django basics', 'January 01, 2026', use_template=False)
+        self.assertTrue(templated.startswith(b'%PDF'))
+        self.assertIn(f'/FormXob.{BACKGROUND_FORM}'.encode(), templated)
+        self.assertNotIn(f'/FormXob.{BACKGROUND_FORM}'.encode(), direct)
+
+    def test_static_layer_is_compiled_once(self):
+        render_certificate_pdf('Ada', 'One', 'January 01, 2026')
+        misses = _compiled_static_layer.cache_info().misses
+        render_certificate_pdf('Grace', 'Two', 'January 02, 2026')
+        self.assertEqual(_compiled_static_layer.cache_info().misses, misses)
+
+
+class BulkCertificateTests(TestCase):
+    def setUp(self):
+        self.tutorial = make_tutorial(make_user('teacher', role='instructor'), title='Bulk course')
+        self.students = [make_user(f'student{index}') for index in range(3)]
+        for student in self.students[:2]:
+            UserTutorialProgress.objects.create(user=student, tutorial=self.tutorial, percentage=100, completed=True)
+        UserTutorialProgress.objects.create(user=self.students[2], tutorial=self.tutorial, percentage=50)
+
+    def test_issues_only_missing_certificates_for_completed_learners(self):
+        Certificate.objects.create(user=self.students[0], tutorial=self.tutorial)
+        self.assertEqual(issue_missing_certificates(self.tutorial), 1)
+        self.assertEqual(issue_missing_certificates(self.tutorial), 0)
+        self.assertEqual(
+            set(Certificate.objects.filter(tutorial=self.tutorial).values_list('user__username', flat=True)),
+            {'student0', 'student1'},
+        )
+
+    def test_streamed_zip_holds_one_pdf_per_certificate(self):
+        issue_missing_certificates(self.tutorial)
+        data = b''.join(stream_certificates_zip([self.tutorial], workers=1, batch_size=1))
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), 2)
+            self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in names))
+        numbers = Certificate.objects.filter(tutorial=self.tutorial).values_list('certificate_number', flat=True)
+        self.assertEqual({name.split('_', 1)[0] for name in names}, set(numbers))
+
+    def test_command_reports_throughput(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'certificates.zip'
+            out = StringIO()
+            call_command('bulk_issue_certificates', self.tutorial.pk, output=str(output), workers=2, stdout=out)
+            with zipfile.ZipFile(output) as archive:
+                self.assertEqual(len(archive.namelist()), 2)
+        self.assertIn('Exported 2 certificate(s)', out.getvalue())
+
+    def test_admin_exports_small_cohorts_and_defers_large_ones(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass12345!')
+        self.client.force_login(admin)
+        action = {'action': 'issue_and_export_certificates', '_selected_action': [self.tutorial.pk]}
+
+        response = self.client.post('/admin/tutorials/tutorial/', action)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+        with override_settings(CERTIFICATE_EXPORT_SYNC_LIMIT=1):
+            response = self.client.post('/admin/tutorials/tutorial/', action, follow=True)
+        self.assertContains(response, f'bulk_issue_certificates {self.tutorial.pk} --no-issue')
+
+
+class ContentMediaTests(APITestCase):
+    payload = bytes(range(256)) * 40
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_root.name, MEDIA_OFFLOAD='')
+        override.enable()
+        self.addCleanup(override.disable)
+        tutorial = make_tutorial(make_user('instructor', role='instructor'), contents=0)
+        self.content = TutorialContent.objects.create(
+            tutorial=tutorial, title='Screencast', content_type='video',
+            file=SimpleUploadedFile('screencast.webm', self.payload, content_type='video/webm'),
+        )
+        self.url = f'/api/tutorials/contents/{self.content.pk}/media/'
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_file_advertises_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/webm')
+        self.assertEqual(self.body(response), self.payload)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-299')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.payload)}')
+        self.assertEqual(response['Content-Length'], '200')
+        self.assertEqual(self.body(response), self.payload[100:300])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-50')
+        self.assertEqual(self.body(response), self.payload[-50:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.payload)}')
+
+    def test_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        fresh = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(fresh.status_code, 206)
+
+    def test_offload_hands_file_to_front_end_server(self):
+        with override_settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_OFFLOAD_PREFIX='/protected-media/'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.content.file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_serialized_url_points_at_media_view(self):
+        response = self.client.get(f'/api/tutorials/contents/{self.content.pk}/')
+        self.assertTrue(response.data['file_url'].endswith(self.url))
+
+
+class ChunkedUploadTests(APITestCase):
+    chunk_size = 256 * 1024
+    payload = bytes(range(256)) * 2500  # 640000 bytes: two full chunks and a partial one
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=str(Path(self.directory.name) / 'media'),
+            CHUNKED_UPLOAD_DIR=str(Path(self.directory.name) / 'uploads'),
+            MEDIA_PROBE_ASYNC=False,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.instructor = make_user('instructor', role='instructor')
+        self.tutorial = make_tutorial(self.instructor, contents=0)
+        self.client.force_authenticate(self.instructor)
+
+    def initiate(self):
+        response = self.client.post(f'/api/tutorials/{self.tutorial.pk}/uploads/', {
+            'filename': 'lecture.webm', 'total_size': len(self.payload), 'chunk_size': self.chunk_size,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['chunk_count'], 3)
+        return response.data['id']
+
+    def put_chunk(self, upload_id, index, data=None, digest=None):
+        data = self.payload[index * self.chunk_size:(index + 1) * self.chunk_size] if data is None else data
+        return self.client.put(
+            f'/api/tutorials/uploads/{upload_id}/chunks/{index}/', data,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=digest or hashlib.sha256(data).hexdigest(),
+        )
+
+    def complete(self, upload_id):
+        return self.client.post(f'/api/tutorials/uploads/{upload_id}/complete/', {
+            'order': 1, 'title': 'Lecture', 'content_type': 'video',
+        }, format='json')
+
+    def test_resumed_upload_is_assembled_into_content(self):
+        upload_id = self.initiate()
+        self.assertEqual(self.put_chunk(upload_id, 2).status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 200)
+        self.assertEqual(self.complete(upload_id).status_code, 400)
+
+        status = self.client.get(f'/api/tutorials/uploads/{upload_id}/')
+        self.assertEqual((status.data['received_chunks'], status.data['missing_chunks']), ([0, 2], [1]))
+        self.put_chunk(upload_id, 1)
+
+        # The random payload is not a media file, so probing it only logs a warning
+        with self.assertLogs('tutorials.metadata', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 201)
+        content = TutorialContent.objects.get(pk=response.data['id'])
+        with content.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.payload)
+        self.assertEqual(ContentUpload.objects.get(pk=upload_id).content, content)
+        self.assertEqual(self.complete(upload_id).data['id'], content.pk)
+        self.assertFalse((Path(self.directory.name) / 'uploads' / upload_id).exists())
+
+    def test_rejects_file_names_with_paths_at_initiation(self):
+        for filename in ('../x.mp4', 'a/b.mp4', 'a\\b.mp4', '***'):
+            response = self.client.post(f'/api/tutorials/{self.tutorial.pk}/uploads/', {
+                'filename': filename, 'total_size': len(self.payload),
+            }, format='json')
+            self.assertEqual(response.status_code, 400, filename)
+            self.assertIn('filename', response.data)
+        self.assertFalse(ContentUpload.objects.exists())
+
+    def test_rejects_bad_checksum_and_size(self):
+        upload_id = self.initiate()
+        self.assertEqual(self.put_chunk(upload_id, 0, digest='0' * 64).status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 0, data=b'short').status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 3, data=b'x').status_code, 400)
+        status = self.client.get(f'/api/tutorials/uploads/{upload_id}/')
+        self.assertEqual(status.data['received_chunks'], [])
+
+    def test_other_users_cannot_touch_upload(self):
+        upload_id = self.initiate()
+        self.client.force_authenticate(make_user('intruder', role='instructor'))
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 404)
+
+
+@override_settings(MEDIA_URL='/media/')
+class ThumbnailVariantTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.instructor = make_user('instructor', role='instructor')
+
+    def image_upload(self, name, size, color):
+        buffer = BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def variant_path(self, thumbnail_hash, width, fmt):
+        return Path(self.media_root.name) / thumbnails.variant_name(thumbnail_hash, width, fmt)
+
+    def test_upload_builds_variants_and_replacement_cleans_up(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tutorial = Tutorial.objects.create(
+                title='Pictured', description='d', created_by=self.instructor,
+                thumbnail=self.image_upload('shot.png', (2000, 1000), 'red'),
+            )
+        tutorial.refresh_from_db()
+        first_hash = tutorial.thumbnail_hash
+        self.assertTrue(first_hash)
+        with Image.open(self.variant_path(first_hash, 640, 'webp')) as variant:
+            self.assertEqual((variant.format, variant.size), ('WEBP', (640, 320)))
+        self.assertTrue(self.variant_path(first_hash, 1280, 'jpeg').exists())
+
+        response = self.client.get(f'/api/tutorials/{tutorial.pk}/')
+        self.assertTrue(response.data['thumbnails']['320']['webp'].endswith(f'{first_hash}/320.webp'))
+        self.assertTrue(response.data['thumbnail_url'].endswith(f'{first_hash}/640.jpg'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tutorial.thumbnail = self.image_upload('new.png', (300, 200), 'blue')
+            tutorial.save()
+        tutorial.refresh_from_db()
+        self.assertNotEqual(tutorial.thumbnail_hash, first_hash)
+        self.assertFalse(self.variant_path(first_hash, 640, 'webp').exists())
+        # Small originals are never upscaled
+        with Image.open(self.variant_path(tutorial.thumbnail_hash, 1280, 'jpeg')) as variant:
+            self.assertEqual(variant.size, (300, 200))
+
+    def test_backfill_refreshes_validators_and_cached_responses(self):
+        cache.clear()
+        # Without running on_commit, as for tutorials uploaded before variants existed
+        tutorial = Tutorial.objects.create(
+            title='Old upload', description='d', created_by=self.instructor,
+            thumbnail=self.image_upload('old.png', (800, 400), 'green'),
+        )
+        before = self.client.get(f'/api/tutorials/{tutorial.pk}/')
+        self.assertIsNone(before.data['thumbnails'])
+
+        call_command('generate_thumbnails', stdout=StringIO())
+        after = self.client.get(f'/api/tutorials/{tutorial.pk}/')
+        self.assertIsNotNone(after.data['thumbnails'])
+        self.assertNotEqual(after['ETag'], before['ETag'])
+
+    def test_unreadable_image_falls_back_to_original(self):
+        with self.assertLogs('tutorials.thumbnails', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            tutorial = Tutorial.objects.create(
+                title='Broken', description='d', created_by=self.instructor,
+                thumbnail=SimpleUploadedFile('broken.png', b'not an image', content_type='image/png'),
+            )
+        response = self.client.get(f'/api/tutorials/{tutorial.pk}/')
+        self.assertIsNone(response.data['thumbnails'])
+        self.assertTrue(response.data['thumbnail_url'].endswith(tutorial.thumbnail.name))
+
+
+def ebml_element(element_id, payload, unknown_size=False):
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else b'\x01' + len(payload).to_bytes(7, 'big')
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + size + payload
+
+
+def make_webm(duration_ms=None, last_cluster_ms=None):
+    info = ebml_element(0x2AD7B1, (1_000_000).to_bytes(3, 'big'))
+    if duration_ms is not None:
+        info += ebml_element(0x4489, struct.pack('>d', duration_ms))
+    body = ebml_element(0x1549A966, info)
+    if last_cluster_ms is not None:
+        cluster_start, block_offset = divmod(last_cluster_ms, 10000)
+        block = b'\x81' + struct.pack('>h', block_offset) + b'\x80' + b'\x00' * 32
+        body += ebml_element(0x1F43B675, ebml_element(0xE7, (cluster_start * 10000).to_bytes(4, 'big'))
+                             + ebml_element(0xA3, block))
+    return ebml_element(0x1A45DFA3, ebml_element(0x4282, b'webm')) + ebml_element(0x18538067, body, unknown_size=True)
+
+
+def make_cbr_mp3(frames):
+    # MPEG-1 layer III, 128 kbit/s, 44.1 kHz: 417-byte frames
+    return b'ID3\x03\x00\x00\x00\x00\x00\x00' + (b'\xff\xfb\x90\x00' + b'\x00' * 413) * frames
+
+
+class MediaProbeTests(TestCase):
+    def probe_bytes(self, data, suffix):
+        with tempfile.NamedTemporaryFile(suffix=suffix) as file:
+            file.write(data)
+            file.flush()
+            return probe(file.name)
+
+    def test_webm_duration_from_header_or_last_cluster(self):
+        self.assertAlmostEqual(self.probe_bytes(make_webm(duration_ms=90400.0), '.webm').duration, 90.4)
+        info = self.probe_bytes(make_webm(last_cluster_ms=62500), '.webm')
+        self.assertAlmostEqual(info.duration, 62.5)
+        self.assertEqual(info.bitrate, round(info.size * 8 / 62.5))
+
+    def test_cbr_mp3_duration_from_frame_header(self):
+        info = self.probe_bytes(make_cbr_mp3(600), '.mp3')
+        self.assertAlmostEqual(info.duration, 600 * 417 * 8 / 128000)
+
+
+@override_settings(MEDIA_PROBE_ASYNC=False)
+class MediaMetadataTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.tutorial = make_tutorial(make_user('instructor', role='instructor'), contents=0)
+
+    def total_duration(self, tutorial=None):
+        tutorial = tutorial or self.tutorial
+        tutorial.refresh_from_db(fields=['total_duration'])
+        return tutorial.total_duration
+
+    def add_content(self, tutorial=None, **fields):
+        return TutorialContent.objects.create(
+            tutorial=tutorial or self.tutorial, title='Lesson', content_type='video', **fields,
+        )
+
+    def test_upload_is_probed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            content = self.add_content(file=SimpleUploadedFile('talk.mp3', make_cbr_mp3(1200), content_type='audio/mpeg'))
+        content.refresh_from_db()
+        self.assertEqual(content.duration, 31)
+        self.assertEqual(content.file_size, len(make_cbr_mp3(1200)))
+        self.assertEqual(content.bitrate, round(content.file_size * 8 / (1200 * 417 * 8 / 128000)))
+        self.assertEqual(self.total_duration(), 31)
+
+    def test_total_duration_follows_edits_moves_and_deletes(self):
+        first = self.add_content(duration=100)
+        second = self.add_content(duration=50)
+        self.assertEqual(self.total_duration(), 150)
+
+        first.duration = 120
+        first.save()
+        self.assertEqual(self.total_duration(), 170)
+
+        other = make_tutorial(self.tutorial.created_by, title='Other', contents=0)
+        second.tutorial = other
+        second.save()
+        self.assertEqual((self.total_duration(), self.total_duration(other)), (120, 50))
+
+        first.delete()
+        self.assertEqual(self.total_duration(), 0)
+
+    def test_probe_without_a_duration_refreshes_the_detail_validators(self):
+        content = self.add_content(file=SimpleUploadedFile('talk.webm', b'media', content_type='video/webm'))
+        url = f'/api/tutorials/{self.tutorial.pk}/'
+        etag = self.client.get(url)['ETag']
+        with patch.object(metadata, 'probe', return_value=MediaInfo(size=4096, bitrate=64000)):
+            metadata.probe_content(content.pk)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.json()['contents'][0]['file_size'], response.json()['contents'][0]['bitrate']), (4096, 64000),
+        )
+
+
+class AsyncViewTests(APITestCase):
+    """The coroutine views served under ASGI answer exactly like the synchronous ones."""
+
+    def setUp(self):
+        cache.clear()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings_override = override_settings(CERTIFICATE_CACHE_DIR=self.cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.instructor = make_user('instructor', role='instructor')
+        self.student = make_user('student')
+        self.tutorials = [make_tutorial(self.instructor, title=f'Tutorial {index}') for index in range(3)]
+        progress = UserTutorialProgress.objects.create(user=self.student, tutorial=self.tutorials[0])
+        progress.completed_contents.set(self.tutorials[0].contents.all()[:1])
+        progress.calculate_progress()
+        self.certificate = Certificate.objects.create(user=self.student, tutorial=self.tutorials[0])
+        self.factory = APIRequestFactory()
+
+    def call(self, view, path, user=None, actions=None, **kwargs):
+        request = self.factory.get(path, **kwargs.pop('headers', {}))
+        if user is not None:
+            force_authenticate(request, user)
+        response = async_to_sync(async_view(view, actions))(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def sync_get(self, path, user=None, **headers):
+        self.client.force_authenticate(user)
+        return self.client.get(path, **headers)
+
+    def test_reads_match_sync_views(self):
+        detail = self.tutorials[0].pk
+        cases = [
+            (TutorialListCreateView, None, '/api/tutorials/', None, {}),
+            (TutorialListCreateView, None, '/api/tutorials/', self.student, {}),
+            (TutorialDetailView, None, f'/api/tutorials/{detail}/', self.student, {'pk': detail}),
+            (TutorialDetailView, None, f'/api/tutorials/{detail}/', None, {'pk': detail}),
+            (UserDashboardView, None, '/api/tutorials/dashboard/', self.student, {}),
+            (CertificateViewSet, {'get': 'my_certificates'}, '/api/certificates/', self.student, {}),
+        ]
+        for view, actions, path, user, kwargs in cases:
+            with self.subTest(path=path, user=user):
+                cache.clear()
+                expected = self.sync_get(path, user)
+                cache.clear()
+                response = self.call(view, path, user, actions, **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, expected.data)
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+    def test_validators_and_errors(self):
+        etag = self.call(TutorialListCreateView, '/api/tutorials/')['ETag']
+        response = self.call(TutorialListCreateView, '/api/tutorials/', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.call(TutorialDetailView, '/api/tutorials/999/', pk=999).status_code, 404)
+        self.assertEqual(self.call(UserDashboardView, '/api/tutorials/dashboard/').status_code, 401)
+
+    def test_download_renders_in_process_pool(self):
+        path = f'/api/certificates/{self.certificate.pk}/download/'
+        actions = {'get': 'download_pdf'}
+        response = self.call(CertificateViewSet, path, self.student, actions, pk=self.certificate.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertIn('attachment', response['Content-Disposition'])
+        cached = certificate_cache.get_certificate_pdf(self.certificate)
+        self.assertEqual(response['ETag'], cached.etag)
+        self.assertEqual(response.content, cached.path.read_bytes())
+        headers = {'HTTP_IF_NONE_MATCH': cached.etag}
+        response = self.call(CertificateViewSet, path, self.student, actions, headers=headers, pk=self.certificate.pk)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_go_to_the_sync_view(self):
+        request = self.factory.post('/api/tutorials/', {'title': 'Async', 'description': 'Posted'})
+        force_authenticate(request, self.instructor)
+        response = async_to_sync(async_view(TutorialListCreateView))(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Tutorial.objects.filter(title='Async').exists())
+
+
+class ColdStartTests(TestCase):
+    # Loose enough for a slow CI box; loading ReportLab and Pillow again, or a
+    # new heavy import at module level, is what these are meant to catch
+    MAX_SECONDS = 3.0
+    MAX_RSS_BYTES = 100 * 2 ** 20
+
+    def test_worker_startup_skips_heavy_libraries(self):
+        profile = profile_startup('wsgi')
+        self.assertEqual(profile.heavy, [])
+        self.assertLess(profile.seconds, self.MAX_SECONDS)
+        self.assertLess(profile.rss_bytes, self.MAX_RSS_BYTES)
+
+
+class EndpointBudgetTests(TestCase):
+    def test_every_route_is_benchmarked(self):
+        self.assertEqual(benchmarks.missing_routes(), [])
+
+    def test_endpoints_stay_within_query_budgets(self):
+        # Latency is left to the benchmark_endpoints command; test machines are too noisy for it
+        with benchmarks.sandbox():
+            fixtures = benchmarks.prepare(seed(SCALES['small']))
+            results = benchmarks.run(fixtures, iterations=2)
+        violations = benchmarks.check(results, benchmarks.load_budgets(), latency=False)
+        self.assertEqual(violations, 0, [(result.endpoint, result.violations) for result in results if result.violations])
+
+
+class SeedCommandTests(TestCase):
+    def test_seeds_consistent_progress_and_refuses_to_run_twice(self):
+        call_command(
+            'seed_techmate', scale='small', students=5, tutorials=3, lessons=4, completion_rate=0.5,
+            batch_size=7, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.filter(profile__role='student').count(), 5)
+        self.assertEqual(TutorialContent.objects.count(), 12)
+        for progress in UserTutorialProgress.objects.all():
+            self.assertEqual(progress.completed_count, progress.completed_contents.count())
+        finished = UserTutorialProgress.objects.filter(completed=True).count()
+        self.assertGreater(finished, 0)
+        self.assertGreaterEqual(Certificate.objects.count(), finished)
+        with self.assertRaises(CommandError):
+            call_command('seed_techmate', scale='small', stdout=StringIO())
+
+
+@override_settings(
+    MIDDLEWARE=['techmate.instrumentation.InstrumentationMiddleware', *settings.MIDDLEWARE],
+    SLOW_REQUEST_MS=60_000, SLOW_REQUEST_QUERIES=2,
+)
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        instructor = make_user('instructor', role='instructor')
+        for index in range(3):
+            make_tutorial(instructor, title=f'Tutorial {index}')
+
+    def test_server_timing_reports_queries_and_spans(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/tutorials/')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{len(captured)} queries"', timing)
+        for metric in ('serialize', 'uri', 'view', 'total'):
+            self.assertIn(f'{metric};dur=', timing)
+
+    def test_slow_request_logs_repeated_statements(self):
+        def view(request):
+            for tutorial_id in Tutorial.objects.values_list('id', flat=True):
+                Tutorial.objects.get(pk=tutorial_id)
+            return HttpResponse()
+
+        with self.assertLogs('techmate.instrumentation', 'WARNING') as logs:
+            InstrumentationMiddleware(view)(RequestFactory().get('/api/tutorials/'))
+        self.assertIn('4 queries', logs.output[0])
+        self.assertIn('3x SELECT', logs.output[0])
+        self.assertIn('WHERE "tutorials_tutorial"."id" = ? LIMIT ?', logs.output[0])
+
+    def test_async_requests_are_measured(self):
+        async def view(request):
+            await Tutorial.objects.acount()
+            await Tutorial.objects.filter(title='Tutorial 1').aexists()
+            return HttpResponse()
+
+        response = async_to_sync(InstrumentationMiddleware(view))(RequestFactory().get('/'))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) AND c > 10"),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) AND c > ?',
+        )
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear_local()
+        self.instructor = make_user('instructor', role='instructor')
+        self.tutorial = make_tutorial(self.instructor)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_recorded_per_route(self):
+        labels = {'method': 'GET', 'route': 'api/tutorials/<int:pk>/', 'status': '200'}
+        before = self.sample('techmate_http_request_duration_seconds_count', **labels)
+        queries_before = self.sample('techmate_db_queries_per_request_sum', route='api/tutorials/<int:pk>/')
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(f'/api/tutorials/{self.tutorial.pk}/')
+        self.assertEqual(self.sample('techmate_http_request_duration_seconds_count', **labels), before + 1)
+        self.assertEqual(
+            self.sample('techmate_db_queries_per_request_sum', route='api/tutorials/<int:pk>/'),
+            queries_before + len(captured),
+        )
+        self.assertEqual(self.sample('techmate_http_requests_in_flight'), 0)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b'techmate_http_request_duration_seconds_count{method="GET",route="api/tutorials/<int:pk>/",status="200"}',
+            response.content,
+        )
+
+    def test_cache_lookups_and_certificate_renders_are_counted(self):
+        student = make_user('student')
+        misses = self.sample('techmate_cache_lookups_total', cache='user', result='misses')
+        local_hits = self.sample('techmate_cache_lookups_total', cache='user', result='local_hits')
+        user_cache.get_user(student.pk)
+        user_cache.get_user(student.pk)
+        self.assertEqual(self.sample('techmate_cache_lookups_total', cache='user', result='misses'), misses + 1)
+        self.assertEqual(self.sample('techmate_cache_lookups_total', cache='user', result='local_hits'), local_hits + 1)
+
+        renders = self.sample('techmate_certificate_render_seconds_count')
+        size = self.sample('techmate_certificate_pdf_bytes_sum')
+        pdf = generate_certificate_pdf(student, self.tutorial, 'TM-1').getvalue()
+        self.assertEqual(self.sample('techmate_certificate_render_seconds_count'), renders + 1)
+        self.assertEqual(self.sample('techmate_certificate_pdf_bytes_sum'), size + len(pdf))
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_metrics_require_the_token_when_one_is_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=['127.0.0.1', '10.0.0.0/8'])
+    def test_metrics_without_a_token_are_served_to_allowed_addresses_only(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 404)
@@ -0,0 +1,118 @@
+"""Resized WebP and JPEG derivatives of tutorial thumbnails.
+
+Every uploaded thumbnail is hashed and re-encoded once into each width of
+``THUMBNAIL_WIDTHS``, in each format of ``THUMBNAIL_FORMATS``, under
+``tutorials/thumbnails/variants/<hash>/<width>.<ext>`` in default storage.
+The hash is stored on the tutorial, so serializers build variant URLs without
+touching the disk, and identical uploads share one set of files. Variants of
+a hash are deleted once no tutorial refers to it any more.
+
+Pillow is imported by the first thumbnail that is actually built, so serving
+variant URLs never loads it.
+"""
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from techmate.instrumentation import absolute_uri
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+# Pillow format name, file extension and encoder options
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANTS_ROOT = 'tutorials/thumbnails/variants'
+# Width served as ``thumbnail_url`` to clients that do not read the map
+DEFAULT_WIDTH = 640
+
+
+def variant_name(thumbnail_hash, width, fmt):
+    return posixpath.join(VARIANTS_ROOT, thumbnail_hash, f'{width}.{THUMBNAIL_FORMATS[fmt][1]}')
+
+
+def hash_file(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as source:
+        for chunk in source.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _flatten(image):
+    """Return an RGB copy of ``image``, compositing any transparency onto white."""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(field_file):
+    """Write every variant of the image in ``field_file`` and return its content hash.
+
+    Variants already on disk for the same hash are kept, so re-running is cheap.
+    Returns None when the file cannot be read as an image.
+    """
+    thumbnail_hash = hash_file(field_file)
+    wanted = [
+        (width, fmt) for width in THUMBNAIL_WIDTHS for fmt in THUMBNAIL_FORMATS
+        if not default_storage.exists(variant_name(thumbnail_hash, width, fmt))
+    ]
+    if not wanted:
+        return thumbnail_hash
+    from PIL import Image, ImageOps
+
+    try:
+        with field_file.open('rb') as source, Image.open(source) as original:
+            image = _flatten(ImageOps.exif_transpose(original))
+    except (OSError, Image.DecompressionBombError) as exc:
+        logger.warning('Cannot build thumbnails for %s: %s', field_file.name, exc)
+        return None
+
+    resized = {}
+    for width, fmt in wanted:
+        if width not in resized:
+            # Never upscale: small originals are re-encoded at their own size
+            height = max(1, round(image.height * min(width, image.width) / image.width))
+            resized[width] = image.resize((min(width, image.width), height), Image.Resampling.LANCZOS)
+        pil_format, _, options = THUMBNAIL_FORMATS[fmt]
+        buffer = BytesIO()
+        resized[width].save(buffer, pil_format, **options)
+        name = variant_name(thumbnail_hash, width, fmt)
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    return thumbnail_hash
+
+
+def remove_variants(thumbnail_hash):
+    for width in THUMBNAIL_WIDTHS:
+        for fmt in THUMBNAIL_FORMATS:
+            default_storage.delete(variant_name(thumbnail_hash, width, fmt))
+    try:
+        default_storage.delete(posixpath.join(VARIANTS_ROOT, thumbnail_hash))
+    except OSError:
+        pass
+
+
+def thumbnail_urls(thumbnail_hash, request=None):
+    """``{width: {format: url}}`` for a stored hash, built without filesystem access."""
+    def absolute(url):
+        return absolute_uri(request, url) if request else url
+
+    return {
+        str(width): {
+            fmt: absolute(default_storage.url(variant_name(thumbnail_hash, width, fmt)))
+            for fmt in THUMBNAIL_FORMATS
+        }
+        for width in THUMBNAIL_WIDTHS
+    }
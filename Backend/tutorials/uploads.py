@@ -0,0 +1,137 @@
+"""Disk side of chunked, resumable content uploads.
+
+Each upload owns ``<CHUNKED_UPLOAD_DIR>/<upload id>/`` holding one
+``<index>.part`` file per received chunk. A chunk is streamed from the request
+to a temporary file in fixed-size reads while its SHA-256 is computed, and is
+only renamed into place once the checksum matches, so the directory listing is
+the authoritative record of what has arrived and a client can resume from it.
+``assemble`` concatenates the parts straight into ``MEDIA_ROOT`` with
+``copy_file_range`` where the kernel supports it, so no upload is ever held in
+memory.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+# Bytes read from the request per step while streaming a chunk to disk
+READ_SIZE = 64 * 1024
+# Used when the client does not choose a chunk size
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk was rejected; the message is safe to return to the client."""
+
+
+def upload_dir(upload) -> Path:
+    return Path(settings.CHUNKED_UPLOAD_DIR) / str(upload.pk)
+
+
+def _part_path(upload, index) -> Path:
+    return upload_dir(upload) / f'{index}.part'
+
+
+def received_chunks(upload):
+    """Sorted indexes of the chunks already stored for ``upload``."""
+    try:
+        names = os.listdir(upload_dir(upload))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-5]) for name in names if name.endswith('.part') and name[:-5].isdigit())
+
+
+def missing_chunks(upload):
+    received = set(received_chunks(upload))
+    return [index for index in range(upload.chunk_count) if index not in received]
+
+
+def store_chunk(upload, index, stream, length, sha256):
+    """Stream ``length`` bytes from ``stream`` into chunk ``index`` after checking size and digest.
+
+    Re-sending a chunk replaces it, so a retry after a dropped connection is safe.
+    """
+    if not 0 <= index < upload.chunk_count:
+        raise ChunkError(f'Chunk index must be between 0 and {upload.chunk_count - 1}.')
+    expected = upload.expected_chunk_size(index)
+    if length != expected:
+        raise ChunkError(f'Chunk {index} must be {expected} bytes, got {length}.')
+    if not sha256:
+        raise ChunkError('The X-Chunk-SHA256 header is required.')
+
+    directory = upload_dir(upload)
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    received = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while received < length:
+                data = stream.read(min(READ_SIZE, length - received))
+                if not data:
+                    break
+                digest.update(data)
+                tmp.write(data)
+                received += len(data)
+        if received != length:
+            raise ChunkError(f'Chunk {index} ended after {received} of {length} bytes.')
+        if digest.hexdigest() != sha256.lower():
+            raise ChunkError(f'Checksum mismatch for chunk {index}.')
+        os.replace(tmp_path, _part_path(upload, index))
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _copy_into(source, target):
+    """Append all of ``source`` to ``target`` in the kernel where possible."""
+    remaining = os.fstat(source.fileno()).st_size
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while remaining:
+                copied = os.copy_file_range(source.fileno(), target.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            if not remaining:
+                return
+        except OSError:
+            # Not supported between these filesystems; finish with plain reads and writes
+            pass
+    shutil.copyfileobj(source, target, READ_SIZE)
+
+
+def assemble(upload, field):
+    """Concatenate every chunk of ``upload`` into a new file in ``field``'s storage.
+
+    Returns the storage name, named as ``field`` would name an ordinary upload,
+    ready to assign to the FileField.
+    """
+    missing = missing_chunks(upload)
+    if missing:
+        raise ChunkError(f'{len(missing)} chunk(s) missing, first is {missing[0]}.')
+
+    name = field.storage.get_available_name(field.generate_filename(None, upload.filename))
+    path = Path(field.storage.path(name))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Exclusive create reserves the name against a concurrent upload picking it
+    with open(path, 'xb', buffering=0) as target:
+        try:
+            for index in range(upload.chunk_count):
+                with open(_part_path(upload, index), 'rb', buffering=0) as source:
+                    _copy_into(source, target)
+        except BaseException:
+            target.close()
+            path.unlink()
+            raise
+    return name
+
+
+def discard(upload):
+    shutil.rmtree(upload_dir(upload), ignore_errors=True)
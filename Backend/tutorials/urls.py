@@ -15,17 +15,26 @@
 
 
 from django.urls import path
+from techmate.async_dispatch import api_view
 from .views import (
     TutorialListCreateView, TutorialDetailView, TutorialContentCreateView,
-    TutorialContentDetailView, UserProgressView, UserDashboardView, InstructorMyTutorialsView
+    TutorialContentDetailView, UserProgressView, UserDashboardView, InstructorMyTutorialsView,
+    TutorialSearchView, ContentMediaView, ContentUploadCreateView, ContentUploadDetailView,
+    ContentUploadChunkView, ContentUploadCompleteView
 )
 
 urlpatterns = [
-    path('', TutorialListCreateView.as_view(), name='tutorial_list'),
-    path('dashboard/', UserDashboardView.as_view(), name='user_dashboard'),
+    path('', api_view(TutorialListCreateView), name='tutorial_list'),
+    path('dashboard/', api_view(UserDashboardView), name='user_dashboard'),
     path('mine/', InstructorMyTutorialsView.as_view(), name='instructor_my_tutorials'),
-    path('<int:pk>/', TutorialDetailView.as_view(), name='tutorial_detail'),
+    path('search/', TutorialSearchView.as_view(), name='tutorial_search'),
+    path('<int:pk>/', api_view(TutorialDetailView), name='tutorial_detail'),
     path('<int:tutorial_id>/contents/', TutorialContentCreateView.as_view(), name='content_create'),
     path('contents/<int:pk>/', TutorialContentDetailView.as_view(), name='content_detail'),
+    path('contents/<int:pk>/media/', ContentMediaView.as_view(), name='content_media'),
+    path('<int:tutorial_id>/uploads/', ContentUploadCreateView.as_view(), name='content_upload_create'),
+    path('uploads/<uuid:pk>/', ContentUploadDetailView.as_view(), name='content_upload_detail'),
+    path('uploads/<uuid:pk>/chunks/<int:index>/', ContentUploadChunkView.as_view(), name='content_upload_chunk'),
+    path('uploads/<uuid:pk>/complete/', ContentUploadCompleteView.as_view(), name='content_upload_complete'),
     path('<int:tutorial_id>/progress/', UserProgressView.as_view(), name='user_progress'),
 ]
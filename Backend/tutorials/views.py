@@ -136,17 +136,215 @@
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.db.models.expressions import RawSQL
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from .models import Tutorial, TutorialContent, UserTutorialProgress
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from . import dashboard, response_cache
+from .conditional import adetail_validators, alist_validators, detail_validators, list_validators
+from . import search as search_index
+from . import uploads
+from .media import serve_file
+from .models import ContentUpload, Tutorial, TutorialContent, UserTutorialProgress
+from .progress import apply_progress_delta, recalculate_progress
 from .serializers import (
     TutorialListSerializer, TutorialDetailSerializer, TutorialCreateSerializer,
-    TutorialContentSerializer, TutorialContentCreateSerializer, UserProgressSerializer
+    TutorialContentSerializer, TutorialContentCreateSerializer, UserProgressSerializer,
+    ProgressDeltaSerializer, ContentUploadSerializer, ChunkedContentSerializer,
+    abuild_progress_map, build_progress_map
 )
 from .permissions import IsInstructorOrAdmin, IsOwnerOrAdmin
+from accounts.tokens import request_claims
+from techmate.instrumentation import absolute_uri
+
+
+def with_list_annotations(queryset):
+    """Attach what TutorialListSerializer reads so a page costs a fixed number of queries."""
+    return queryset.select_related('created_by')
+
+
+def filter_search(queryset, query):
+    """Restrict ``queryset`` to tutorials whose own text or content text matches ``query``."""
+    if search_index.get_backend() is None:
+        return queryset.filter(title__icontains=query)
+    matching = search_index.matching_tutorial_ids_sql(query)
+    if matching is None:
+        return queryset.none()
+    sql, params = matching
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def _positive_int(value, default, maximum=None):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    if number < 1:
+        return default
+    return min(number, maximum) if maximum else number
+
+
+class AsyncListMixin:
+    """``aget`` of a paginated list, fetching the page and the caller's progress with the async ORM."""
+
+    async def aget(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        context = self.get_serializer_context()
+        context['progress_map'] = await abuild_progress_map(request.user, page)
+        serializer = self.get_serializer(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncRetrieveMixin:
+    """``aget`` of a single object, fetched with the async ORM."""
+
+    async def aget(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
+
+
+def _object_id(view):
+    """The lookup value of the object named in ``view``'s URL, or None for a list."""
+    return view.kwargs.get(view.lookup_url_kwarg or view.lookup_field)
+
+
+class ConditionalResponseMixin:
+    """Answer GETs with 304 from cheap validators, and honour If-Match on writes.
+
+    By default the validators cover the object named in the URL, read from the
+    un-annotated ``queryset``, or else the filtered list.
+    """
+
+    def compute_validators(self):
+        object_id = _object_id(self)
+        if object_id is not None:
+            return detail_validators(self.queryset.all(), object_id, self.request.user)
+        return list_validators(self.filter_queryset(self.get_queryset()), self.request.user)
+
+    async def acompute_validators(self):
+        object_id = _object_id(self)
+        if object_id is not None:
+            return await adetail_validators(self.queryset.all(), object_id, self.request.user)
+        return await alist_validators(self.filter_queryset(self.get_queryset()), self.request.user)
+
+    def get_validators(self, refresh=False):
+        if refresh or not hasattr(self, '_validators'):
+            self._validators = self.compute_validators()
+        return self._validators
+
+    async def aget_validators(self):
+        if not hasattr(self, '_validators'):
+            self._validators = await self.acompute_validators()
+        return self._validators
+
+    def check_preconditions(self, request):
+        """Return 304/412 when the request's validators settle it, else None."""
+        validators = self.get_validators()
+        if validators is None:
+            return None
+        return get_conditional_response(request, etag=validators.etag, last_modified=validators.last_modified)
+
+    def add_validators(self, request, response, refresh=False):
+        validators = self.get_validators(refresh)
+        if validators is None or response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            return response
+        response['ETag'] = validators.etag
+        if validators.last_modified is not None:
+            response['Last-Modified'] = http_date(validators.last_modified)
+        response['Cache-Control'] = 'private, no-cache' if request.user.is_authenticated else 'no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def get(self, request, *args, **kwargs):
+        response = self.check_preconditions(request)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.add_validators(request, response)
+
+    async def aget(self, request, *args, **kwargs):
+        # Computed up front, so the synchronous checks below find them memoized
+        await self.aget_validators()
+        response = self.check_preconditions(request)
+        if response is None:
+            response = await super().aget(request, *args, **kwargs)
+        return self.add_validators(request, response)
+
+
+class AnonymousResponseCacheMixin:
+    """Serve anonymous GETs from ``response_cache``; signed-in callers always get a fresh body."""
+
+    def response_cache_key(self):
+        object_id = _object_id(self)
+        if object_id is not None:
+            return response_cache.detail_key(self.request, object_id)
+        return response_cache.list_key(self.request)
+
+    async def aresponse_cache_key(self):
+        object_id = _object_id(self)
+        if object_id is not None:
+            return await response_cache.adetail_key(self.request, object_id)
+        return await response_cache.alist_key(self.request)
+
+    def get_response_cache_key(self):
+        if not hasattr(self, '_response_cache_key'):
+            self._response_cache_key = self.response_cache_key()
+        return self._response_cache_key
+
+    async def aget_response_cache_key(self):
+        if not hasattr(self, '_response_cache_key'):
+            self._response_cache_key = await self.aresponse_cache_key()
+        return self._response_cache_key
+
+    def cached_validators(self, compute):
+        """Validators for anonymous callers are cached under the same versioned key as the body."""
+        if self.request.user.is_authenticated:
+            return compute()
+        return response_cache.validators(self.get_response_cache_key(), compute)
+
+    async def acached_validators(self, acompute):
+        if self.request.user.is_authenticated:
+            return await acompute()
+        return await response_cache.avalidators(await self.aget_response_cache_key(), acompute)
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = self.get_response_cache_key()
+        data = response_cache.lookup(key)
+        if data is not None:
+            return Response(data)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.store(key, response.data)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return await super().aget(request, *args, **kwargs)
+        key = await self.aget_response_cache_key()
+        data = await response_cache.alookup(key)
+        if data is not None:
+            return Response(data)
+        response = await super().aget(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await response_cache.astore(key, response.data)
+        return response
 
-class TutorialListCreateView(generics.ListCreateAPIView):
+
+class TutorialListCreateView(ConditionalResponseMixin, AnonymousResponseCacheMixin, AsyncListMixin, generics.ListCreateAPIView):
     queryset = Tutorial.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsInstructorOrAdmin]
     parser_classes = [MultiPartParser, FormParser]
@@ -163,7 +361,7 @@ class TutorialListCreateView(generics.ListCreateAPIView):
         instructor = self.request.query_params.get('instructor', '')
         
         if search:
-            queryset = queryset.filter(title__icontains=search)
+            queryset = filter_search(queryset, search)
         if featured.lower() == 'true':
             queryset = queryset.filter(is_featured=True)
         if instructor:
@@ -172,9 +370,57 @@ class TutorialListCreateView(generics.ListCreateAPIView):
         me = self.request.query_params.get('me', '')
         if me.lower() == 'true' and self.request.user.is_authenticated:
             queryset = queryset.filter(created_by=self.request.user)
+        if self.request.method == 'GET':
+            queryset = with_list_annotations(queryset)
         return queryset
 
-class TutorialDetailView(generics.RetrieveUpdateDestroyAPIView):
+    def compute_validators(self):
+        return self.cached_validators(super().compute_validators)
+
+    async def acompute_validators(self):
+        return await self.acached_validators(super().acompute_validators)
+
+class TutorialSearchView(APIView):
+    """Ranked full-text search over tutorials and their contents, with highlighted snippets."""
+    permission_classes = [AllowAny]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        if search_index.get_backend() is None:
+            return Response({'error': 'Search is not available'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        query = request.query_params.get('q', '').strip()
+        page = _positive_int(request.query_params.get('page'), 1)
+        page_size = _positive_int(request.query_params.get('page_size'), self.page_size, self.max_page_size)
+
+        total, hits = search_index.search_tutorials(query, page_size, (page - 1) * page_size)
+        tutorials = with_list_annotations(Tutorial.objects.filter(pk__in=[hit.tutorial_id for hit in hits])).in_bulk()
+        hits = [hit for hit in hits if hit.tutorial_id in tutorials]
+        page_tutorials = [tutorials[hit.tutorial_id] for hit in hits]
+        context = {'request': request, 'progress_map': build_progress_map(request.user, page_tutorials)}
+        rows = TutorialListSerializer(page_tutorials, many=True, context=context).data
+
+        results = []
+        for row, hit in zip(rows, hits):
+            row['search'] = {
+                'score': hit.score,
+                'content_id': hit.content_id,
+                'title_highlight': search_index.render_highlight(hit.title),
+                'snippet': search_index.render_highlight(hit.snippet),
+            }
+            results.append(row)
+
+        url = absolute_uri(request)
+        next_url = replace_query_param(url, 'page', page + 1) if page * page_size < total else None
+        if page <= 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return Response({'count': total, 'next': next_url, 'previous': previous_url, 'results': results})
+
+class TutorialDetailView(ConditionalResponseMixin, AnonymousResponseCacheMixin, AsyncRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Tutorial.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrAdmin]
     parser_classes = [MultiPartParser, FormParser]
@@ -184,6 +430,43 @@ class TutorialDetailView(generics.RetrieveUpdateDestroyAPIView):
             return TutorialCreateSerializer
         return TutorialDetailSerializer
 
+    def get_queryset(self):
+        queryset = Tutorial.objects.all()
+        if self.request.method != 'GET':
+            return queryset
+        contents = TutorialContent.objects.all()
+        user = self.request.user
+        if user.is_authenticated:
+            # The caller's progress rides along with the tutorial and content queries
+            progress = UserTutorialProgress.objects.filter(user=user, tutorial=OuterRef('pk'))
+            completed = UserTutorialProgress.completed_contents.through.objects.filter(
+                tutorialcontent_id=OuterRef('pk'),
+                usertutorialprogress__user=user,
+                usertutorialprogress__tutorial_id=OuterRef('tutorial_id'),
+            )
+            queryset = queryset.annotate(
+                user_percentage=Subquery(progress.values('percentage')[:1]),
+                user_completed=Subquery(progress.values('completed')[:1]),
+            )
+            contents = contents.annotate(user_completed=Exists(completed))
+        return queryset.select_related('created_by').prefetch_related(Prefetch('contents', queryset=contents))
+
+    def compute_validators(self):
+        return self.cached_validators(super().compute_validators)
+
+    async def acompute_validators(self):
+        return await self.acached_validators(super().acompute_validators)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            # Lock the row so an If-Match that passes still holds when the write lands
+            self.get_object()
+            Tutorial.objects.select_for_update().filter(pk=self.kwargs['pk']).exists()
+            response = self.check_preconditions(request)
+            if response is None:
+                response = super().update(request, *args, **kwargs)
+        return self.add_validators(request, response, refresh=True)
+
 class TutorialContentCreateView(APIView):
     permission_classes = [IsAuthenticated, IsInstructorOrAdmin]
     parser_classes = [MultiPartParser, FormParser]
@@ -195,7 +478,8 @@ class TutorialContentCreateView(APIView):
         serializer = TutorialContentCreateSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(tutorial=tutorial)
-            # update progress for existing users? Not necessary here (created contents will reduce percentage for users)
+            # A new lesson lowers every learner's percentage
+            recalculate_progress([tutorial.id])
             return Response(TutorialContentSerializer(serializer.instance, context={'request': request}).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -212,19 +496,118 @@ class TutorialContentDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def destroy(self, request, *args, **kwargs):
         content = self.get_object()
-        tutorial = content.tutorial
+        tutorial_id = content.tutorial_id
         response = super().destroy(request, *args, **kwargs)
-        # recalc progress for users of this tutorial
-        for progress in tutorial.user_progress.all():
-            progress.calculate_progress()
+        recalculate_progress([tutorial_id])
         return response
 
+class ContentUploadCreateView(APIView):
+    """Start a chunked upload of a lesson's media file."""
+    permission_classes = [IsAuthenticated, IsInstructorOrAdmin]
+
+    def post(self, request, tutorial_id):
+        tutorial = get_object_or_404(Tutorial, id=tutorial_id)
+        if not IsOwnerOrAdmin().has_object_permission(request, self, tutorial):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = ContentUploadSerializer(data=request.data)
+        if serializer.is_valid():
+            chunk_size = serializer.validated_data.pop('chunk_size', uploads.DEFAULT_CHUNK_SIZE)
+            upload = serializer.save(tutorial=tutorial, created_by=request.user, chunk_size=chunk_size)
+            return Response(ContentUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class ContentUploadMixin:
+    def get_upload(self, request, pk, for_update=False):
+        queryset = ContentUpload.objects.select_for_update() if for_update else ContentUpload.objects.all()
+        upload = get_object_or_404(queryset, pk=pk)
+        if upload.created_by_id != request.user.id and request_claims(request)[0] != 'admin':
+            raise Http404('No such upload.')
+        return upload
+
+class ContentUploadDetailView(ContentUploadMixin, APIView):
+    """Report which chunks have arrived, or abandon the upload."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        return Response(ContentUploadSerializer(self.get_upload(request, pk)).data)
+
+    def delete(self, request, pk):
+        upload = self.get_upload(request, pk)
+        uploads.discard(upload)
+        if upload.status == 'pending':
+            upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ContentUploadChunkView(ContentUploadMixin, APIView):
+    """Receive one chunk as the raw request body, checked against ``X-Chunk-SHA256``."""
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, pk, index):
+        upload = self.get_upload(request, pk)
+        if upload.status != 'pending':
+            return Response({'error': 'Upload is already complete.'}, status=status.HTTP_409_CONFLICT)
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        try:
+            # request.stream is read in small steps; request.data would buffer the body
+            uploads.store_chunk(upload, index, request.stream, length, request.headers.get('X-Chunk-SHA256'))
+        except uploads.ChunkError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'index': index, 'size': length})
+
+class ContentUploadCompleteView(ContentUploadMixin, APIView):
+    """Assemble the chunks and attach the file to a new TutorialContent."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        serializer = ChunkedContentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            # The lock makes a repeated or concurrent finalize wait and then see the result
+            upload = self.get_upload(request, pk, for_update=True)
+            if upload.status == 'complete':
+                content = upload.content
+                response_status = status.HTTP_200_OK
+            else:
+                try:
+                    name = uploads.assemble(upload, TutorialContent._meta.get_field('file'))
+                except uploads.ChunkError as exc:
+                    return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+                content = serializer.save(tutorial_id=upload.tutorial_id, file=name)
+                upload.status, upload.content = 'complete', content
+                upload.save(update_fields=['status', 'content'])
+                transaction.on_commit(lambda: uploads.discard(upload))
+                recalculate_progress([upload.tutorial_id])
+                response_status = status.HTTP_201_CREATED
+        if content is None:
+            return Response({'error': 'The uploaded content was deleted.'}, status=status.HTTP_410_GONE)
+        return Response(TutorialContentSerializer(content, context={'request': request}).data, status=response_status)
+
+class ContentMediaView(APIView):
+    """Stream a content's uploaded file with Range support, readable wherever the content is."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        content = get_object_or_404(TutorialContent.objects.only('id', 'file'), pk=pk)
+        if not content.file:
+            raise Http404('This content has no file.')
+        try:
+            return serve_file(request, content.file.path, content.file.name)
+        except FileNotFoundError:
+            raise Http404('File not found.')
+
 class UserProgressView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, tutorial_id):
         tutorial = get_object_or_404(Tutorial, id=tutorial_id)
-        progress, created = UserTutorialProgress.objects.get_or_create(user=request.user, tutorial=tutorial)
+        # Reads never create the row; the first progress write does
+        progress = UserTutorialProgress.objects.filter(user=request.user, tutorial=tutorial).first()
+        if progress is None:
+            progress = UserTutorialProgress(user=request.user, tutorial=tutorial)
         serializer = UserProgressSerializer(progress)
         return Response(serializer.data)
 
@@ -237,33 +620,24 @@ class UserProgressView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def post(self, request, tutorial_id):
+        """Mark a few contents complete or incomplete without resending the whole set."""
+        delta = ProgressDeltaSerializer(data=request.data)
+        if not delta.is_valid():
+            return Response(delta.errors, status=status.HTTP_400_BAD_REQUEST)
+        tutorial = get_object_or_404(Tutorial, id=tutorial_id)
+        progress, created = UserTutorialProgress.objects.get_or_create(user=request.user, tutorial=tutorial)
+        progress = apply_progress_delta(progress, delta.validated_data['add'], delta.validated_data['remove'])
+        return Response(UserProgressSerializer(progress).data)
+
 class UserDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user_progress = UserTutorialProgress.objects.filter(user=request.user)
-        in_progress = user_progress.filter(completed=False, percentage__gt=0).count()
-        completed = user_progress.filter(completed=True).count()
-        total_tutorials = Tutorial.objects.count()
-        
-        recent_progress = user_progress.order_by('-updated_at')[:5]
-        recent_tutorials = []
-        for progress in recent_progress:
-            recent_tutorials.append({
-                'tutorial_id': progress.tutorial.id,
-                'tutorial_title': progress.tutorial.title,
-                'percentage': float(progress.percentage),
-                'completed': progress.completed
-            })
-        
-        return Response({
-            'stats': {
-                'in_progress': in_progress,
-                'completed': completed,
-                'total_tutorials': total_tutorials
-            },
-            'recent_tutorials': recent_tutorials
-        })
+        return Response(dashboard.get_dashboard(request.user))
+
+    async def aget(self, request):
+        return Response(await dashboard.aget_dashboard(request.user))
 
 # Instructor-specific endpoint: list tutorials created by current user (convenience)
 class InstructorMyTutorialsView(generics.ListAPIView):
@@ -271,5 +645,6 @@ class InstructorMyTutorialsView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsInstructorOrAdmin]
 
     def get_queryset(self):
-        return Tutorial.objects.filter(created_by=self.request.user).order_by('-created_at')
+        queryset = Tutorial.objects.filter(created_by=self.request.user).order_by('-created_at')
+        return with_list_annotations(queryset)
 
@@ -1,5 +1,6 @@
 import { FaPlay, FaEdit, FaTrash } from 'react-icons/fa';
 import { Link } from 'react-router-dom';
+import ThumbnailImage from './ThumbnailImage';
 
 const EnhancedTutorialCard = ({
   tutorial,
@@ -21,9 +22,9 @@ const EnhancedTutorialCard = ({
       {/* Thumbnail */}
       <div className="relative h-48 bg-gradient-to-br from-indigo-500 to-purple-600 overflow-hidden group">
         {tutorial.thumbnail_url ? (
-          <img
-            src={tutorial.thumbnail_url}
-            alt={tutorial.title}
+          <ThumbnailImage
+            tutorial={tutorial}
+            sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
             className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-300"
           />
         ) : (
@@ -0,0 +1,26 @@
+// Serves the resized WebP/JPEG variants from `tutorial.thumbnails`, falling back to thumbnail_url
+const srcSet = (thumbnails, format) =>
+  Object.entries(thumbnails)
+    .map(([width, urls]) => `${urls[format]} ${width}w`)
+    .join(', ');
+
+const ThumbnailImage = ({ tutorial, sizes, className }) => {
+  if (!tutorial.thumbnails) {
+    return <img src={tutorial.thumbnail_url} alt={tutorial.title} className={className} loading="lazy" />;
+  }
+  return (
+    <picture>
+      <source type="image/webp" srcSet={srcSet(tutorial.thumbnails, 'webp')} sizes={sizes} />
+      <img
+        src={tutorial.thumbnail_url}
+        srcSet={srcSet(tutorial.thumbnails, 'jpeg')}
+        sizes={sizes}
+        alt={tutorial.title}
+        className={className}
+        loading="lazy"
+      />
+    </picture>
+  );
+};
+
+export default ThumbnailImage;
@@ -1,6 +1,7 @@
 import { Link } from 'react-router-dom';
 import { FaPlay, FaCheck, FaUser, FaClock } from 'react-icons/fa';
 import ProgressBar from './ProgressBar';
+import ThumbnailImage from './ThumbnailImage';
 import { useAuth } from '../context/AuthContext';
 import { useState } from 'react';
 
@@ -29,9 +30,9 @@ const TutorialCard = ({ tutorial }) => {
       >
         <div className="relative">
           {tutorial.thumbnail_url ? (
-            <img
-              src={tutorial.thumbnail_url}
-              alt={tutorial.title}
+            <ThumbnailImage
+              tutorial={tutorial}
+              sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
               className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300"
             />
           ) : (
@@ -70,7 +71,10 @@ const TutorialCard = ({ tutorial }) => {
             </div>
             <div className="flex items-center space-x-1">
               <FaClock className="text-gray-400" />
-              <span>{tutorial.content_count || 0} lessons</span>
+              <span>
+                {tutorial.content_count || 0} lessons
+                {tutorial.total_duration > 0 && ` · ${Math.round(tutorial.total_duration / 60)} min`}
+              </span>
             </div>
           </div>
 
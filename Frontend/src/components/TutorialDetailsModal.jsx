@@ -1,5 +1,6 @@
 import { FaTimes, FaPlay, FaBook, FaCalendar, FaUser } from 'react-icons/fa';
 import { Link } from 'react-router-dom';
+import ThumbnailImage from './ThumbnailImage';
 
 const TutorialDetailsModal = ({ tutorial, onClose }) => {
   if (!tutorial) return null;
@@ -22,9 +23,9 @@ const TutorialDetailsModal = ({ tutorial, onClose }) => {
         <div className="p-6">
           {/* Thumbnail */}
           {tutorial.thumbnail_url ? (
-            <img
-              src={tutorial.thumbnail_url}
-              alt={tutorial.title}
+            <ThumbnailImage
+              tutorial={tutorial}
+              sizes="(min-width: 768px) 640px, 100vw"
               className="w-full h-64 object-cover rounded-xl mb-6"
             />
           ) : (
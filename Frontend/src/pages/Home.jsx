@@ -33,7 +33,7 @@ const Home = () => {
     const fetchData = async () => {
       try {
         const tutorialsRes = await tutorialsAPI.getAll({ featured: "true" });
-        setFeaturedTutorials(tutorialsRes.data.slice(0, 6));
+        setFeaturedTutorials(tutorialsRes.data.results.slice(0, 6));
 
         if (isAuthenticated) {
           const dashboardRes = await tutorialsAPI.getDashboard();
@@ -25,10 +25,10 @@ export default function InstructorDashboard() {
   const fetchMyTutorials = async () => {
     try {
       setLoading(true);
-      const res = await tutorialsAPI.getAll({ me: 'true' });
-      setTutorials(res.data);
-      if (res.data.length > 0) {
-        setSelectedTutorial(res.data[0]);
+      const res = await tutorialsAPI.getAll({ me: 'true', page_size: 100 });
+      setTutorials(res.data.results);
+      if (res.data.results.length > 0) {
+        setSelectedTutorial(res.data.results[0]);
       }
     } catch (err) {
       console.error('Failed to fetch tutorials', err);
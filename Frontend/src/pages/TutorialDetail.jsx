@@ -89,7 +89,11 @@ const TutorialDetail = () => {
         completed: isNowComplete,
       }));
 
-      const response = await progressAPI.update(id, newCompleted);
+      const wasCompleted = currentCompleted.includes(contentId);
+      const response = await progressAPI.mark(
+        id,
+        wasCompleted ? { remove: [contentId] } : { add: [contentId] }
+      );
       setProgress({
         ...response.data,
         completed_content_ids: response.data.completed_content_ids,
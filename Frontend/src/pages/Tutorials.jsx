@@ -6,6 +6,8 @@ import { FaSearch, FaSpinner, FaFilter, FaBook } from 'react-icons/fa';
 const Tutorials = () => {
   const [tutorials, setTutorials] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [search, setSearch] = useState('');
   const [filter, setFilter] = useState('all');
 
@@ -21,7 +23,8 @@ const Tutorials = () => {
       if (filter === 'featured') params.featured = 'true';
       
       const response = await tutorialsAPI.getAll(params);
-      setTutorials(response.data);
+      setTutorials(response.data.results);
+      setNextPage(response.data.next);
     } catch (error) {
       console.error('Error fetching tutorials:', error);
     } finally {
@@ -29,6 +32,19 @@ const Tutorials = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await tutorialsAPI.getPage(nextPage);
+      setTutorials((current) => [...current, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error('Error fetching tutorials:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSearch = (e) => {
     e.preventDefault();
     fetchTutorials();
@@ -94,6 +110,17 @@ const Tutorials = () => {
                 <TutorialCard key={tutorial.id} tutorial={tutorial} />
               ))}
             </div>
+            {nextPage && (
+              <div className="flex justify-center mt-8">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="px-6 py-3 bg-indigo-600 text-white rounded-lg font-medium hover:bg-indigo-700 transition disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </>
         ) : (
           <div className="text-center py-20">
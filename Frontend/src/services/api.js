@@ -62,7 +62,9 @@ export const authAPI = {
 };
 
 export const tutorialsAPI = {
+    // List endpoints are cursor-paginated: { next, previous, results }
     getAll: (params) => api.get('/tutorials/', { params }),
+    getPage: (url) => api.get(url),
     getById: (id) => api.get(`/tutorials/${id}/`),
     create: (data) => {
         const formData = new FormData();
@@ -90,8 +92,49 @@ export const tutorialsAPI = {
     getDashboard: () => api.get('/tutorials/dashboard/'),
 };
 
+// Media above this size goes through the resumable chunked upload endpoints
+const CHUNKED_UPLOAD_THRESHOLD = 2 * 1024 * 1024;
+const CHUNK_SIZE = 8 * 1024 * 1024;
+
+const sha256Hex = async (blob) => {
+    const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
+export const uploadAPI = {
+    start: (tutorialId, file) =>
+        api.post(`/tutorials/${tutorialId}/uploads/`, {
+            filename: file.name,
+            total_size: file.size,
+            chunk_size: CHUNK_SIZE,
+        }),
+    status: (uploadId) => api.get(`/tutorials/uploads/${uploadId}/`),
+    putChunk: async (uploadId, index, blob) =>
+        api.put(`/tutorials/uploads/${uploadId}/chunks/${index}/`, blob, {
+            headers: {
+                'Content-Type': 'application/octet-stream',
+                'X-Chunk-SHA256': await sha256Hex(blob),
+            },
+        }),
+    complete: (uploadId, data) => api.post(`/tutorials/uploads/${uploadId}/complete/`, data),
+    // Sends only the chunks the server does not have yet, so calling it again resumes
+    send: async (upload, file) => {
+        const { data: status } = await uploadAPI.status(upload.id);
+        for (const index of status.missing_chunks) {
+            const start = index * status.chunk_size;
+            await uploadAPI.putChunk(upload.id, index, file.slice(start, start + status.chunk_size));
+        }
+    },
+};
+
 export const contentAPI = {
-    create: (tutorialId, data) => {
+    create: async (tutorialId, data) => {
+        if (data.file && data.file.size > CHUNKED_UPLOAD_THRESHOLD) {
+            const { file, text, ...fields } = data;
+            const { data: upload } = await uploadAPI.start(tutorialId, file);
+            await uploadAPI.send(upload, file);
+            return uploadAPI.complete(upload.id, fields);
+        }
         const formData = new FormData();
         Object.keys(data).forEach((key) => {
             if (data[key] !== null && data[key] !== undefined) {
@@ -122,6 +165,8 @@ export const progressAPI = {
         api.patch(`/tutorials/${tutorialId}/progress/`, {
             completed_content_ids: completedContentIds,
         }),
+    mark: (tutorialId, { add = [], remove = [] }) =>
+        api.post(`/tutorials/${tutorialId}/progress/`, { add, remove }),
 };
 
 export default api;
\ No newline at end of file